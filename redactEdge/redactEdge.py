@@ -1,13 +1,26 @@
 import os
-import tempfile
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
-from PIL import Image, ImageTk
 
-from spire.pdf.common import *
-from spire.pdf import *
+from redactedge import BatchExecutor, JobError, JobSpec, expand_inputs
+from redactedge.patterns import split_terms
+from redactedge.preview import TILE_SIZE, PreviewCache
+from redactedge.regions import RegionSet
 
-import fitz  # PyMuPDF
+PREVIEW_DPI = 120
+MIN_PREVIEW_ZOOM = 0.1
+MAX_PREVIEW_ZOOM = 16.0
+
+PATTERN_LABELS = [
+    ("ssn", "SSN"),
+    ("email", "Email"),
+    ("phone", "Phone"),
+    ("credit_card", "Credit Card"),
+    ("iban", "IBAN"),
+]
 
 class VerticalScrolledFrame(ttk.Frame):
     def __init__(self, parent, *args, **kw):
@@ -48,6 +61,7 @@ class PDFBatchEditorApp:
         self.selected_files = []
         self.output_dir = ""
         self.replacement_image_path = ""
+        self.match_image_paths = []
 
         # --- Operation Mode Checkbuttons ---
         self.delete_text_var = tk.BooleanVar()
@@ -63,15 +77,19 @@ class PDFBatchEditorApp:
         self.page_preview_hscrollbar = None
         self.page_preview_vscrollbar = None
         self.page_preview_frame = None
-        self.tk_img = None
-        self.pdf_preview_pix = None
         self.pdf_preview_page_rect = None
         self.current_preview_page = 0
         self.num_preview_pages = 1
+        self.preview_zoom = PREVIEW_DPI / 72
+        self.preview_tiles = {}
+        self.tile_update_pending = False
+        self.preview_cache = PreviewCache()
 
         self.rect_start = None
         self.rect_end = None
         self.rect_id = None
+        # Areas to redact; applied in one pass per page when files are processed.
+        self.regions = RegionSet()
 
         # --- UI Elements ---
         self.upload_btn = tk.Button(container, text="Upload PDF Files", command=self.upload_files, width=20)
@@ -92,10 +110,32 @@ class PDFBatchEditorApp:
 
         self.find_text_var = tk.StringVar()
         self.replace_text_var_str = tk.StringVar()
-        self.find_text_label = tk.Label(container, text="Text to find (comma-separated for multiple):")
+        self.find_text_label = tk.Label(container, text="Text to find (comma-separated for multiple, \\, for a literal comma):")
         self.find_text_label.pack()
         self.find_text_entry = tk.Entry(container, textvariable=self.find_text_var, width=60)
         self.find_text_entry.pack(pady=2)
+        self.match_options_frame = tk.Frame(container)
+        self.match_options_frame.pack()
+        self.case_sensitive_var = tk.BooleanVar(value=False)
+        self.whole_word_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.match_options_frame, text="Match case", variable=self.case_sensitive_var).pack(side=tk.LEFT)
+        tk.Checkbutton(self.match_options_frame, text="Whole words only", variable=self.whole_word_var).pack(side=tk.LEFT)
+        self.use_spire_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.match_options_frame, text="Use Spire.PDF for text", variable=self.use_spire_var).pack(side=tk.LEFT)
+        self.ocr_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.match_options_frame, text="OCR scanned pages", variable=self.ocr_var).pack(side=tk.LEFT)
+        self.pattern_frame = tk.LabelFrame(container, text="Pattern Redaction (Delete Text)", padx=10, pady=5)
+        self.pattern_frame.pack(pady=5)
+        self.pattern_vars = {}
+        for name, label in PATTERN_LABELS:
+            var = tk.BooleanVar(value=False)
+            tk.Checkbutton(self.pattern_frame, text=label, variable=var, command=self.check_ready).pack(side=tk.LEFT)
+            self.pattern_vars[name] = var
+        self.regex_label = tk.Label(container, text="Custom regexes for Delete Text (one per line):")
+        self.regex_label.pack()
+        self.regex_box = tk.Text(container, height=2, width=60)
+        self.regex_box.pack(pady=2)
+        self.regex_box.bind("<KeyRelease>", lambda e: self.check_ready())
         self.replace_text_label = tk.Label(container, text="Replacement text (comma-separated for multiple):")
         self.replace_text_label.pack()
         self.replace_text_entry = tk.Entry(container, textvariable=self.replace_text_var_str, width=60)
@@ -109,6 +149,8 @@ class PDFBatchEditorApp:
 
         self.image_btn = tk.Button(container, text="Select Replacement Image", command=self.select_image, width=25, state=tk.DISABLED)
         self.image_btn.pack(pady=10)
+        self.match_images_btn = tk.Button(container, text="Only Images Like... (optional)", command=self.select_match_images, width=25)
+        self.match_images_btn.pack(pady=2)
 
         # --- Add Textbox widgets (hidden by default) ---
         self.add_text_label = tk.Label(container, text="Text to Add (for Add Textbox mode):")
@@ -120,10 +162,25 @@ class PDFBatchEditorApp:
         self.preview_label.pack_forget()
 
         # --- Delete Table Area widgets (hidden by default) ---
-        self.delete_table_label = tk.Label(container, text="Click and drag on the preview to select table area to delete:")
-        self.delete_area_btn = tk.Button(container, text="Delete Selected Area", command=self.delete_selected_area)
+        self.delete_table_label = tk.Label(container, text="Click and drag on the preview to add areas to delete (any number, any page):")
+        self.area_frame = tk.Frame(container)
+        tk.Label(self.area_frame, text="Apply to pages (blank = this page; e.g. all, odd, 1-3, 5-):").pack(side=tk.LEFT)
+        self.area_pages_var = tk.StringVar()
+        tk.Entry(self.area_frame, textvariable=self.area_pages_var, width=10).pack(side=tk.LEFT)
+        tk.Button(self.area_frame, text="Undo Last Area", command=self.undo_area).pack(side=tk.LEFT, padx=2)
+        tk.Button(self.area_frame, text="Clear Areas", command=self.clear_areas).pack(side=tk.LEFT)
+        self.table_frame = tk.Frame(container)
+        self.auto_tables_var = tk.BooleanVar()
+        tk.Checkbutton(self.table_frame, text="Auto-detect tables on every page", variable=self.auto_tables_var, command=self.check_ready).pack(side=tk.LEFT)
+        tk.Label(self.table_frame, text="Header contains:").pack(side=tk.LEFT)
+        self.table_header_var = tk.StringVar()
+        tk.Entry(self.table_frame, textvariable=self.table_header_var, width=15).pack(side=tk.LEFT)
+        tk.Label(self.table_frame, text="Min. columns:").pack(side=tk.LEFT)
+        self.table_min_columns_var = tk.IntVar(value=2)
+        tk.Spinbox(self.table_frame, from_=1, to=50, width=3, textvariable=self.table_min_columns_var).pack(side=tk.LEFT)
         self.delete_table_label.pack_forget()
-        self.delete_area_btn.pack_forget()
+        self.area_frame.pack_forget()
+        self.table_frame.pack_forget()
 
         # --- Page navigation controls ---
         self.page_nav_frame = tk.Frame(container)
@@ -133,19 +190,60 @@ class PDFBatchEditorApp:
         self.goto_page_entry = tk.Entry(self.page_nav_frame, width=5)
         self.goto_page_btn = tk.Button(self.page_nav_frame, text="Go", command=self.goto_preview_page)
         self.page_info_label = tk.Label(self.page_nav_frame, text="Page 1/1")
+        self.zoom_out_btn = tk.Button(self.page_nav_frame, text="Zoom -", command=self.zoom_out)
+        self.zoom_in_btn = tk.Button(self.page_nav_frame, text="Zoom +", command=self.zoom_in)
+        self.zoom_fit_btn = tk.Button(self.page_nav_frame, text="Fit Width", command=self.zoom_fit_width)
+        self.zoom_label = tk.Label(self.page_nav_frame, text="")
         self.prev_page_btn.pack(side=tk.LEFT, padx=2)
         self.next_page_btn.pack(side=tk.LEFT, padx=2)
         self.goto_page_label.pack(side=tk.LEFT)
         self.goto_page_entry.pack(side=tk.LEFT)
         self.goto_page_btn.pack(side=tk.LEFT, padx=2)
         self.page_info_label.pack(side=tk.LEFT, padx=8)
+        self.zoom_out_btn.pack(side=tk.LEFT, padx=2)
+        self.zoom_in_btn.pack(side=tk.LEFT, padx=2)
+        self.zoom_fit_btn.pack(side=tk.LEFT, padx=2)
+        self.zoom_label.pack(side=tk.LEFT, padx=4)
         self.page_nav_frame.pack_forget()
 
         self.process_btn = tk.Button(container, text="Process Files", command=self.process_files, width=20, state=tk.DISABLED)
         self.process_btn.pack(pady=10)
+        self.scan_btn = tk.Button(container, text="Scan Only (no output)", command=self.scan_only, width=20, state=tk.DISABLED)
+        self.scan_btn.pack(pady=2)
+        self.cancel_btn = tk.Button(container, text="Cancel", command=self.cancel_processing, width=20, state=tk.DISABLED)
+        self.cancel_btn.pack(pady=2)
+        self.progress_bar = ttk.Progressbar(container, orient=tk.HORIZONTAL, length=600, mode="determinate", maximum=100)
+        self.progress_bar.pack(pady=2)
+        self.progress_label = tk.Label(container, text="")
+        self.progress_label.pack()
         self.save_as_jpeg_var = tk.BooleanVar(value=False)
-        self.save_as_jpeg_cb = tk.Checkbutton(container, text="Save processed output as JPEG (in addition to PDF)", variable=self.save_as_jpeg_var)
+        self.save_as_jpeg_cb = tk.Checkbutton(container, text="Save processed output as page images (in addition to PDF)", variable=self.save_as_jpeg_var)
         self.save_as_jpeg_cb.pack(pady=2)
+        self.export_frame = tk.Frame(container)
+        self.export_frame.pack(pady=2)
+        tk.Label(self.export_frame, text="Image format:").pack(side=tk.LEFT)
+        self.export_format_var = tk.StringVar(value="jpeg")
+        tk.OptionMenu(self.export_frame, self.export_format_var, "jpeg", "png", "webp").pack(side=tk.LEFT)
+        tk.Label(self.export_frame, text="DPI:").pack(side=tk.LEFT)
+        self.export_dpi_var = tk.IntVar(value=200)
+        tk.Spinbox(self.export_frame, from_=36, to=1200, width=5, textvariable=self.export_dpi_var).pack(side=tk.LEFT)
+        self.compact_frame = tk.Frame(container)
+        self.compact_frame.pack(pady=2)
+        self.compact_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.compact_frame, text="Compact outputs (subset fonts, drop unused objects)", variable=self.compact_var).pack(side=tk.LEFT)
+        tk.Label(self.compact_frame, text="Downsample images to DPI (0 = keep):").pack(side=tk.LEFT)
+        self.compact_dpi_var = tk.IntVar(value=0)
+        tk.Spinbox(self.compact_frame, from_=0, to=1200, width=5, textvariable=self.compact_dpi_var).pack(side=tk.LEFT)
+        self.workers_frame = tk.Frame(container)
+        self.workers_frame.pack(pady=2)
+        tk.Label(self.workers_frame, text="Worker processes:").pack(side=tk.LEFT)
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        self.workers_spinbox = tk.Spinbox(self.workers_frame, from_=1, to=64, width=5, textvariable=self.workers_var)
+        self.workers_spinbox.pack(side=tk.LEFT)
+        self.use_cache_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(self.workers_frame, text="Skip unchanged files", variable=self.use_cache_var).pack(side=tk.LEFT)
+        self.write_metrics_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.workers_frame, text="Write metrics", variable=self.write_metrics_var).pack(side=tk.LEFT)
 
         self.status_label = tk.Label(container, text="Status:", anchor="w")
         self.status_label.pack(fill="x", padx=10, pady=(20, 0))
@@ -155,6 +253,13 @@ class PDFBatchEditorApp:
 
         self.container = container
 
+        # --- Background processing state ---
+        self.executor = None
+        self.worker_thread = None
+        self.events = queue.Queue()
+        self.log_buffer = []
+        self.log_flush_pending = False
+
     # --- UI/Preview Methods ---
     def toggle_image_btn(self):
         # Show/hide widgets based on which checkbuttons are checked
@@ -163,7 +268,8 @@ class PDFBatchEditorApp:
             self.add_text_box.pack(pady=2)
             self.preview_label.pack()
             self.delete_table_label.pack_forget()
-            self.delete_area_btn.pack_forget()
+            self.area_frame.pack_forget()
+            self.table_frame.pack_forget()
             self.page_nav_frame.pack(pady=3)
             self.current_preview_page = 0
             self.textbox_position = None
@@ -174,7 +280,8 @@ class PDFBatchEditorApp:
             self.add_text_box.pack_forget()
             self.preview_label.pack_forget()
             self.delete_table_label.pack()
-            self.delete_area_btn.pack(pady=2)
+            self.area_frame.pack(pady=2)
+            self.table_frame.pack(pady=2)
             self.page_nav_frame.pack(pady=3)
             self.current_preview_page = 0
             self.textbox_position = None
@@ -185,7 +292,8 @@ class PDFBatchEditorApp:
             self.add_text_box.pack_forget()
             self.preview_label.pack_forget()
             self.delete_table_label.pack_forget()
-            self.delete_area_btn.pack_forget()
+            self.area_frame.pack_forget()
+            self.table_frame.pack_forget()
             self.page_nav_frame.pack_forget()
             self.hide_pdf_preview()
         if self.replace_img_var.get():
@@ -197,30 +305,131 @@ class PDFBatchEditorApp:
     def show_pdf_preview(self):
         if not self.selected_files:
             return
-        pdf_path = self.selected_files[0]
-        doc = fitz.open(pdf_path)
-        self.num_preview_pages = len(doc)
+        self.preview_cache.open(self.selected_files[0])
+        self.num_preview_pages = self.preview_cache.page_count
         page_num = self.current_preview_page
         if page_num >= self.num_preview_pages:
             page_num = 0
             self.current_preview_page = 0
-        page = doc[page_num]
-        self.pdf_preview_page_rect = page.rect
-        pix = page.get_pixmap(dpi=120)
-        self.pdf_preview_pix = pix
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        self.tk_img = ImageTk.PhotoImage(img)
-        doc.close()
+        self.pdf_preview_page_rect = self.preview_cache.page_rect(page_num)
 
-        if self.page_preview_frame:
-            self.page_preview_frame.destroy()
-            self.page_preview_frame = None
-        self.page_preview_canvas = None
-        self.page_preview_hscrollbar = None
-        self.page_preview_vscrollbar = None
+        if self.page_preview_frame is None:
+            self.build_preview_canvas()
+        if not self.page_preview_frame.winfo_ismapped():
+            self.page_preview_frame.pack(pady=5, fill=tk.BOTH, expand=True)
+        self.clear_preview_tiles()
+        if self.rect_id:
+            self.page_preview_canvas.delete(self.rect_id)
+            self.rect_id = None
+        width = self.pdf_preview_page_rect.width * self.preview_zoom
+        height = self.pdf_preview_page_rect.height * self.preview_zoom
+        self.page_preview_canvas.config(scrollregion=(0, 0, width, height))
+        self.page_info_label.config(text=f"Page {page_num+1}/{self.num_preview_pages}")
+        self.zoom_label.config(text=f"{self.preview_zoom * 100:.0f}%")
+        self.update_preview_tiles()
+        self.draw_region_overlays()
+        self.check_ready()
 
+    def draw_region_overlays(self):
+        """Outline the areas that apply to the previewed page (no re-render needed)."""
+        canvas = self.page_preview_canvas
+        if canvas is None or self.pdf_preview_page_rect is None:
+            return
+        canvas.delete("region")
+        origin = self.pdf_preview_page_rect
+        for region in self.regions.on_page(self.current_preview_page, self.num_preview_pages):
+            x0, y0, x1, y1 = region.rect
+            canvas.create_rectangle(
+                (x0 - origin.x0) * self.preview_zoom, (y0 - origin.y0) * self.preview_zoom,
+                (x1 - origin.x0) * self.preview_zoom, (y1 - origin.y0) * self.preview_zoom,
+                outline="red", width=2, dash=() if isinstance(region.pages, int) else (4, 2), tags="region",
+            )
+
+    def undo_area(self):
+        if self.regions:
+            self.log_status(f"Removed area {self.regions.pop().describe()}")
+            self.draw_region_overlays()
+            self.check_ready()
+
+    def clear_areas(self):
+        self.regions.clear()
+        self.draw_region_overlays()
+        self.check_ready()
+
+    def clear_preview_tiles(self):
+        for item, _ in self.preview_tiles.values():
+            self.page_preview_canvas.delete(item)
+        self.preview_tiles = {}
+
+    def schedule_tile_update(self, event=None):
+        if not self.tile_update_pending:
+            self.tile_update_pending = True
+            self.master.after_idle(self.update_preview_tiles)
+
+    def update_preview_tiles(self):
+        """Render and place only the tiles that intersect the visible canvas area."""
+        from PIL import Image, ImageTk
+
+        self.tile_update_pending = False
+        canvas = self.page_preview_canvas
+        if canvas is None or self.pdf_preview_page_rect is None or not self.selected_files:
+            return
+        page_num = self.current_preview_page
+        zoom = self.preview_zoom
+        columns, rows = self.preview_cache.tile_grid(page_num, zoom)
+        x0, y0 = canvas.canvasx(0), canvas.canvasy(0)
+        x1 = x0 + max(canvas.winfo_width(), int(canvas["width"]))
+        y1 = y0 + max(canvas.winfo_height(), int(canvas["height"]))
+        visible = {
+            (col, row)
+            for row in range(max(0, int(y0 // TILE_SIZE)), min(rows, int(y1 // TILE_SIZE) + 1))
+            for col in range(max(0, int(x0 // TILE_SIZE)), min(columns, int(x1 // TILE_SIZE) + 1))
+        }
+        for tile in set(self.preview_tiles) - visible:
+            canvas.delete(self.preview_tiles.pop(tile)[0])
+        for col, row in sorted(visible - set(self.preview_tiles)):
+            rendered = self.preview_cache.get_tile(page_num, zoom, col, row)
+            photo = ImageTk.PhotoImage(Image.frombytes("RGB", [rendered.width, rendered.height], rendered.samples))
+            item = canvas.create_image(col * TILE_SIZE, row * TILE_SIZE, anchor="nw", image=photo)
+            canvas.tag_lower(item)
+            self.preview_tiles[(col, row)] = (item, photo)
+        self.preview_cache.prefetch(page_num, zoom, sorted(visible))
+
+    def set_preview_zoom(self, zoom):
+        zoom = min(max(zoom, MIN_PREVIEW_ZOOM), MAX_PREVIEW_ZOOM)
+        if abs(zoom - self.preview_zoom) < 1e-6:
+            return
+        self.preview_zoom = zoom
+        if self.page_preview_frame is not None and self.page_preview_frame.winfo_ismapped():
+            self.show_pdf_preview()
+
+    def zoom_in(self):
+        self.set_preview_zoom(self.preview_zoom * 1.25)
+
+    def zoom_out(self):
+        self.set_preview_zoom(self.preview_zoom / 1.25)
+
+    def zoom_fit_width(self):
+        if self.page_preview_canvas is not None and self.pdf_preview_page_rect is not None:
+            self.set_preview_zoom(self.page_preview_canvas.winfo_width() / self.pdf_preview_page_rect.width)
+
+    def preview_xview(self, *args):
+        self.page_preview_canvas.xview(*args)
+        self.schedule_tile_update()
+
+    def preview_yview(self, *args):
+        self.page_preview_canvas.yview(*args)
+        self.schedule_tile_update()
+
+    def on_preview_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.preview_yview("scroll", -3, "units")
+        else:
+            self.preview_yview("scroll", 3, "units")
+
+    def build_preview_canvas(self):
+        """Create the preview frame, canvas and scrollbars once; pages only swap tiles."""
         self.page_preview_frame = tk.Frame(self.container)
-        self.page_preview_frame.pack(pady=5, fill=tk.BOTH, expand=True)
 
         self.page_preview_canvas = tk.Canvas(
             self.page_preview_frame,
@@ -230,17 +439,15 @@ class PDFBatchEditorApp:
             yscrollincrement=10
         )
         self.page_preview_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.page_preview_canvas.create_image(0, 0, anchor='nw', image=self.tk_img)
-        self.page_preview_canvas.config(scrollregion=self.page_preview_canvas.bbox("all"))
 
         self.page_preview_vscrollbar = tk.Scrollbar(
-            self.page_preview_frame, orient='vertical', command=self.page_preview_canvas.yview
+            self.page_preview_frame, orient='vertical', command=self.preview_yview
         )
         self.page_preview_vscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.page_preview_canvas.configure(yscrollcommand=self.page_preview_vscrollbar.set)
 
         self.page_preview_hscrollbar = tk.Scrollbar(
-            self.page_preview_frame, orient='horizontal', command=self.page_preview_canvas.xview
+            self.page_preview_frame, orient='horizontal', command=self.preview_xview
         )
         self.page_preview_hscrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         self.page_preview_canvas.configure(xscrollcommand=self.page_preview_hscrollbar.set)
@@ -248,16 +455,14 @@ class PDFBatchEditorApp:
         self.page_preview_canvas.bind("<Button-1>", self.on_preview_press)
         self.page_preview_canvas.bind("<B1-Motion>", self.on_preview_drag)
         self.page_preview_canvas.bind("<ButtonRelease-1>", self.on_preview_release)
-        self.page_info_label.config(text=f"Page {page_num+1}/{self.num_preview_pages}")
-        self.check_ready()
+        self.page_preview_canvas.bind("<Configure>", self.schedule_tile_update)
+        self.page_preview_canvas.bind("<MouseWheel>", self.on_preview_wheel)
+        self.page_preview_canvas.bind("<Button-4>", self.on_preview_wheel)
+        self.page_preview_canvas.bind("<Button-5>", self.on_preview_wheel)
 
     def hide_pdf_preview(self):
         if self.page_preview_frame:
-            self.page_preview_frame.destroy()
-            self.page_preview_frame = None
-        self.page_preview_canvas = None
-        self.page_preview_hscrollbar = None
-        self.page_preview_vscrollbar = None
+            self.page_preview_frame.pack_forget()
 
     def prev_preview_page(self):
         if self.current_preview_page > 0:
@@ -308,16 +513,24 @@ class PDFBatchEditorApp:
         x1, y1 = self.rect_end
         x_min, x_max = sorted([x0, x1])
         y_min, y_max = sorted([y0, y1])
-        x_ratio = self.pdf_preview_page_rect.width / self.pdf_preview_pix.width
-        y_ratio = self.pdf_preview_page_rect.height / self.pdf_preview_pix.height
-        pdf_x1 = x_min * x_ratio
-        pdf_y1 = y_min * y_ratio
-        pdf_x2 = x_max * x_ratio
-        pdf_y2 = y_max * y_ratio
+        # Canvas pixels map to PDF points by the zoom factor alone, at any zoom.
+        origin = self.pdf_preview_page_rect
+        pdf_x1 = origin.x0 + x_min / self.preview_zoom
+        pdf_y1 = origin.y0 + y_min / self.preview_zoom
+        pdf_x2 = origin.x0 + x_max / self.preview_zoom
+        pdf_y2 = origin.y0 + y_max / self.preview_zoom
         if self.delete_table_area_var.get():
-            self.table_rect_pdf = (pdf_x1, pdf_y1, pdf_x2, pdf_y2)
-            self.table_rect_page = self.current_preview_page
-            self.log_status(f"Table area rectangle set: ({pdf_x1:.1f}, {pdf_y1:.1f}) to ({pdf_x2:.1f}, {pdf_y2:.1f}) on page {self.current_preview_page+1}")
+            if abs(pdf_x2 - pdf_x1) < 2 or abs(pdf_y2 - pdf_y1) < 2:
+                self.log_status("Area is too small. Please drag a larger area.")
+                return
+            pages = self.area_pages_var.get().strip() or self.current_preview_page
+            try:
+                region = self.regions.add((pdf_x1, pdf_y1, pdf_x2, pdf_y2), pages)
+            except ValueError as e:
+                messagebox.showerror("Invalid Pages", str(e))
+                return
+            self.log_status(f"Area added: {region.describe()} ({len(self.regions)} area(s) in total)")
+            self.draw_region_overlays()
         else:
             if abs(pdf_x2 - pdf_x1) < 5 or abs(pdf_y2 - pdf_y1) < 5:
                 self.textbox_position = None
@@ -329,31 +542,21 @@ class PDFBatchEditorApp:
                 self.log_status(f"Textbox rectangle set: ({pdf_x1:.1f}, {pdf_y1:.1f}) to ({pdf_x2:.1f}, {pdf_y2:.1f}) on page {self.current_preview_page+1}")
         self.check_ready()
 
-    def delete_selected_area(self):
-        if not hasattr(self, "table_rect_pdf") or not hasattr(self, "table_rect_page"):
-            messagebox.showwarning("Warning", "Please select an area to delete.")
-            return
-        pdf_path = self.selected_files[0]
-        doc = fitz.open(pdf_path)
-        page = doc[self.table_rect_page]
-        x0, y0, x1, y1 = self.table_rect_pdf
-        rect = fitz.Rect(x0, y0, x1, y1)
-        page.draw_rect(rect, color=(1, 1, 1), fill=(1, 1, 1))
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            temp_path = tmp_file.name
-        doc.save(temp_path)
-        doc.close()
-        self.selected_files[0] = temp_path
-        self.show_pdf_preview()
-        messagebox.showinfo("Info", "Selected area deleted for preview! Remember to process files to save.")
-
     def upload_files(self):
         files = filedialog.askopenfilenames(
-            title="Select PDF files",
-            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+            title="Select PDF files or archives",
+            filetypes=[
+                ("PDF files and archives", "*.pdf *.zip *.tar *.tgz *.tar.gz *.tar.bz2 *.tar.xz"),
+                ("PDF files", "*.pdf"),
+                ("All files", "*.*"),
+            ]
         )
         if files:
-            self.selected_files = list(files)
+            try:
+                self.selected_files = expand_inputs(files)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Cannot Read Archive", str(e))
+                return
             self.log_status(f"Selected {len(self.selected_files)} file(s).")
             self.check_ready()
             if self.add_textbox_var.get() or self.delete_table_area_var.get():
@@ -387,6 +590,24 @@ class PDFBatchEditorApp:
         else:
             self.log_status("No replacement image selected.")
 
+    def selected_patterns(self):
+        return [name for name, var in self.pattern_vars.items() if var.get()]
+
+    def custom_regexes(self):
+        return [line.strip() for line in self.regex_box.get("1.0", "end-1c").splitlines() if line.strip()]
+
+    def select_match_images(self):
+        """Pick sample images; image modes then only touch pictures that look like them."""
+        files = filedialog.askopenfilenames(
+            title="Select Sample Image(s) to Match",
+            filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp"), ("All files", "*.*")]
+        )
+        self.match_image_paths = list(files)
+        if files:
+            self.log_status(f"Image modes limited to images like: {', '.join(files)}")
+        else:
+            self.log_status("Image modes apply to all images (by index).")
+
     def check_ready(self):
         ready = bool(self.selected_files and self.output_dir)
         if self.replace_img_var.get():
@@ -396,250 +617,257 @@ class PDFBatchEditorApp:
         if self.replace_text_var.get():
             ready = ready and bool(self.find_text_var.get().strip()) and bool(self.replace_text_var_str.get().strip())
         if self.delete_text_var.get():
-            ready = ready and bool(self.find_text_var.get().strip())
+            ready = ready and bool(self.find_text_var.get().strip() or self.selected_patterns() or self.custom_regexes())
         if self.delete_table_area_var.get():
-            ready = ready and hasattr(self, "table_rect_pdf") and hasattr(self, "table_rect_page")
+            ready = ready and (bool(self.regions) or self.auto_tables_var.get())
+        if self.worker_thread is not None:
+            ready = False
         self.process_btn.config(state=tk.NORMAL if ready else tk.DISABLED)
+        scan_ready = bool(self.selected_files) and self.worker_thread is None
+        self.scan_btn.config(state=tk.NORMAL if scan_ready else tk.DISABLED)
 
-    def hide_spire_watermark(self, pdf_path):
-        doc = fitz.open(pdf_path)
-        for page in doc:
-            page_width = page.rect.width
-            rect_height = 25
-            rect = fitz.Rect(0, 0, page_width, rect_height)
-            page.draw_rect(rect, color=(1, 1, 1), fill=(1, 1, 1))
-        temp_path = pdf_path + ".nowatermark.pdf"
-        doc.save(temp_path)
-        doc.close()
-        os.replace(temp_path, pdf_path)
-
-    def replace_text_in_pdf(self, pdf_path, output_path, pairs):
-        """Replace text using Spire.PDF (case-insensitive, all occurrences)."""
+    def build_job(self):
+        """Translate the checked modes and entries into a ``JobSpec``."""
+        find_texts = split_terms(self.find_text_var.get())
+        replace_texts = split_terms(self.replace_text_var_str.get())
+        image_index_str = self.image_index_var.get().strip()
         try:
-            doc = PdfDocument()
-            doc.LoadFromFile(pdf_path)
-            for find_text, replace_text in pairs:
-                for i in range(doc.Pages.Count):
-                    page = doc.Pages[i]
-                    replacer = PdfTextReplacer(page)
-                    replacer.ReplaceAllText(find_text, replace_text)
-            doc.SaveToFile(output_path)
-            doc.Close()
-            self.hide_spire_watermark(output_path)
-            return True
-        except Exception as e:
-            self.log_status(f"Error replacing text: {e}")
-            return False
+            workers = int(self.workers_var.get())
+        except (tk.TclError, ValueError):
+            workers = None
+
+        job = JobSpec(
+            inputs=self.selected_files,
+            output_dir=self.output_dir,
+            image_index=int(image_index_str) if image_index_str.isdigit() else None,
+            match_images=self.match_image_paths,
+            save_as_jpeg=self.save_as_jpeg_var.get(),
+            export_format=self.export_format_var.get(),
+            export_dpi=self.export_dpi_var.get(),
+            workers=workers,
+            text_backend="spire" if self.use_spire_var.get() else "native",
+            use_cache=self.use_cache_var.get(),
+        )
+        if self.compact_var.get():
+            try:
+                image_dpi = int(self.compact_dpi_var.get())
+            except (tk.TclError, ValueError):
+                image_dpi = 0
+            job.compact = {"image_dpi": image_dpi} if image_dpi > 0 else {}
+        if self.write_metrics_var.get() and self.output_dir:
+            job.metrics_file = os.path.join(self.output_dir, "metrics.jsonl")
+            job.prometheus_file = os.path.join(self.output_dir, "metrics.prom")
+        if self.delete_text_var.get():
+            job.delete_text = find_texts
+            job.case_sensitive = self.case_sensitive_var.get()
+            job.whole_word = self.whole_word_var.get()
+            job.patterns = self.selected_patterns()
+            job.regexes = self.custom_regexes()
+            if self.ocr_var.get():
+                job.ocr = {}
+        if self.replace_text_var.get():
+            job.replace_text = list(zip(find_texts, replace_texts))
+        if self.replace_img_var.get():
+            job.replace_image = self.replacement_image_path
+        if self.delete_img_var.get():
+            job.delete_images = True
+        if self.add_textbox_var.get():
+            job.textbox = {
+                "text": self.add_text_box.get("1.0", "end-1c").strip(),
+                "rect": self.textbox_position,
+                "page": self.textbox_page_num,
+            }
+        if self.delete_table_area_var.get():
+            job.delete_area = self.regions.to_list()
+            if self.auto_tables_var.get():
+                header = self.table_header_var.get().strip()
+                job.auto_tables = {"header": [header] if header else [], "min_columns": self.table_min_columns_var.get()}
+        return job
 
-    def replace_images_in_pdf(self, pdf_path, output_path, replacement_image_path, image_index=None):
-        """Replace images using PyMuPDF."""
+    def process_files(self):
+        """Start the batch on a background thread; the UI polls its events."""
+        job = self.build_job()
         try:
-            doc = fitz.open(pdf_path)
-            for page in doc:
-                images = page.get_images(full=True)
-                if image_index is not None:
-                    if 0 <= image_index < len(images):
-                        xref = images[image_index][0]
-                        page.replace_image(xref, filename=replacement_image_path)
-                else:
-                    for img in images:
-                        xref = img[0]
-                        page.replace_image(xref, filename=replacement_image_path)
-            doc.save(output_path)
-            if getattr(self, 'save_as_jpeg_var', None) and self.save_as_jpeg_var.get():
-                try:
-                    processed_doc = fitz.open(output_path)
-                    for i, page in enumerate(processed_doc):
-                        pix = page.get_pixmap(dpi=200)
-                        jpeg_path = os.path.join(self.output_dir, f"{os.path.splitext(os.path.basename(output_path))[0]}_page_{i+1}.jpg")
-                        pix.save(jpeg_path, "jpeg")
-                    processed_doc.close()
-                    self.log_status(f"Saved {i+1} JPEG(s) for {output_path}")
-                except Exception as e:
-                    self.log_status(f"Error saving JPEG(s) for {output_path}: {e}")
-            doc.close()
-            return True
-        except Exception as e:
-            self.log_status(f"Error replacing images: {e}")
-            return False
-
-    def delete_images_in_pdf(self, pdf_path, output_path, image_index=None):
-        """Delete images using PyMuPDF"""
+            job.validate()
+        except JobError as e:
+            messagebox.showerror("Invalid Job", str(e))
+            return
+        self.executor = BatchExecutor(
+            job.operations(), workers=job.workers, export=job.export_options(),
+            on_progress=lambda index, fraction: self.events.put(("progress", index, fraction)),
+            pipeline_options=job.pipeline_options(), cache=job.result_cache(), metrics=job.metrics_sink(),
+        )
+        self.batch_total = len(job.inputs)
+        self.batch_done = 0
+        self.batch_pages = 0
+        self.batch_processed = 0
+        self.batch_started = time.monotonic()
+        self.file_fractions = {}
+        self.progress_bar.config(value=0)
+        self.progress_label.config(text=f"File 0/{self.batch_total}")
+        self.worker_thread = threading.Thread(target=self.run_batch, args=(self.executor, job), daemon=True)
+        self.worker_thread.start()
+        self.check_ready()
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.master.after(100, self.poll_events)
+
+    def scan_only(self):
+        """Count the matches of the find list and delete areas; nothing is written.
+
+        The terms, patterns and marked areas are scanned for whichever modes
+        are checked.
+        """
+        from redactedge.scan import Scanner
+
+        job = self.build_job()
+        job.delete_text = split_terms(self.find_text_var.get())
+        job.replace_text = []
+        job.case_sensitive = self.case_sensitive_var.get()
+        job.whole_word = self.whole_word_var.get()
+        job.patterns = self.selected_patterns()
+        job.regexes = self.custom_regexes()
+        job.delete_area = self.regions.to_list()
         try:
-            doc = fitz.open(pdf_path)
-            for page in doc:
-                images = page.get_images(full=True)
-                if image_index is not None:
-                    if 0 <= image_index < len(images):
-                        xref = images[image_index][0]
-                        page.delete_image(xref)
-                else:
-                    for img in images:
-                        xref = img[0]
-                        page.delete_image(xref)
-            doc.save(output_path)
-            if getattr(self, 'save_as_jpeg_var', None) and self.save_as_jpeg_var.get():
-                try:
-                    processed_doc = fitz.open(output_path)
-                    for i, page in enumerate(processed_doc):
-                        pix = page.get_pixmap(dpi=200)
-                        jpeg_path = os.path.join(self.output_dir, f"{os.path.splitext(os.path.basename(output_path))[0]}_page_{i+1}.jpg")
-                        pix.save(jpeg_path, "jpeg")
-                    processed_doc.close()
-                    self.log_status(f"Saved {i+1} JPEG(s) for {output_path}")
-                except Exception as e:
-                    self.log_status(f"Error saving JPEG(s) for {output_path}: {e}")
-            doc.close()
-            return True
-        except Exception as e:
-            self.log_status(f"Error deleting images: {e}")
-            return False
+            scanner = Scanner.for_job(job)
+        except ValueError as e:
+            messagebox.showerror("Invalid Job", str(e))
+            return
+        if not scanner:
+            messagebox.showerror("Invalid Job", "Nothing to scan for: enter text, patterns or delete areas.")
+            return
+        self.batch_total = len(job.inputs)
+        self.batch_done = 0
+        self.batch_pages = 0
+        self.batch_processed = 0
+        self.batch_started = time.monotonic()
+        self.file_fractions = {}
+        self.progress_bar.config(value=0)
+        self.progress_label.config(text=f"File 0/{self.batch_total}")
+        self.worker_thread = threading.Thread(target=self.run_scan, args=(scanner, job), daemon=True)
+        self.worker_thread.start()
+        self.check_ready()
+        self.master.after(100, self.poll_events)
+
+    def run_scan(self, scanner, job):
+        """Worker thread: scan every input and forward the results to the UI queue."""
+        from redactedge.scan import scan_files
 
-    def add_textbox_to_pdf(self, pdf_path, output_path, text, position, page_num):
-        """Add static text to a PDF using Spire.PDF for Python."""
         try:
-            doc = PdfDocument()
-            doc.LoadFromFile(pdf_path)
-            if page_num < doc.Pages.Count:
-                page = doc.Pages[page_num]
-                x1, y1, x2, y2 = position
-                font = PdfFont(PdfFontFamily.Helvetica, 12.0)
-                brush = PdfBrushes.get_Black()
-                page.Canvas.DrawString(text, font, brush, float(x1), float(y1))
-            doc.SaveToFile(output_path)
-            doc.Close()
-            self.hide_spire_watermark(output_path)
-            return True
+            for result in scan_files(job.inputs, scanner, job.workers):
+                self.events.put(("scanned", result))
         except Exception as e:
-            self.log_status(f"Error adding textbox: {e}")
-            return False
+            self.events.put(("log", f"Scan failed: {e}"))
+        self.events.put(("scan_finished",))
 
-    def delete_text_in_pdf(self, pdf_path, output_path, delete_texts):
-        """Delete text using PyMuPDF redaction annotations."""
+    def run_batch(self, executor, job):
+        """Worker thread: run the executor and forward every result to the UI queue."""
         try:
-            doc = fitz.open(pdf_path)
-            for page in doc:
-                for txt in delete_texts:
-                    rects = page.search_for(txt)
-                    for rect in rects:
-                        page.add_redact_annot(rect)
-                page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
-            doc.save(output_path, garbage=3, deflate=True)
-            doc.close()
-            return True
+            for result in executor.run(job.inputs, job.output_dir):
+                self.events.put(("result", result))
         except Exception as e:
-            self.log_status(f"Error deleting text: {e}")
-            return False
+            self.events.put(("log", f"Batch failed: {e}"))
+        self.events.put(("finished", executor.cancelled))
 
-    def process_files(self):
-        processed = 0
-
-        find_texts = [x.strip() for x in self.find_text_var.get().split(",") if x.strip()]
-        replace_texts = [x.strip() for x in self.replace_text_var_str.get().split(",") if x.strip()]
-        pairs = list(zip(find_texts, replace_texts))
-        image_index_str = self.image_index_var.get().strip()
-        image_index = int(image_index_str) if image_index_str.isdigit() else None
+    def cancel_processing(self):
+        if self.executor is not None:
+            self.executor.cancel()
+            self.cancel_btn.config(state=tk.DISABLED)
+            self.log_status("Cancelling after the current page...")
 
-        for file_path in self.selected_files:
-            try:
-                base_name = os.path.basename(file_path)
-                name, ext = os.path.splitext(base_name)
-                input_path = file_path
-                temp_files = []
-
-                # 1. Delete Text
-                if self.delete_text_var.get():
-                    temp_path = input_path + ".deltext.pdf"
-                    if self.delete_text_in_pdf(input_path, temp_path, find_texts):
-                        input_path = temp_path
-                        temp_files.append(temp_path)
-                        self.log_status(f"Deleted text(s) {find_texts} in: {input_path}")
-
-                # 2. Replace Text
-                if self.replace_text_var.get():
-                    temp_path = input_path + ".replacetext.pdf"
-                    if self.replace_text_in_pdf(input_path, temp_path, pairs):
-                        input_path = temp_path
-                        temp_files.append(temp_path)
-                        self.log_status(f"Text replacement completed: {input_path}")
-
-                # 3. Replace Image
-                if self.replace_img_var.get():
-                    temp_path = input_path + ".replaceimg.pdf"
-                    if self.replace_images_in_pdf(input_path, temp_path, self.replacement_image_path, image_index):
-                        input_path = temp_path
-                        temp_files.append(temp_path)
-                        self.log_status(f"Image replacement completed: {input_path}")
-
-                # 4. Delete Image
-                if self.delete_img_var.get():
-                    temp_path = input_path + ".delimg.pdf"
-                    if self.delete_images_in_pdf(input_path, temp_path, image_index):
-                        input_path = temp_path
-                        temp_files.append(temp_path)
-                        self.log_status(f"Image deletion completed: {input_path}")
-
-                # 5. Add Textbox
-                if self.add_textbox_var.get():
-                    temp_path = input_path + ".addtextbox.pdf"
-                    textbox_text = self.add_text_box.get("1.0", "end-1c").strip()
-                    if self.add_textbox_to_pdf(input_path, temp_path, textbox_text, self.textbox_position, self.textbox_page_num):
-                        input_path = temp_path
-                        temp_files.append(temp_path)
-                        self.log_status(f"Textbox addition completed: {input_path}")
-
-                # 6. Delete Table Area
-                if self.delete_table_area_var.get():
-                    doc = fitz.open(input_path)
-                    page_num = getattr(self, "table_rect_page", 0)
-                    x0, y0, x1, y1 = getattr(self, "table_rect_pdf", (0, 0, 0, 0))
-                    if page_num >= len(doc):
-                        page_num = 0
-                    rect = fitz.Rect(x0, y0, x1, y1)
-                    page = doc[page_num]
-                    page.draw_rect(rect, color=(1, 1, 1), fill=(1, 1, 1))
-                    temp_path = input_path + ".deltable.pdf"
-                    doc.save(temp_path)
-                    doc.close()
-                    input_path = temp_path
-                    temp_files.append(temp_path)
-                    self.log_status(f"Deleted table area on page {page_num+1} and saved: {input_path}")
-
-                # Final output
-                output_path = os.path.join(self.output_dir, f"{name}_modified{ext}")
-                os.replace(input_path, output_path)
-                self.log_status(f"Processed file saved: {output_path}")
-                processed += 1
-                if self.save_as_jpeg_var.get():
-                    try:
-                        doc = fitz.open(output_path)
-                        for i, page in enumerate(doc):
-                            pix = page.get_pixmap(dpi=200)
-                            jpeg_path = os.path.join(
-                                self.output_dir,
-                                f"{os.path.splitext(os.path.basename(output_path))[0]}_page_{i+1}.jpg"
-            )
-                            # Use pil_save to ensure JPEG format (PyMuPDF v1.22+)
-                            pix.pil_save(jpeg_path, format="JPEG")
-                        doc.close()
-                        self.log_status(f"Saved {i+1} JPEG(s) for {output_path}")
-                    except Exception as e:
-                        self.log_status(f"Error saving JPEG(s) for {output_path}: {e}")
-
-                # Clean up temp files (except output)
-                for temp_file in temp_files:
-                    if os.path.exists(temp_file) and temp_file != output_path:
-                        os.remove(temp_file)
-
-            except Exception as e:
-                self.log_status(f"Error processing {file_path}: {e}")
+    def poll_events(self):
+        finished = None
+        try:
+            while True:
+                event = self.events.get_nowait()
+                if event[0] == "progress":
+                    self.file_fractions[event[1]] = event[2]
+                elif event[0] == "result":
+                    self.handle_result(event[1])
+                elif event[0] == "scanned":
+                    self.handle_scan_result(event[1])
+                elif event[0] == "log":
+                    self.log_status(event[1])
+                elif event[0] in ("finished", "scan_finished"):
+                    finished = event
+        except queue.Empty:
+            pass
+        self.update_progress()
+        if finished is None:
+            self.master.after(100, self.poll_events)
+        elif finished[0] == "scan_finished":
+            self.finish_scan()
+        else:
+            self.finish_batch(cancelled=finished[1])
+
+    def handle_result(self, result):
+        for message in result.messages:
+            self.log_status(message)
+        self.file_fractions.pop(result.index, None)
+        self.batch_done += 1
+        if result.ok:
+            self.batch_processed += 1
+            self.batch_pages += result.pages
+        elif not result.cancelled:
+            self.log_status(f"Error processing {result.input_path}: {result.error}")
+
+    def handle_scan_result(self, result):
+        self.batch_done += 1
+        self.batch_pages += result.page_count
+        if not result.clean:
+            self.batch_processed += 1
+            self.log_status(result.describe())
+
+    def update_progress(self):
+        if not self.batch_total:
+            return
+        done = self.batch_done + sum(self.file_fractions.values())
+        fraction = min(done / self.batch_total, 1.0)
+        elapsed = time.monotonic() - self.batch_started
+        self.progress_bar.config(value=fraction * 100)
+        text = f"File {self.batch_done}/{self.batch_total}"
+        if elapsed > 0 and self.batch_pages:
+            text += f" | {self.batch_pages / elapsed:.1f} pages/s"
+        if fraction > 0:
+            remaining = elapsed * (1 - fraction) / fraction
+            text += f" | ETA {int(remaining // 60)}m {int(remaining % 60):02d}s"
+        self.progress_label.config(text=text)
+
+    def finish_batch(self, cancelled):
+        self.worker_thread = None
+        self.executor = None
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.check_ready()
+        if cancelled:
+            self.log_status(f"Batch cancelled after {self.batch_processed} file(s).")
+            messagebox.showinfo("Batch Processing Cancelled", f"Processed {self.batch_processed} file(s) before cancelling.")
+        else:
+            self.progress_bar.config(value=100)
+            messagebox.showinfo("Batch Processing Complete", f"Processed {self.batch_processed} file(s).")
+            self.log_status("Batch processing complete.")
 
-        messagebox.showinfo("Batch Processing Complete", f"Processed {processed} file(s).")
-        self.log_status("Batch processing complete.")
+    def finish_scan(self):
+        self.worker_thread = None
+        self.check_ready()
+        self.progress_bar.config(value=100)
+        summary = f"{self.batch_processed} of {self.batch_done} file(s) have matches or could not be read."
+        self.log_status(f"Scan complete: {summary}")
+        messagebox.showinfo("Scan Complete", summary)
 
     def log_status(self, message):
+        """Queue a status line; lines are written to the widget in one batch."""
+        self.log_buffer.append(message)
+        if not self.log_flush_pending:
+            self.log_flush_pending = True
+            self.master.after(50, self.flush_log)
+
+    def flush_log(self):
+        self.log_flush_pending = False
+        if not self.log_buffer:
+            return
+        text = "\n".join(self.log_buffer) + "\n"
+        self.log_buffer = []
         self.status_text.config(state=tk.NORMAL)
-        self.status_text.insert(tk.END, message + "\n")
+        self.status_text.insert(tk.END, text)
         self.status_text.see(tk.END)
         self.status_text.config(state=tk.DISABLED)
 
@@ -0,0 +1,45 @@
+"""Core PDF editing engine used by the RedactEdge GUI and CLI.
+
+Names are resolved lazily so that ``import redactedge`` (and the CLI's
+argument parsing) does not pay for PyMuPDF until a job actually runs.
+Tkinter, Pillow and Spire.PDF are never imported by this package unless an
+operation that needs them is executed.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "BatchExecutor": "executor",
+    "FileResult": "tasks",
+    "HotFolder": "watch",
+    "JobError": "job",
+    "JobSpec": "job",
+    "Operation": "pipeline",
+    "Pipeline": "pipeline",
+    "PipelineContext": "pipeline",
+    "AddTextboxOperation": "operations",
+    "DeleteAreaOperation": "operations",
+    "DeleteImageOperation": "operations",
+    "DeleteTextOperation": "operations",
+    "ReplaceImageOperation": "operations",
+    "ReplaceTextOperation": "operations",
+    "Scanner": "scan",
+    "Service": "service",
+    "expand_inputs": "job",
+    "load_job": "job",
+    "output_path_for": "tasks",
+    "process_document": "tasks",
+    "run_job": "job",
+    "scan_files": "scan",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
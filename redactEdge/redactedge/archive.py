@@ -0,0 +1,256 @@
+"""PDF inputs inside ZIP/TAR archives or byte buffers, and output archives.
+
+``job.expand_inputs`` names every PDF inside an archive input
+``{archive}::{member}``. Such an input is read straight from the archive
+and opened with ``fitz.open(stream=...)``; nothing is extracted to disk.
+Members stored without compression (ZIP ``STORED``, plain ``.tar``) are
+memory-mapped instead of copied. Each process keeps its archives open, so
+the member index is read once per process, not once per file. A compressed
+TAR member can only be reached by decompressing the archive up to it, so
+ZIP or plain TAR suits very large bundles better.
+
+An output directory whose name has an archive suffix is written as an
+archive (``OutputArchive``): outputs are staged in a scratch directory and
+moved into the archive as each file finishes.
+"""
+
+import contextlib
+import functools
+import mmap
+import os
+import shutil
+import struct
+import tarfile
+import threading
+import zipfile
+
+import fitz  # PyMuPDF
+
+MEMBER_SEPARATOR = "::"
+# Archive suffix -> tarfile compression ("" = none); ZIP has no entry.
+TAR_SUFFIXES = {
+    ".tar": "", ".tar.gz": "gz", ".tgz": "gz", ".tar.bz2": "bz2", ".tbz2": "bz2", ".tar.xz": "xz", ".txz": "xz",
+}
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+# TarFile objects are not thread-safe.
+_lock = threading.Lock()
+
+
+def _tar_compression(path):
+    lower = path.lower()
+    for suffix, compression in TAR_SUFFIXES.items():
+        if lower.endswith(suffix):
+            return compression
+    return None
+
+
+def is_archive(path):
+    """True if ``path`` names a ZIP or TAR archive (by its suffix)."""
+    return path.lower().endswith(".zip") or _tar_compression(path) is not None
+
+
+def member_ref(archive, member):
+    return f"{archive}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member(source):
+    """``(archive, member)`` if ``source`` names an archive member, else ``None``."""
+    if not isinstance(source, str):
+        return None
+    archive, separator, member = source.partition(MEMBER_SEPARATOR)
+    if not separator or not is_archive(archive):
+        return None
+    return archive, member
+
+
+class _Archive:
+    """An open archive with its member index."""
+
+    def __init__(self, path):
+        self.compression = _tar_compression(path)
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.map = None
+        if self.compression is None:
+            self.zip = zipfile.ZipFile(self.file)
+            self.members = {info.filename: info for info in self.zip.infolist() if not info.is_dir()}
+        else:
+            self.tar = tarfile.open(fileobj=self.file, mode=f"r:{self.compression}")
+            self.members = {info.name: info for info in self.tar.getmembers() if info.isfile()}
+
+    def info(self, member):
+        try:
+            return self.members[member]
+        except KeyError:
+            raise FileNotFoundError(f"No member {member!r} in the archive") from None
+
+    def size(self, member):
+        info = self.info(member)
+        return info.file_size if self.compression is None else info.size
+
+    def _span(self, info):
+        """Byte range of an uncompressed member in the archive file, or ``None``."""
+        if self.map is None:
+            return None
+        if self.compression is None:
+            if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+                return None
+            header = _ZIP_LOCAL_HEADER.unpack_from(self.map, info.header_offset)
+            start = info.header_offset + _ZIP_LOCAL_HEADER.size + header[9] + header[10]
+            return start, start + info.file_size
+        if self.compression == "":
+            return info.offset_data, info.offset_data + info.size
+        return None
+
+    def read(self, member):
+        """Member contents: a view of the mapped archive where possible, else bytes."""
+        info = self.info(member)
+        span = self._span(info)
+        if span is not None:
+            return memoryview(self.map)[span[0]:span[1]]
+        if self.compression is None:
+            return self.zip.read(info)
+        with _lock, self.tar.extractfile(info) as f:
+            return f.read()
+
+    @contextlib.contextmanager
+    def open(self, member):
+        info = self.info(member)
+        if self.compression is None:
+            with self.zip.open(info) as f:
+                yield f
+        else:
+            with _lock, self.tar.extractfile(info) as f:
+                yield f
+
+
+@functools.lru_cache(maxsize=8)
+def _open_archive(path, size, mtime_ns):
+    return _Archive(path)
+
+
+def _archive(path):
+    stat = os.stat(path)
+    return _open_archive(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def list_members(path):
+    """Input names of the PDFs inside archive ``path``, in archive order."""
+    try:
+        members = _archive(path).members
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise OSError(f"Cannot read archive {path}: {e}") from e
+    names = []
+    for name in members:
+        base = os.path.basename(name)
+        if name.lower().endswith(".pdf") and not base.startswith("._") and "__MACOSX/" not in name:
+            names.append(member_ref(path, name))
+    return names
+
+
+def open_input(source):
+    """Open a file path, archive member name or PDF bytes as a ``fitz.Document``."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open("pdf", source)
+    member = split_member(source)
+    if member is None:
+        return fitz.open(source)
+    archive, name = member
+    return fitz.open("pdf", _archive(archive).read(name))
+
+
+@contextlib.contextmanager
+def open_binary(source):
+    """Binary file object for a file path or archive member name."""
+    member = split_member(source)
+    if member is None:
+        with open(source, "rb") as f:
+            yield f
+    else:
+        archive, name = member
+        with _archive(archive).open(name) as f:
+            yield f
+
+
+def input_stat(source):
+    """``(size, mtime_ns)`` of an input; a member has the archive's mtime."""
+    member = split_member(source)
+    if member is None:
+        stat = os.stat(source)
+        return stat.st_size, stat.st_mtime_ns
+    archive, name = member
+    return _archive(archive).size(name), os.stat(archive).st_mtime_ns
+
+
+def input_size(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    return input_stat(source)[0]
+
+
+def copy_input(source, target):
+    """Write the bytes of an input (path, member name or bytes) to file ``target``."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        with open(target, "wb") as f:
+            f.write(source)
+        return
+    with open_binary(source) as src, open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+class OutputArchive:
+    """Collects finished files into a ZIP or TAR archive.
+
+    ZIP members are stored uncompressed, since PDF streams are compressed
+    already. The archive is written under a temporary name and renamed into
+    place by ``close``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.part = path + ".part"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        compression = _tar_compression(path)
+        if compression is None:
+            self.zip = zipfile.ZipFile(self.part, "w", zipfile.ZIP_STORED, allowZip64=True)
+            self.tar = None
+        else:
+            self.zip = None
+            self.tar = tarfile.open(self.part, f"w:{compression}")
+        self.count = 0
+
+    def add(self, path, name):
+        """Move file ``path`` into the archive as member ``name``."""
+        if self.zip is not None:
+            self.zip.write(path, name)
+        else:
+            self.tar.add(path, name)
+        os.remove(path)
+        self.count += 1
+
+    def add_result(self, result, staging_dir):
+        """Move the output of a ``FileResult`` and its page images into the archive.
+
+        Updates ``result.output_path`` to ``{archive}::{member}``; a result
+        whose output is missing is marked failed instead.
+        """
+        if not result.ok:
+            return
+        if not os.path.isfile(result.output_path):
+            result.ok = False
+            result.error = f"Output {result.output_path} is missing; nothing was stored in the archive"
+            return
+        folder, output_name = os.path.split(result.output_path)
+        stem = os.path.splitext(output_name)[0]
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if os.path.isfile(path) and (name == output_name or name.startswith(f"{stem}_page_")):
+                self.add(path, os.path.relpath(path, staging_dir).replace(os.sep, "/"))
+        result.output_path = member_ref(self.path, os.path.relpath(result.output_path, staging_dir).replace(os.sep, "/"))
+        result.messages.append(f"Stored in archive: {result.output_path}")
+
+    def close(self):
+        (self.zip or self.tar).close()
+        os.replace(self.part, self.path)
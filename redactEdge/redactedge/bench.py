@@ -0,0 +1,291 @@
+"""Benchmark harness with a synthetic PDF corpus.
+
+``make_corpus`` writes reproducible test documents with PyMuPDF: light and
+dense text, shared and unique images, scanned (image-only) pages and a
+document large enough for large-document mode. ``run_benchmark`` runs
+every scenario (each editing mode, page image export, and all modes
+together) over every document. Each run uses a fresh worker process, so
+peak RSS and caches do not leak between cases. It reports pages/s, stage
+latency percentiles, peak RSS and output size as JSON. ``compare`` checks
+a report against a stored baseline.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+# name -> (pages, words per page, images per page, shared images, scanned)
+CORPUS = {
+    "text_light": (50, 150, 0, False, False),
+    "text_dense": (50, 1500, 0, False, False),
+    "images_shared": (50, 100, 4, True, False),
+    "images_unique": (50, 100, 4, False, False),
+    "scanned": (20, 300, 0, False, True),
+    "large": (600, 150, 1, True, False),
+}
+# Page counts are divided by this in quick mode.
+QUICK_DIVISOR = 10
+DEFAULT_TOLERANCE = 0.15
+
+_WORDS = (
+    "drawing revision approved sheet scale tolerance material steel assembly detail section "
+    "bolt flange weld surface finish dimension note customer project issue date checked"
+).split()
+_SENSITIVE = ["secret", "confidential", "ACME Corp", "jane.doe@example.com", "078-05-1120",
+              "4111 1111 1111 1111", "+1 415 555 0100"]
+TERMS = ["secret", "confidential", "ACME Corp"]
+PATTERNS = ["ssn", "email", "phone", "credit_card", "iban"]
+REPLACEMENT_IMAGE = "replacement.png"
+
+
+def _page_lines(rng, words):
+    line, lines = [], []
+    for _ in range(words):
+        line.append(rng.choice(_SENSITIVE) if rng.random() < 0.03 else rng.choice(_WORDS))
+        if len(line) == 12:
+            lines.append(" ".join(line))
+            line = []
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def _solid_pixmap(rng, size=96):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), False)
+    pix.set_rect(pix.irect, tuple(rng.randrange(256) for _ in range(3)))
+    for _ in range(6):
+        x, y = rng.randrange(size), rng.randrange(size)
+        pix.set_rect(fitz.IRect(x, y, x + size // 4, y + size // 4), tuple(rng.randrange(256) for _ in range(3)))
+    return pix
+
+
+def _text_page(page, lines, fontsize):
+    y = 60
+    for line in lines:
+        if y > page.rect.height - 40:
+            break
+        page.insert_text((40, y), line, fontname="helv", fontsize=fontsize)
+        y += fontsize * 1.3
+
+
+def make_document(path, pages, words, images, shared, scanned, seed=0):
+    """Write one synthetic PDF to ``path``."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    shared_xrefs = []
+    fontsize = 10 if words <= 400 else 5
+    for _ in range(pages):
+        lines = _page_lines(rng, words)
+        if scanned:
+            source = fitz.open()
+            _text_page(source.new_page(), lines, fontsize)
+            pix = source[0].get_pixmap(dpi=100, colorspace=fitz.csGRAY)
+            source.close()
+            page = doc.new_page()
+            page.insert_image(page.rect, pixmap=pix)
+            continue
+        page = doc.new_page()
+        _text_page(page, lines, fontsize)
+        for i in range(images):
+            rect = fitz.Rect(40 + i * 130, 680, 160 + i * 130, 800)
+            if shared and i < len(shared_xrefs):
+                page.insert_image(rect, xref=shared_xrefs[i])
+            else:
+                xref = page.insert_image(rect, pixmap=_solid_pixmap(rng))
+                if shared:
+                    shared_xrefs.append(xref)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def make_corpus(directory, quick=False, names=None):
+    """Create the corpus in ``directory`` (reusing files already there); return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for seed, (name, (pages, words, images, shared, scanned)) in enumerate(sorted(CORPUS.items())):
+        if names and name not in names:
+            continue
+        if quick:
+            pages = max(2, pages // QUICK_DIVISOR)
+        path = os.path.join(directory, f"{name}_{pages}p.pdf")
+        if not os.path.exists(path):
+            make_document(path + ".part", pages, words, images, shared, scanned, seed)
+            os.replace(path + ".part", path)
+        paths.append(path)
+    replacement = os.path.join(directory, REPLACEMENT_IMAGE)
+    if not os.path.exists(replacement):
+        _solid_pixmap(random.Random(99), 64).save(replacement)
+    return paths
+
+
+def scenarios(corpus_dir):
+    """Return ``{name: (operations, export options or None)}`` for every benchmarked mode."""
+    from .export import ExportOptions
+    from .operations import (
+        AddTextboxOperation,
+        DeleteAreaOperation,
+        DeleteImageOperation,
+        DeleteTextOperation,
+        ReplaceImageOperation,
+        ReplaceTextOperation,
+    )
+
+    replacement = os.path.join(corpus_dir, REPLACEMENT_IMAGE)
+    modes = {
+        "delete_text": [DeleteTextOperation(TERMS)],
+        "delete_patterns": [DeleteTextOperation([], patterns=PATTERNS)],
+        "replace_text": [ReplaceTextOperation([("secret", "public"), ("ACME Corp", "Globex")])],
+        "replace_image": [ReplaceImageOperation(replacement)],
+        "delete_images": [DeleteImageOperation()],
+        "add_textbox": [AddTextboxOperation("APPROVED", (50, 50, 250, 80), 0)],
+        "delete_area": [DeleteAreaOperation([{"rect": (40, 600, 560, 760), "pages": "all"}])],
+    }
+    result = {name: (ops, None) for name, ops in modes.items()}
+    result["export_jpeg"] = ([], ExportOptions("jpeg", 100))
+    result["all"] = ([op for ops in modes.values() for op in ops], ExportOptions("jpeg", 100))
+    return result
+
+
+def _run_case(input_path, operations, export):
+    """Process one file in a scratch directory (runs in a fresh worker process)."""
+    from .tasks import output_path_for, process_document
+
+    scratch = tempfile.mkdtemp(prefix="redactedge-bench-")
+    try:
+        output_path = output_path_for(input_path, scratch)
+        started = time.perf_counter()
+        result = process_document(0, input_path, output_path, operations, export)
+        wall = time.perf_counter() - started
+        if not result.ok:
+            return {"error": result.error}
+        return {
+            "wall": wall,
+            "pages": result.pages,
+            "timings": result.timings,
+            "peak_rss": result.peak_rss,
+            "output_bytes": sum(os.path.getsize(os.path.join(scratch, n)) for n in os.listdir(scratch)),
+        }
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (``q`` in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = math.ceil(q / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def _summary(values):
+    return {
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "mean": sum(values) / len(values),
+    }
+
+
+def run_benchmark(corpus_dir, quick=False, repeat=3, only=None, documents=None, log=None):
+    """Run the benchmark and return the JSON-ready report."""
+    log = log or (lambda message: None)
+    paths = make_corpus(corpus_dir, quick, documents)
+    cases = scenarios(corpus_dir)
+    if only:
+        unknown = set(only) - set(cases)
+        if unknown:
+            raise ValueError(f"Unknown scenario(s): {', '.join(sorted(unknown))}; choose from {', '.join(cases)}")
+        cases = {name: cases[name] for name in only}
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+            "repeat": repeat,
+        },
+        "documents": {os.path.basename(p): os.path.getsize(p) for p in paths},
+        "scenarios": {},
+    }
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for name, (operations, export) in cases.items():
+            stages, walls, rss, sizes, errors = {}, [], [], {}, {}
+            pages = 0
+            for path in paths:
+                document = os.path.basename(path)
+                for _ in range(repeat):
+                    run = pool.apply(_run_case, (path, operations, export))
+                    if "error" in run:
+                        errors[document] = run["error"]
+                        break
+                    walls.append(run["wall"])
+                    pages += run["pages"]
+                    for stage, seconds in run["timings"].items():
+                        stages.setdefault(stage, []).append(seconds)
+                    if run["peak_rss"]:
+                        rss.append(run["peak_rss"])
+                    sizes[document] = run["output_bytes"]
+            total = sum(walls)
+            entry = {
+                "pages_per_sec": pages / total if total else 0.0,
+                "wall": _summary(walls) if walls else None,
+                "stages": {stage: _summary(values) for stage, values in stages.items()},
+                "peak_rss": max(rss) if rss else None,
+                "output_bytes": sizes,
+            }
+            if errors:
+                entry["errors"] = errors
+            report["scenarios"][name] = entry
+            log(f"{name:<16} {entry['pages_per_sec']:9.1f} pages/s"
+                + (f"  peak {entry['peak_rss'] / 2**20:.0f} MiB" if entry["peak_rss"] else "")
+                + (f"  {len(errors)} error(s)" if errors else ""))
+    return report
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a list of regressions of ``report`` against ``baseline``.
+
+    Lower throughput, or higher peak RSS or output size, by more than
+    ``tolerance`` (a fraction) counts as a regression.
+    """
+    regressions = []
+    for name, current in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if before["pages_per_sec"] and current["pages_per_sec"] < before["pages_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {current['pages_per_sec']:.1f} pages/s, baseline {before['pages_per_sec']:.1f}"
+            )
+        if before.get("peak_rss") and current.get("peak_rss") and \
+                current["peak_rss"] > before["peak_rss"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak RSS {current['peak_rss'] / 2**20:.0f} MiB, "
+                f"baseline {before['peak_rss'] / 2**20:.0f} MiB"
+            )
+        for document, size in current["output_bytes"].items():
+            old = before.get("output_bytes", {}).get(document)
+            if old and size > old * (1 + tolerance):
+                regressions.append(f"{name}: {document} output {size} bytes, baseline {old}")
+    return regressions
+
+
+def save_report(report, path):
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + ".part", path)
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
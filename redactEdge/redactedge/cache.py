@@ -0,0 +1,162 @@
+"""Persistent result cache for idempotent, resumable batches.
+
+A SQLite database in the output directory records, for every finished file,
+the SHA-1 of its input, the fingerprint of the job that produced it
+(``JobSpec.fingerprint``) and the size, mtime and SHA-1 of the output. When
+the same content is submitted again with the same job, the existing output
+is reused. If it was written under another name, it is hard-linked (or
+copied) instead of processed again. Each file is committed as soon as it
+finishes, so an interrupted batch resumes where it stopped. Input hashes are
+memoised by (path, size, mtime) so that re-runs do not re-read unchanged
+inputs. Lookups and records happen per file, in whichever process handles
+the file, so the database is opened in WAL mode with a busy timeout.
+"""
+
+import os
+import shutil
+import sqlite3
+import time
+
+from .archive import input_stat
+from .preview import file_hash
+
+DATABASE_NAME = ".redactedge-cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inputs (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    hash TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    input_hash TEXT,
+    job_hash TEXT,
+    output_path TEXT,
+    output_hash TEXT,
+    output_size INTEGER,
+    output_mtime_ns INTEGER,
+    pages INTEGER,
+    elapsed REAL,
+    finished_at REAL,
+    PRIMARY KEY (input_hash, job_hash, output_path)
+);
+"""
+
+
+class ResultCache:
+    """Result cache for one output directory and one job fingerprint.
+
+    The database connection is opened on first use, so an instance may be
+    created on one thread and used on another, or pickled into a worker
+    process (the connection is not sent along).
+    """
+
+    def __init__(self, output_dir, job_hash):
+        self.path = os.path.join(output_dir, DATABASE_NAME)
+        self.job_hash = job_hash
+        self.db = None
+
+    def _connect(self):
+        if self.db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(self.path, timeout=30)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(_SCHEMA)
+        return self.db
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["db"] = None
+        return state
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def input_hash(self, path):
+        """SHA-1 of ``path`` (a file or archive member), memoised by absolute path, size and mtime."""
+        db = self._connect()
+        path = os.path.abspath(path)
+        size, mtime_ns = input_stat(path)
+        row = db.execute("SELECT size, mtime_ns, hash FROM inputs WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == size and row[1] == mtime_ns:
+            return row[2]
+        digest = file_hash(path)
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO inputs VALUES (?, ?, ?, ?)",
+                (path, size, mtime_ns, digest),
+            )
+        return digest
+
+    def lookup(self, index, input_path, output_path):
+        """Return a cached ``FileResult`` for this file, or ``None`` to process it."""
+        from .tasks import FileResult
+
+        db = self._connect()
+        try:
+            digest = self.input_hash(input_path)
+        except OSError:
+            return None
+        rows = db.execute(
+            "SELECT output_path, output_hash, output_size, output_mtime_ns, pages FROM results "
+            "WHERE input_hash = ? AND job_hash = ?",
+            (digest, self.job_hash),
+        ).fetchall()
+        target = os.path.abspath(output_path)
+        rows.sort(key=lambda row: row[0] != target)
+        for path, output_hash, size, mtime_ns, pages in rows:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                continue
+            result = FileResult(index, input_path, output_path)
+            result.ok = True
+            result.cached = True
+            result.pages = pages
+            if path != target:
+                self._materialize(path, target)
+                self.record(result, digest, pages=pages, output_hash=output_hash)
+                result.messages.append(f"Unchanged input, linked cached output: {output_path}")
+            else:
+                result.messages.append(f"Unchanged input, kept existing output: {output_path}")
+            return result
+        return None
+
+    @staticmethod
+    def _materialize(source, target):
+        part = target + ".part"
+        if os.path.exists(part):
+            os.remove(part)
+        try:
+            os.link(source, part)
+        except OSError:
+            shutil.copy2(source, part)
+        os.replace(part, target)
+
+    def record(self, result, input_hash=None, pages=None, output_hash=None):
+        """Store a successful ``FileResult`` so later runs can reuse it."""
+        if not result.ok or not result.output_path:
+            return
+        db = self._connect()
+        output_path = os.path.abspath(result.output_path)
+        stat = os.stat(output_path)
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    input_hash or self.input_hash(result.input_path),
+                    self.job_hash,
+                    output_path,
+                    output_hash or file_hash(output_path),
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    result.pages if pages is None else pages,
+                    result.elapsed,
+                    time.time(),
+                ),
+            )
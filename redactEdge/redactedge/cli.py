@@ -0,0 +1,507 @@
+"""Command-line entry point: ``python -m redactedge``."""
+
+import argparse
+import sys
+import time
+
+from .job import JobError, JobSpec, load_job
+
+# Defaults shown in --help. They are repeated here rather than imported, so
+# that building the parser does not import PyMuPDF through the engine modules.
+SERVICE_PORT = 8765  # service.DEFAULT_PORT
+WATCH_SETTLE = 2.0  # watch.DEFAULT_SETTLE
+WATCH_POLL_INTERVAL = 1.0  # watch.DEFAULT_POLL_INTERVAL
+SCAN_SOURCES = ("annotations", "metadata", "bookmarks", "embedded")  # scan.SOURCES
+
+
+def parse_rect(value):
+    try:
+        rect = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        rect = ()
+    if len(rect) != 4:
+        raise argparse.ArgumentTypeError("expected x0,y0,x1,y1")
+    return rect
+
+
+def parse_area(value):
+    """``X0,Y0,X1,Y1`` or ``X0,Y0,X1,Y1@PAGES`` -> (rect, page spec or None)."""
+    rect, _, pages = value.partition("@")
+    if pages:
+        from .regions import parse_pages
+
+        try:
+            parse_pages(pages, 1)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    return parse_rect(rect), pages or None
+
+
+def parse_pair(value):
+    if "=" not in value:
+        raise argparse.ArgumentTypeError("expected FIND=REPLACE")
+    return tuple(value.split("=", 1))
+
+
+def add_run_parser(subparsers):
+    p = subparsers.add_parser("run", help="process PDFs headlessly")
+    p.add_argument("inputs", nargs="*", help="PDF files, ZIP/TAR archives, directories or glob patterns")
+    add_job_arguments(p)
+    p.set_defaults(func=cmd_run)
+
+
+def add_job_arguments(p):
+    """Job options shared by ``run`` and ``watch``."""
+    p.add_argument("-j", "--job", help="JSON or YAML job file; command-line options override it")
+    p.add_argument("-o", "--output-dir",
+                   help="directory for the *_modified.pdf outputs, or a .zip/.tar[.gz] archive to write them into")
+    p.add_argument("--delete-text", action="append", metavar="TEXT", help="text to redact (repeatable)")
+    p.add_argument("--pattern", action="append", metavar="NAME",
+                   help="redact a built-in pattern: ssn, email, phone, credit_card, iban (repeatable)")
+    p.add_argument("--regex", action="append", metavar="EXPR", help="redact matches of a regex (repeatable)")
+    p.add_argument("--case-sensitive", action="store_true", help="match --delete-text case exactly")
+    p.add_argument("--whole-word", action="store_true", help="only redact --delete-text as whole words")
+    p.add_argument("--ocr", action="store_true", help="recognize scanned pages (needs Tesseract) for text deletion")
+    p.add_argument("--ocr-language", metavar="LANG", help="Tesseract language(s), e.g. eng+deu (default eng)")
+    p.add_argument("--ocr-dpi", type=int, help="resolution scanned pages are recognized at (default 300)")
+    p.add_argument("--ocr-workers", type=int, help="pages recognized in parallel per file")
+    p.add_argument("--replace-text", action="append", type=parse_pair, metavar="FIND=REPLACE",
+                   help="text replacement pair (repeatable)")
+    p.add_argument("--replace-image", metavar="IMAGE", help="replace images with this file")
+    p.add_argument("--delete-images", action="store_true", help="delete images")
+    p.add_argument("--image-index", type=int, help="only the Nth image on each page (0=first)")
+    p.add_argument("--image-hash", action="append", metavar="SHA1",
+                   help="only images whose raw stream has this SHA-1 (see 'images'; repeatable)")
+    p.add_argument("--match-image", action="append", metavar="IMAGE",
+                   help="only images that look like this sample image (repeatable)")
+    p.add_argument("--text-backend", choices=["native", "spire"],
+                   help="engine for --replace-text and --textbox (default native)")
+    p.add_argument("--textbox", metavar="TEXT", help="text to add")
+    p.add_argument("--textbox-rect", type=parse_rect, metavar="X0,Y0,X1,Y1")
+    p.add_argument("--textbox-page", type=int, default=0)
+    p.add_argument("--delete-area", type=parse_area, action="append", metavar="X0,Y0,X1,Y1[@PAGES]",
+                   help="area to redact (repeatable); PAGES like all, odd, even, last, 1-3,7 or 5-")
+    p.add_argument("--area-page", type=int, default=0, help="0-based page for areas given without @PAGES")
+    p.add_argument("--auto-tables", action="store_true", help="also redact the tables detected on every page")
+    p.add_argument("--table-header", action="append", metavar="TEXT",
+                   help="only tables whose header row contains TEXT (repeatable)")
+    p.add_argument("--table-min-columns", type=int, metavar="N", help="only tables with at least N columns")
+    p.add_argument("--table-max-columns", type=int, metavar="N", help="only tables with at most N columns")
+    p.add_argument("--table-min-rows", type=int, metavar="N", help="only tables with at least N rows")
+    p.add_argument("--table-strategy", choices=["lines", "text"],
+                   help="detect tables by ruling lines or by text alignment (default lines)")
+    p.add_argument("--compact", action="store_true",
+                   help="shrink outputs: drop unused objects, subset fonts, pack object streams")
+    p.add_argument("--compact-image-dpi", type=int, metavar="DPI",
+                   help="with --compact, downsample images shown above 1.5x DPI to DPI")
+    p.add_argument("--compact-image-quality", type=int, metavar="Q", help="JPEG quality of downsampled images (default 75)")
+    p.add_argument("--compact-lossless-to-jpeg", action="store_true",
+                   help="also re-encode downsampled lossless images (logos, line art) as JPEG")
+    p.add_argument("--no-font-subsetting", action="store_true", help="with --compact, keep embedded fonts whole")
+    p.add_argument("--no-object-streams", action="store_true", help="with --compact, do not pack object streams")
+    p.add_argument("--compact-measure", action="store_true",
+                   help="with --compact, count only what the stage removes (costs an extra in-memory save per file)")
+    p.add_argument("--jpeg", action="store_true", help="also save every output page as an image")
+    p.add_argument("--export-format", choices=["jpeg", "png", "webp"], help="page image format (implies --jpeg)")
+    p.add_argument("--export-dpi", type=int, help="page image resolution (default 200)")
+    p.add_argument("--export-quality", type=int, help="JPEG/WebP quality (default 90)")
+    p.add_argument("-w", "--workers", type=int, help="worker processes (default: CPU count)")
+    p.add_argument("--large-threshold", type=int, metavar="PAGES",
+                   help="page count from which large-document mode is used (default 500, 0=never)")
+    p.add_argument("--window-pages", type=int, metavar="PAGES",
+                   help="pages between resource cache flushes in large-document mode (default 64)")
+    p.add_argument("--incremental", choices=["never", "safe", "always"],
+                   help="append changes to large documents instead of rewriting them (default safe)")
+    p.add_argument("--shard-threshold", type=int, metavar="PAGES",
+                   help="split documents of at least PAGES pages across processes (default 0=never)")
+    p.add_argument("--shard-workers", type=int, help="processes per sharded document, shared between the batch workers (default: CPU count)")
+    p.add_argument("--no-cache", action="store_true",
+                   help="process every input even if an identical one was already processed by the same job")
+    p.add_argument("--no-template-reuse", action="store_true",
+                   help="do not reuse tables between files with the same page layout")
+    p.add_argument("--scratch-dir", help="where outputs wait before going into an output archive (default: system temp)")
+    p.add_argument("--metrics", metavar="FILE", help="append per-stage metrics as JSON lines to FILE")
+    p.add_argument("--prometheus", metavar="FILE", help="keep Prometheus text-format metrics in FILE")
+    p.add_argument("--profile-over", type=float, metavar="SECONDS",
+                   help="save a profile of every file that takes longer than SECONDS")
+    p.add_argument("--profile-dir", help="directory for profiles (default OUTPUT_DIR/profiles)")
+    p.add_argument("--profiler", choices=["cprofile", "pyinstrument"], help="profiler to use (default cprofile)")
+
+
+def build_spec(args):
+    spec = load_job(args.job) if args.job else JobSpec()
+    if args.inputs:
+        spec.inputs = list(args.inputs)
+    if args.output_dir:
+        spec.output_dir = args.output_dir
+    if args.delete_text:
+        spec.delete_text = args.delete_text
+    if args.pattern:
+        spec.patterns = args.pattern
+    if args.regex:
+        spec.regexes = args.regex
+    if args.case_sensitive:
+        spec.case_sensitive = True
+    if args.whole_word:
+        spec.whole_word = True
+    ocr_options = {"language": args.ocr_language, "dpi": args.ocr_dpi, "workers": args.ocr_workers}
+    ocr_options = {k: v for k, v in ocr_options.items() if v is not None}
+    if args.ocr or (ocr_options and spec.ocr is not None):
+        spec.ocr = dict(spec.ocr or {}, **ocr_options)
+    if args.replace_text:
+        spec.replace_text = args.replace_text
+    if args.replace_image:
+        spec.replace_image = args.replace_image
+    if args.delete_images:
+        spec.delete_images = True
+    if args.image_index is not None:
+        spec.image_index = args.image_index
+    if args.image_hash:
+        spec.image_hashes = args.image_hash
+    if args.match_image:
+        spec.match_images = args.match_image
+    if args.text_backend:
+        spec.text_backend = args.text_backend
+    if args.textbox:
+        spec.textbox = {"text": args.textbox, "rect": args.textbox_rect, "page": args.textbox_page}
+    if args.delete_area:
+        spec.delete_area = [
+            {"rect": rect, "pages": pages} if pages else {"rect": rect, "page": args.area_page}
+            for rect, pages in args.delete_area
+        ]
+    table_options = {
+        "header": args.table_header, "min_columns": args.table_min_columns,
+        "max_columns": args.table_max_columns, "min_rows": args.table_min_rows,
+        "strategy": args.table_strategy,
+    }
+    table_options = {k: v for k, v in table_options.items() if v is not None}
+    if args.auto_tables or (table_options and spec.auto_tables is not None):
+        spec.auto_tables = dict(spec.auto_tables or {}, **table_options)
+    compact_options = {
+        "image_dpi": args.compact_image_dpi, "image_quality": args.compact_image_quality,
+        "lossless_to_jpeg": args.compact_lossless_to_jpeg or None,
+        "subset_fonts": False if args.no_font_subsetting else None,
+        "object_streams": False if args.no_object_streams else None,
+        "measure": args.compact_measure or None,
+    }
+    compact_options = {k: v for k, v in compact_options.items() if v is not None}
+    if args.compact or (compact_options and spec.compact is not None):
+        spec.compact = dict(spec.compact or {}, **compact_options)
+    if args.jpeg or args.export_format:
+        spec.save_as_jpeg = True
+    if args.export_format:
+        spec.export_format = args.export_format
+    if args.export_dpi:
+        spec.export_dpi = args.export_dpi
+    if args.export_quality:
+        spec.export_quality = args.export_quality
+    if args.workers:
+        spec.workers = args.workers
+    if args.large_threshold is not None:
+        spec.large_threshold = args.large_threshold
+    if args.window_pages:
+        spec.window_pages = args.window_pages
+    if args.incremental:
+        spec.incremental = args.incremental
+    if args.shard_threshold is not None:
+        spec.shard_threshold = args.shard_threshold
+    if args.shard_workers:
+        spec.shard_workers = args.shard_workers
+    if args.no_cache:
+        spec.use_cache = False
+    if args.no_template_reuse:
+        spec.reuse_templates = False
+    if args.scratch_dir:
+        spec.scratch_dir = args.scratch_dir
+    if args.metrics:
+        spec.metrics_file = args.metrics
+    if args.prometheus:
+        spec.prometheus_file = args.prometheus
+    if args.profile_over is not None:
+        spec.profile_over = args.profile_over
+    if args.profile_dir:
+        spec.profile_dir = args.profile_dir
+    if args.profiler:
+        spec.profile_tool = args.profiler
+    return spec
+
+
+def cmd_run(args):
+    from .job import run_job
+
+    spec = build_spec(args)
+    started = time.perf_counter()
+    results = run_job(spec, log=print)
+    failed = [r for r in results if not r.ok]
+    cached = sum(1 for r in results if r.cached)
+    elapsed = time.perf_counter() - started
+    print(f"Processed {len(results) - len(failed)}/{len(results)} file(s) in {elapsed:.1f}s"
+          + (f" ({cached} unchanged, taken from the result cache)." if cached else "."))
+    compacted = [r.bytes_saved for r in results if r.bytes_saved is not None]
+    if compacted:
+        print(f"Compaction saved {sum(compacted) / 2**20:.2f} MiB over {len(compacted)} file(s).")
+    return 1 if failed else 0
+
+
+def add_watch_parser(subparsers):
+    p = subparsers.add_parser("watch", help="process PDFs dropped into hot folders until interrupted")
+    p.add_argument("inputs", nargs="*", help="directories to watch (recursively)")
+    add_job_arguments(p)
+    p.add_argument("--settle", type=float, default=WATCH_SETTLE, metavar="SECONDS",
+                   help=f"time a file must stay unchanged before it is processed (default {WATCH_SETTLE})")
+    p.add_argument("--poll-interval", type=float, default=WATCH_POLL_INTERVAL, metavar="SECONDS",
+                   help=f"directory scan interval when polling (default {WATCH_POLL_INTERVAL})")
+    p.add_argument("--poll", action="store_true", help="poll instead of using inotify (e.g. on network shares)")
+    p.add_argument("--queue-size", type=int, help="settled files that may wait for a worker (default 2x workers)")
+    p.set_defaults(func=cmd_watch)
+
+
+def cmd_watch(args):
+    import asyncio
+    import os
+
+    from .watch import HotFolder
+
+    spec = build_spec(args)
+    spec.validate()
+    if not spec.inputs:
+        raise JobError("No directory to watch.")
+    if spec.output_archive():
+        raise JobError("watch writes outputs to a directory, not an archive.")
+    missing = [path for path in spec.inputs if not os.path.isdir(path)]
+    if missing:
+        raise JobError(f"Not a directory: {', '.join(missing)}")
+    log = lambda message: print(message, flush=True)
+    folder = HotFolder(spec, args.settle, args.poll_interval, args.queue_size, not args.poll, log=log)
+    try:
+        asyncio.run(folder.serve())
+    except KeyboardInterrupt:
+        pass
+    print("Stopped.")
+    return 0
+
+
+def add_serve_parser(subparsers):
+    p = subparsers.add_parser("serve", help="keep warm workers running behind a local HTTP/JSON job API")
+    p.add_argument("--host", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    p.add_argument("--port", type=int, default=SERVICE_PORT, help=f"port to listen on (default {SERVICE_PORT})")
+    p.add_argument("--socket", help="listen on this Unix socket instead of a TCP port")
+    p.add_argument("-o", "--output-dir", default="redactedge-service",
+                   help="directory for job outputs that do not name their own")
+    p.add_argument("-w", "--workers", type=int, help="warm worker processes (default: CPU count)")
+    p.add_argument("--max-queue", type=int,
+                   help="files that may wait for a worker before 503, and the most per job (default 16x workers)")
+    p.add_argument("--recycle", type=int, metavar="FILES", help="replace a worker after this many files")
+    p.add_argument("--preload-image", action="append", default=[], metavar="PATH",
+                   help="replacement image every worker reads at start-up (repeatable)")
+    p.add_argument("--token", help="require 'Authorization: Bearer TOKEN' on every request")
+    p.add_argument("--input-root", action="append", metavar="DIR",
+                   help="directory jobs may read inputs and images from (repeatable; default: current directory)")
+    p.add_argument("--output-root", action="append", default=[], metavar="DIR",
+                   help="directory besides --output-dir that jobs may write to (repeatable)")
+    p.set_defaults(func=cmd_serve)
+
+
+def cmd_serve(args):
+    from .service import Service, make_server, serve
+
+    log = lambda message: print(message, flush=True)
+    service = Service(args.output_dir, args.workers, args.max_queue, args.recycle, args.preload_image, log=log,
+                      input_roots=args.input_root, output_roots=args.output_root)
+    service.start()
+    server = make_server(service, args.host, args.port, args.socket, args.token, log=log)
+    log(f"Listening on {args.socket or f'http://{args.host}:{server.server_address[1]}'}")
+    serve(service, server)
+    print("Stopped.")
+    return 0
+
+
+def add_scan_arguments(p):
+    """Find-list and content options shared by ``scan`` and ``verify``."""
+    p.add_argument("-j", "--job", help="JSON or YAML job file whose find list and delete areas are used")
+    p.add_argument("--delete-text", action="append", metavar="TEXT", help="text to look for (repeatable)")
+    p.add_argument("--pattern", action="append", metavar="NAME",
+                   help="a built-in pattern: ssn, email, phone, credit_card, iban (repeatable)")
+    p.add_argument("--regex", action="append", metavar="EXPR", help="matches of a regex (repeatable)")
+    p.add_argument("--case-sensitive", action="store_true", help="match --delete-text case exactly")
+    p.add_argument("--whole-word", action="store_true", help="only match --delete-text as whole words")
+    p.add_argument("--replace-text", action="append", type=parse_pair, metavar="FIND=REPLACE",
+                   help="replacement pair whose FIND is looked for (repeatable)")
+    p.add_argument("--delete-area", type=parse_area, action="append", metavar="X0,Y0,X1,Y1[@PAGES]",
+                   help="report text inside this area (repeatable)")
+    p.add_argument("--area-page", type=int, default=0, help="0-based page for areas given without @PAGES")
+    for source in SCAN_SOURCES:
+        p.add_argument(f"--{source}", dest="sources", action="append_const", const=source,
+                       help=f"also scan {source}")
+    p.add_argument("-w", "--workers", type=int, help="worker processes (default: CPU count)")
+    p.add_argument("--report", metavar="FILE", help="write a JSON report with per-page counts to FILE")
+    p.add_argument("-q", "--quiet", action="store_true", help="only print files with matches and the summary")
+
+
+def add_scan_parser(subparsers):
+    p = subparsers.add_parser("scan", help="count find-list matches per file and page without changing anything")
+    p.add_argument("inputs", nargs="*", help="PDF files, ZIP/TAR archives, directories or glob patterns")
+    add_scan_arguments(p)
+    p.add_argument("--all-content", action="store_true",
+                   help="also scan annotations, metadata, bookmarks and embedded files")
+    p.set_defaults(func=cmd_scan, verify=False)
+
+
+def add_verify_parser(subparsers):
+    p = subparsers.add_parser("verify", help="fail outputs in which find-list text can still be extracted")
+    p.add_argument("inputs", nargs="*", help="outputs to check (default: the job's output directory)")
+    add_scan_arguments(p)
+    p.add_argument("--text-only", action="store_true",
+                   help="only check page text (default: also annotations, metadata, bookmarks, embedded files)")
+    p.set_defaults(func=cmd_scan, verify=True)
+
+
+def build_scanner(args):
+    """``(scanner, inputs)`` for ``scan`` and ``verify``."""
+    from .scan import SOURCES, Scanner
+
+    spec = load_job(args.job) if args.job else JobSpec()
+    if args.delete_text:
+        spec.delete_text = args.delete_text
+    if args.pattern:
+        spec.patterns = args.pattern
+    if args.regex:
+        spec.regexes = args.regex
+    if args.case_sensitive:
+        spec.case_sensitive = True
+    if args.whole_word:
+        spec.whole_word = True
+    if args.replace_text:
+        spec.replace_text = args.replace_text
+    if args.delete_area:
+        spec.delete_area = [
+            {"rect": rect, "pages": pages} if pages else {"rect": rect, "page": args.area_page}
+            for rect, pages in args.delete_area
+        ]
+    if args.verify:
+        sources = args.sources or (() if args.text_only else SOURCES)
+        inputs = args.inputs or ([spec.output_dir] if spec.output_dir else [])
+    else:
+        sources = SOURCES if args.all_content else args.sources or ()
+        inputs = args.inputs or spec.inputs
+    try:
+        scanner = Scanner.for_job(spec, sources, args.verify)
+    except ValueError as e:
+        raise JobError(f"Invalid find list: {e}")
+    if not scanner:
+        raise JobError("Nothing to look for: give --delete-text, --pattern, --regex, --replace-text or a job.")
+    if not inputs:
+        raise JobError("No input files.")
+    return scanner, inputs
+
+
+def cmd_scan(args):
+    import json
+
+    from .job import expand_inputs
+    from .scan import scan_files
+
+    scanner, inputs = build_scanner(args)
+    files = expand_inputs(inputs)
+    if not files:
+        raise JobError("No PDF files found.")
+    started = time.perf_counter()
+    results = []
+    for result in scan_files(files, scanner, args.workers):
+        results.append(result)
+        if not result.clean:
+            print(("LEAK " if args.verify and result.ok else "") + result.describe(), flush=True)
+        elif not args.quiet:
+            print(result.describe(), flush=True)
+    elapsed = time.perf_counter() - started
+    failed = [r for r in results if not r.ok]
+    matched = [r for r in results if r.ok and not r.clean]
+    pages = sum(r.page_count for r in results)
+    print(f"Scanned {len(results)} file(s), {pages} page(s) in {elapsed:.1f}s "
+          f"({pages / max(elapsed, 1e-9):.0f} pages/s): {len(matched)} with matches, {len(failed)} unreadable.")
+    if args.report:
+        report = {
+            "verify": args.verify,
+            "files": len(results),
+            "pages": pages,
+            "matched": len(matched),
+            "failed": len(failed),
+            "elapsed": round(elapsed, 3),
+            "results": [r.to_dict() for r in results],
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+    if args.verify:
+        print("Verification failed." if matched or failed else "Verification passed: no leaks found.")
+        return 1 if matched or failed else 0
+    return 1 if failed else 0
+
+
+def add_bench_parser(subparsers):
+    p = subparsers.add_parser("bench", help="benchmark every mode on a synthetic corpus")
+    p.add_argument("--corpus", default="bench-corpus", help="directory for the generated PDFs (reused)")
+    p.add_argument("--quick", action="store_true", help="a corpus 10x smaller, for a fast check")
+    p.add_argument("--repeat", type=int, default=3, help="runs per document and scenario (default 3)")
+    p.add_argument("--scenario", action="append", help="only this scenario (repeatable)")
+    p.add_argument("--document", action="append", help="only this corpus document kind (repeatable)")
+    p.add_argument("-o", "--output", help="write the JSON report here")
+    p.add_argument("--baseline", help="JSON report to compare against; exit code 1 on regressions")
+    p.add_argument("--tolerance", type=float, default=0.15, help="allowed regression fraction (default 0.15)")
+    p.set_defaults(func=cmd_bench)
+
+
+def cmd_bench(args):
+    from . import bench
+
+    try:
+        report = bench.run_benchmark(
+            args.corpus, args.quick, args.repeat, args.scenario, args.document, log=print
+        )
+    except ValueError as e:
+        raise JobError(str(e))
+    if args.output:
+        bench.save_report(report, args.output)
+        print(f"Report written to {args.output}")
+    if args.baseline:
+        regressions = bench.compare(report, bench.load_report(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+def add_images_parser(subparsers):
+    p = subparsers.add_parser("images", help="list the images of a PDF with their hashes")
+    p.add_argument("pdf")
+    p.set_defaults(func=cmd_images)
+
+
+def cmd_images(args):
+    from .images import describe_images
+
+    print("xref  size        sha1                                      phash             pages")
+    for xref, pages, width, height, sha1, phash in describe_images(args.pdf):
+        used = ",".join(str(p) for p in pages[:10]) + ("..." if len(pages) > 10 else "")
+        print(f"{xref:<5} {f'{width}x{height}':<11} {sha1}  {phash}  {used}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="redactedge", description="Batch PDF redaction and editing.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    add_run_parser(subparsers)
+    add_watch_parser(subparsers)
+    add_serve_parser(subparsers)
+    add_scan_parser(subparsers)
+    add_verify_parser(subparsers)
+    add_bench_parser(subparsers)
+    add_images_parser(subparsers)
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (JobError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
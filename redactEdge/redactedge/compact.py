@@ -0,0 +1,111 @@
+"""Final compaction stage: the same pages in fewer bytes.
+
+``Compactor`` runs once per document, after every operation and before the
+save. It optionally downsamples images above a target resolution
+(``Document.rewrite_images``; an image is only replaced when the result is
+smaller) and subsets embedded fonts to the glyphs that are used (MuPDF's
+own subsetter, no fontTools needed). It then
+saves with unreferenced objects removed (``garbage``), every stream
+deflated, and objects packed into object streams. The bytes saved are the
+input file's size minus the output's, which costs nothing to work out but
+also counts what the operations removed. With ``measure`` set, the
+document is serialized once more in memory just before the stage, and the
+bytes saved are that size minus the output's: only what the stage itself
+removed, at the price of a second save's time and memory.
+"""
+
+import fitz  # PyMuPDF
+
+# Images are downsampled only above this multiple of the target DPI, so an
+# image that is barely over the target is not resampled for nothing.
+DOWNSAMPLE_ABOVE = 1.5
+DEFAULT_IMAGE_QUALITY = 75
+
+
+class Compactor:
+    """Settings of the compaction stage.
+
+    ``image_dpi`` (``None`` = keep images) is the target resolution of
+    images shown above ``DOWNSAMPLE_ABOVE`` times that. JPEG images are
+    re-encoded at ``image_quality``; lossless images (logos, line art) stay
+    lossless unless ``lossless_to_jpeg`` is set. Black-and-white scans are
+    never resampled. ``measure`` makes the bytes saved count the stage
+    alone (see above).
+    """
+
+    OPTIONS = ("garbage", "image_dpi", "image_quality", "lossless_to_jpeg", "subset_fonts", "object_streams",
+               "measure")
+
+    def __init__(self, garbage=4, image_dpi=None, image_quality=DEFAULT_IMAGE_QUALITY, lossless_to_jpeg=False,
+                 subset_fonts=True, object_streams=True, measure=False):
+        if garbage not in (0, 1, 2, 3, 4):
+            raise ValueError("garbage must be 0 to 4")
+        if image_dpi is not None and image_dpi <= 0:
+            raise ValueError("image_dpi must be positive")
+        if not 0 < image_quality <= 100:
+            raise ValueError("image_quality must be 1 to 100")
+        self.garbage = garbage
+        self.image_dpi = image_dpi
+        self.image_quality = image_quality
+        self.lossless_to_jpeg = bool(lossless_to_jpeg)
+        self.subset_fonts = bool(subset_fonts)
+        self.object_streams = bool(object_streams)
+        self.measure = bool(measure)
+
+    @classmethod
+    def from_dict(cls, options):
+        unknown = set(options) - set(cls.OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown compact option(s): {', '.join(sorted(unknown))}")
+        options = dict(options)
+        if options.get("image_dpi") is not None:
+            options["image_dpi"] = int(options["image_dpi"])
+        for key in ("garbage", "image_quality"):
+            if key in options:
+                options[key] = int(options[key])
+        return cls(**options)
+
+    def run(self, doc, options, context):
+        """Apply the stage to ``doc`` and return the options to save it with.
+
+        With ``measure``, records in ``context.size_before_compact`` the
+        size ``doc`` would have been saved at with ``options``, i.e.
+        without this stage.
+        """
+        if self.measure:
+            context.size_before_compact = len(doc.tobytes(**options))
+        self.apply(doc, context)
+        return self.save_options(options)
+
+    def apply(self, doc, context):
+        """Rewrite images and fonts of ``doc`` in place."""
+        if self.image_dpi:
+            doc.rewrite_images(options=self._rewriter_options())
+        if self.subset_fonts:
+            try:
+                doc.subset_fonts()
+            except Exception as e:
+                # A font MuPDF cannot subset is kept whole; the rest of the stage still applies.
+                context.log(f"Font subsetting skipped: {e}")
+
+    def _rewriter_options(self):
+        mupdf = fitz.mupdf
+        options = mupdf.PdfImageRewriterOptions()
+        lossless = mupdf.FZ_RECOMPRESS_JPEG if self.lossless_to_jpeg else mupdf.FZ_RECOMPRESS_LOSSLESS
+        for kind in ("color", "gray"):
+            for variant, method in (("lossy", mupdf.FZ_RECOMPRESS_JPEG), ("lossless", lossless)):
+                prefix = f"{kind}_{variant}_image_"
+                setattr(options, prefix + "subsample_method", mupdf.FZ_SUBSAMPLE_AVERAGE)
+                setattr(options, prefix + "subsample_threshold", int(self.image_dpi * DOWNSAMPLE_ABOVE))
+                setattr(options, prefix + "subsample_to", self.image_dpi)
+                setattr(options, prefix + "recompress_method", method)
+                setattr(options, prefix + "recompress_quality", str(self.image_quality))
+        return options
+
+    def save_options(self, options):
+        """``options`` for ``Document.save`` with the compaction settings applied."""
+        options = dict(options, deflate=True, deflate_images=True, deflate_fonts=True)
+        options["garbage"] = max(options.get("garbage", 0), self.garbage)
+        if self.object_streams:
+            options["use_objstms"] = 1
+        return options
@@ -0,0 +1,341 @@
+"""Multi-process batch executor.
+
+Files are grouped into chunks of roughly equal cost (file size plus page
+count) and handed to a bounded pool of worker processes. Each worker owns a
+pipe to the parent, so the parent always knows which file a worker is on:
+if MuPDF or Spire takes the process down, only that file is marked failed,
+the rest of its chunk is re-queued and a replacement worker is started.
+Results are yielded in input order. With a result cache, each file is
+looked up by whoever processes it, just before processing it, so cached and
+processed files stream back together.
+"""
+
+import collections
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing.connection import wait
+
+import fitz  # PyMuPDF
+
+from .archive import OutputArchive, input_size, is_archive, split_member
+from .pipeline import share_shard_workers
+from .tasks import FileResult, export_result, output_path_for, process_document
+
+# Weight of one page relative to one byte of input when sizing chunks.
+PAGE_COST = 200_000
+CHUNKS_PER_WORKER = 4
+# Minimum seconds between two progress messages from one worker.
+PROGRESS_INTERVAL = 0.2
+
+
+def estimate_cost(path):
+    """Rough processing cost of a file: its size plus a per-page weight.
+
+    Archive members are costed by size alone, so nothing is read from them here.
+    """
+    try:
+        size = input_size(path)
+    except OSError:
+        return 0
+    if split_member(path) is not None:
+        return size
+    try:
+        with fitz.open(path) as doc:
+            pages = doc.page_count
+    except Exception:
+        pages = 0
+    return size + pages * PAGE_COST
+
+
+def make_chunks(items, costs, workers):
+    """Group ``items`` into chunks of similar total cost, keeping input order.
+
+    Large files end up alone in their own chunk; small ones are batched so a
+    worker is not paying IPC overhead per file.
+    """
+    total = sum(costs)
+    target = max(total / max(workers * CHUNKS_PER_WORKER, 1), 1)
+    chunks, current, current_cost = [], [], 0
+    for item, cost in zip(items, costs):
+        if current and current_cost + cost > target:
+            chunks.append(current)
+            current, current_cost = [], 0
+        current.append(item)
+        current_cost += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def process_cached(cache, index, input_path, output_path, operations, export=None, progress=None,
+                   cancel_event=None, export_workers=1, **options):
+    """``process_document`` behind a ``cache.ResultCache`` (or none).
+
+    A cached output is reported instead of processing the file; a newly
+    processed file is recorded.
+    """
+    note = None
+    if cache is not None:
+        try:
+            hit = cache.lookup(index, input_path, output_path)
+        except Exception as e:
+            hit = None
+            note = f"Could not look up {input_path} in the result cache: {e}"
+        if hit is not None:
+            if export is not None:
+                export_result(hit, export, export_workers)
+            return hit
+    result = process_document(
+        index, input_path, output_path, operations, export, progress, cancel_event,
+        export_workers=export_workers, **options
+    )
+    if note:
+        result.messages.insert(0, note)
+    if cache is not None and result.ok:
+        try:
+            cache.record(result)
+        except Exception as e:
+            result.messages.append(f"Could not record {output_path} in the result cache: {e}")
+    return result
+
+
+def _worker_main(conn, operations, export, cancel_event, options, cache):
+    """Worker loop: receive chunks, report start/progress/finish for every file."""
+    while True:
+        try:
+            chunk = conn.recv()
+        except EOFError:
+            break
+        if chunk is None:
+            break
+        for index, input_path, output_path in chunk:
+            if cancel_event.is_set():
+                break
+            conn.send(("start", index))
+            progress = _throttled_progress(conn, index)
+            result = process_cached(
+                cache, index, input_path, output_path, operations, export, progress, cancel_event, **options
+            )
+            conn.send(("done", result))
+        conn.send(("idle", None))
+    if cache is not None:
+        cache.close()
+    conn.close()
+
+
+def _throttled_progress(conn, index):
+    last = [0.0]
+
+    def progress(fraction):
+        now = time.monotonic()
+        if now - last[0] >= PROGRESS_INTERVAL:
+            last[0] = now
+            conn.send(("progress", (index, fraction)))
+
+    return progress
+
+
+class _Worker:
+    def __init__(self, ctx, operations, export, cancel_event, options, cache):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, operations, export, cancel_event, options, cache),
+            # Not daemonic: a worker may start its own pool (OCR, page-range shards).
+            # It exits on its own when the pipe to the parent closes.
+            daemon=False,
+        )
+        self.process.start()
+        child_conn.close()
+        self.chunk = None
+        self.current = None
+        self.done = set()
+
+    def assign(self, chunk):
+        self.chunk = chunk
+        self.current = None
+        self.done = set()
+        self.conn.send(chunk)
+
+    def leftovers(self):
+        """Items of the assigned chunk that were never started."""
+        if not self.chunk:
+            return []
+        return [item for item in self.chunk if item[0] not in self.done and item[0] != self.current]
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class BatchExecutor:
+    """Runs a list of pipeline operations over many files in parallel.
+
+    ``workers`` defaults to the CPU count. With ``workers=1`` (or a single
+    file) files are processed in the calling process, which gives no crash
+    isolation; page image export then uses ``workers`` processes itself.
+    ``export`` is an ``export.ExportOptions`` or ``None``;
+    ``pipeline_options`` are extra keyword arguments for ``Pipeline``; when
+    files run in a pool, the workers share ``shard_workers`` between them.
+    With a ``cache.ResultCache``, files whose content was already processed
+    by the same job are reported from the cache (``FileResult.cached``)
+    instead of being processed, and every successful file is recorded; the
+    lookup happens in the worker, just before the file would be processed.
+    ``profiler`` (a ``metrics.Profiler``) profiles every file in its worker;
+    ``metrics`` (a ``metrics.MetricsSink``) receives every result.
+    An ``output_dir`` with an archive suffix is written as an archive;
+    outputs are staged in a temporary folder under ``scratch_dir`` (default:
+    the system's temporary directory) until they are moved into it, and the
+    result cache is not used.
+
+    ``on_progress(index, fraction)`` is called in the calling process while
+    files are being worked on. ``cancel()`` may be called from any thread:
+    running files stop at the next page boundary and come back with
+    ``FileResult.cancelled`` set; files not yet started are not reported.
+    """
+
+    def __init__(self, operations, workers=None, export=None, on_progress=None, pipeline_options=None,
+                 cache=None, profiler=None, metrics=None, scratch_dir=None):
+        self.operations = list(operations)
+        self.scratch_dir = scratch_dir
+        self.cache = cache
+        self.metrics = metrics
+        # Extra keyword arguments for every process_document call.
+        self.options = {"pipeline_options": dict(pipeline_options or {}), "profiler": profiler}
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.export = export
+        self.on_progress = on_progress or (lambda index, fraction: None)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._cancel_event = self._ctx.Event()
+        self._startup_failures = 0
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self, files, output_dir):
+        """Yield a ``FileResult`` for every file, in the order given."""
+        archive = None
+        if is_archive(output_dir):
+            archive = OutputArchive(output_dir)
+            if self.scratch_dir:
+                os.makedirs(self.scratch_dir, exist_ok=True)
+            output_dir = tempfile.mkdtemp(prefix="redactedge-", dir=self.scratch_dir)
+        items = [(i, path, output_path_for(path, output_dir)) for i, path in enumerate(files)]
+        cache = None if archive else self.cache
+        results = self._process(items, cache)
+        try:
+            for result in results:
+                if archive is not None:
+                    archive.add_result(result, output_dir)
+                if self.metrics is not None:
+                    try:
+                        self.metrics.record(result)
+                    except OSError as e:
+                        result.messages.append(f"Could not write metrics: {e}")
+                yield result
+        finally:
+            if cache is not None:
+                cache.close()
+            if archive is not None:
+                archive.close()
+                shutil.rmtree(output_dir, ignore_errors=True)
+
+    def _process(self, items, cache=None):
+        if self.workers == 1 or len(items) <= 1:
+            for index, input_path, output_path in items:
+                if self.cancelled:
+                    return
+                progress = lambda fraction, index=index: self.on_progress(index, fraction)
+                yield process_cached(
+                    cache, index, input_path, output_path, self.operations, self.export,
+                    progress, self._cancel_event, export_workers=self.workers, **self.options,
+                )
+            return
+        costs = [estimate_cost(path) for _, path, _ in items]
+        chunks = collections.deque(make_chunks(items, costs, self.workers))
+        yield from self._run_pool(chunks, [index for index, _, _ in items], cache)
+
+    def _run_pool(self, chunks, order, cache=None):
+        ctx = self._ctx
+        workers = []
+        results = {}
+        position = 0
+        count = min(self.workers, len(chunks))
+        options = dict(self.options, pipeline_options=share_shard_workers(self.options["pipeline_options"], count))
+        try:
+            for _ in range(count):
+                workers.append(_Worker(ctx, self.operations, self.export, self._cancel_event, options, cache))
+            idle = list(workers)
+            while position < len(order):
+                while idle and chunks and not self.cancelled:
+                    idle.pop().assign(chunks.popleft())
+                busy = [w for w in workers if w.chunk is not None]
+                if not busy:
+                    break
+                by_conn = {w.conn: w for w in busy}
+                by_sentinel = {w.process.sentinel: w for w in busy}
+                ready = wait(list(by_conn) + list(by_sentinel))
+                for worker in {by_conn.get(r) or by_sentinel.get(r) for r in ready}:
+                    try:
+                        while worker.conn.poll():
+                            kind, payload = worker.conn.recv()
+                            if kind == "start":
+                                worker.current = payload
+                                self.on_progress(payload, 0.0)
+                            elif kind == "progress":
+                                self.on_progress(*payload)
+                            elif kind == "done":
+                                results[payload.index] = payload
+                                worker.done.add(payload.index)
+                                worker.current = None
+                            elif kind == "idle":
+                                worker.chunk = None
+                                idle.append(worker)
+                                break
+                    except (EOFError, OSError):
+                        pass
+                    if worker.chunk is not None and not worker.process.is_alive():
+                        self._replace_crashed(worker, workers, idle, chunks, results, ctx, options, cache)
+                while position < len(order) and order[position] in results:
+                    yield results.pop(order[position])
+                    position += 1
+            for index in sorted(results):
+                yield results[index]
+        finally:
+            for worker in workers:
+                worker.stop()
+
+    def _replace_crashed(self, worker, workers, idle, chunks, results, ctx, options, cache):
+        index = worker.current
+        if index is None and not worker.done:
+            self._startup_failures += 1
+            if self._startup_failures > self.workers * 2:
+                raise RuntimeError(
+                    f"Worker processes keep exiting before processing any file "
+                    f"(exit code {worker.process.exitcode})"
+                )
+        if index is not None:
+            item = next(item for item in worker.chunk if item[0] == index)
+            failed = FileResult(index, item[1], item[2])
+            failed.error = f"Worker process crashed (exit code {worker.process.exitcode})"
+            results[index] = failed
+        leftovers = worker.leftovers()
+        if leftovers:
+            chunks.appendleft(leftovers)
+        workers.remove(worker)
+        worker.conn.close()
+        replacement = _Worker(ctx, self.operations, self.export, self._cancel_event, options, cache)
+        workers.append(replacement)
+        idle.append(replacement)
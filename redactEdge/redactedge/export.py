@@ -0,0 +1,133 @@
+"""Page raster export (JPEG/PNG/WebP) for processed PDFs.
+
+Pages are split into contiguous ranges and rendered by a pool of processes;
+each worker opens the document itself, renders its range and writes every
+encoded page straight to disk. A small manifest next to the images records
+which pages were rendered from which PDF content with which settings, so a
+second export of the same output skips pages that are already on disk.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+
+import fitz  # PyMuPDF
+
+FORMATS = {"jpeg": "jpg", "png": "png", "webp": "webp"}
+
+
+class ExportOptions:
+    """Raster format, resolution and (for JPEG/WebP) quality."""
+
+    def __init__(self, format="jpeg", dpi=200, quality=90):
+        format = format.lower()
+        if format == "jpg":
+            format = "jpeg"
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported export format {format!r}; choose from {', '.join(FORMATS)}")
+        self.format = format
+        self.dpi = int(dpi)
+        self.quality = int(quality)
+
+    @property
+    def extension(self):
+        return FORMATS[self.format]
+
+    def to_dict(self):
+        return {"format": self.format, "dpi": self.dpi, "quality": self.quality}
+
+
+def page_path(pdf_path, output_dir, page_num, options):
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(output_dir, f"{stem}_page_{page_num+1}.{options.extension}")
+
+
+def _manifest_path(pdf_path, output_dir):
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(output_dir, f".{stem}.pages.json")
+
+
+def _content_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode(pix, options):
+    if options.format == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=options.quality)
+    if options.format == "png":
+        return pix.tobytes("png")
+    import io
+    from PIL import Image
+
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=options.quality)
+    return buffer.getvalue()
+
+
+def render_range(pdf_path, output_dir, pages, options):
+    """Render ``pages`` of ``pdf_path`` and write one image file per page."""
+    doc = fitz.open(pdf_path)
+    try:
+        for page_num in pages:
+            pix = doc[page_num].get_pixmap(dpi=options.dpi, alpha=False)
+            target = page_path(pdf_path, output_dir, page_num, options)
+            with open(target + ".part", "wb") as f:
+                f.write(_encode(pix, options))
+            os.replace(target + ".part", target)
+    finally:
+        doc.close()
+    return list(pages)
+
+
+def _split(pages, parts):
+    size = max(1, -(-len(pages) // parts))
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def export_pages(pdf_path, output_dir, options=None, workers=1):
+    """Export every page of ``pdf_path``; return (rendered, skipped) page counts.
+
+    With ``workers > 1`` page ranges are rendered in parallel processes.
+    """
+    options = options or ExportOptions()
+    os.makedirs(output_dir, exist_ok=True)
+    source = _content_hash(pdf_path)
+    manifest_path = _manifest_path(pdf_path, output_dir)
+    done = set()
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("source") == source and manifest.get("options") == options.to_dict():
+            done = set(manifest.get("pages", ()))
+    except (OSError, ValueError):
+        pass
+
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    todo = [
+        n for n in range(page_count)
+        if n not in done or not os.path.exists(page_path(pdf_path, output_dir, n, options))
+    ]
+    rendered = []
+    if workers > 1 and len(todo) > 1:
+        ranges = _split(todo, workers * 2)
+        ctx = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(min(workers, len(ranges)), mp_context=ctx) as pool:
+            futures = [pool.submit(render_range, pdf_path, output_dir, r, options) for r in ranges]
+            for future in futures:
+                rendered.extend(future.result())
+    elif todo:
+        rendered = render_range(pdf_path, output_dir, todo, options)
+
+    manifest = {"source": source, "options": options.to_dict(), "pages": sorted(done | set(rendered))}
+    with open(manifest_path + ".part", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".part", manifest_path)
+    return len(rendered), page_count - len(todo)
@@ -0,0 +1,166 @@
+"""Document-level image selection, replacement and deletion.
+
+Images are collected once per document by xref instead of once per page, so
+an image shared by every page (a header logo) is handled once. The new image
+stream is inserted a single time and copied over every other selected xref;
+identical streams are then merged when the document is saved with
+``garbage=4``. Images can be selected by per-page position, by exact content
+hash (SHA-1 of the raw stream) or by perceptual hash against a sample image.
+"""
+
+import functools
+import hashlib
+import os
+
+import fitz  # PyMuPDF
+
+# Maximum Hamming distance between two 64-bit average hashes to count as the same picture.
+DEFAULT_MAX_DISTANCE = 6
+# Maximum difference in mean grey level (0-255) between two matching pictures.
+MAX_MEAN_DIFFERENCE = 24
+
+
+def load_image(path):
+    """Bytes of an image file, read once per process while the file is unchanged."""
+    stat = os.stat(path)
+    return _load_image(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_image(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def content_hash(doc, xref):
+    """SHA-1 of the raw (still encoded) image stream."""
+    return hashlib.sha1(doc.xref_stream_raw(xref) or b"").hexdigest()
+
+
+def _average_hash(pix):
+    """(64-bit average hash, mean grey level) of a pixmap.
+
+    The mean is kept so that flat images, whose hash bits are all equal,
+    are still told apart by brightness.
+    """
+    if pix.alpha or pix.colorspace is None or pix.colorspace.n != 1:
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+    small = fitz.Pixmap(pix, 8, 8, None)
+    samples = small.samples
+    mean = sum(samples) / len(samples)
+    bits = 0
+    for value in samples:
+        bits = (bits << 1) | (value >= mean)
+    return bits, mean
+
+
+def perceptual_hash(doc, xref):
+    """Average hash and mean grey level of the decoded image."""
+    return _average_hash(fitz.Pixmap(doc, xref))
+
+
+def perceptual_hash_file(path):
+    """Average hash and mean grey level of an image file on disk."""
+    return _average_hash(fitz.Pixmap(path))
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def similar(a, b, max_distance=DEFAULT_MAX_DISTANCE):
+    """True when two ``perceptual_hash`` values describe the same picture."""
+    return hamming(a[0], b[0]) <= max_distance and abs(a[1] - b[1]) <= MAX_MEAN_DIFFERENCE
+
+
+class ImageSelector:
+    """Decides which image xrefs of a document an image operation touches.
+
+    ``index`` keeps the original per-page positional meaning (0 = first image
+    on each page, ``None`` = all). ``hashes`` (exact) and ``sample_images``
+    (perceptual) narrow the selection to matching pictures.
+    """
+
+    def __init__(self, index=None, hashes=(), sample_images=(), max_distance=DEFAULT_MAX_DISTANCE):
+        self.index = index
+        self.hashes = {h.lower() for h in hashes}
+        self.sample_images = list(sample_images)
+        self.max_distance = max_distance
+        self._sample_hashes = None
+        # Content hash -> match decision, kept for the whole batch.
+        self._decisions = {}
+
+    def sample_hashes(self):
+        if self._sample_hashes is None:
+            self._sample_hashes = [perceptual_hash_file(path) for path in self.sample_images]
+        return self._sample_hashes
+
+    def matches(self, doc, xref):
+        if not self.hashes and not self.sample_images:
+            return True
+        digest = content_hash(doc, xref)
+        if digest not in self._decisions:
+            self._decisions[digest] = self._matches(doc, xref, digest)
+        return self._decisions[digest]
+
+    def _matches(self, doc, xref, digest):
+        if digest in self.hashes:
+            return True
+        if self.sample_images:
+            try:
+                value = perceptual_hash(doc, xref)
+            except Exception:
+                return False
+            return any(similar(value, sample, self.max_distance) for sample in self.sample_hashes())
+        return False
+
+    def candidates(self, page_images):
+        """``{xref: first page number}`` for an iterable of per-page ``get_images(full=True)`` lists."""
+        candidates = {}
+        for pno, images in enumerate(page_images):
+            if self.index is not None:
+                images = images[self.index:self.index + 1] if 0 <= self.index < len(images) else []
+            for img in images:
+                candidates.setdefault(img[0], pno)
+        return candidates
+
+    def select(self, doc, context=None):
+        """Return ``{xref: first page number using it}`` for the selected images."""
+        pages = context.iter_pages(doc) if context is not None else doc
+        candidates = self.candidates(page.get_images(full=True) for page in pages)
+        return {xref: pno for xref, pno in candidates.items() if self.matches(doc, xref)}
+
+
+def replace_images(doc, selected, filename=None, pixmap=None, stream=None):
+    """Replace every selected xref with one image inserted a single time."""
+    first = None
+    for xref, pno in selected.items():
+        if first is None:
+            doc[pno].replace_image(xref, filename=filename, pixmap=pixmap, stream=stream)
+            first = xref
+        else:
+            doc.xref_copy(first, xref)
+    return len(selected)
+
+
+def delete_images(doc, selected):
+    """Blank every selected xref with one shared transparent 1x1 image."""
+    pix = fitz.Pixmap(fitz.csGRAY, (0, 0, 1, 1), 1)
+    pix.clear_with()
+    return replace_images(doc, selected, pixmap=pix)
+
+
+def describe_images(path):
+    """Yield (xref, pages, width, height, content hash, perceptual hash) for each image."""
+    with fitz.open(path) as doc:
+        pages = {}
+        for page in doc:
+            for img in page.get_images(full=True):
+                pages.setdefault(img[0], []).append(page.number + 1)
+        for xref, used_on in pages.items():
+            info = doc.extract_image(xref) or {}
+            try:
+                phash = "%016x" % perceptual_hash(doc, xref)[0]
+            except Exception:
+                phash = "-"
+            yield xref, used_on, info.get("width"), info.get("height"), content_hash(doc, xref), phash
@@ -0,0 +1,415 @@
+"""Job specification shared by the GUI, the CLI and job files."""
+
+import glob
+import hashlib
+import json
+import os
+import re
+
+
+class JobError(ValueError):
+    """Raised for an invalid or incomplete job specification."""
+
+
+class JobSpec:
+    """Everything needed to process a batch, independent of any UI.
+
+    There is one attribute per name in ``FIELDS``, and job files use the
+    same names. Modes run in the GUI's fixed order: delete text, replace
+    text, replace image, delete image, add textbox, delete table area.
+    Option groups such as ``auto_tables``, ``ocr`` and ``compact`` stay
+    plain dicts. They are turned into engine objects only on demand (the
+    methods below), so a spec stays serializable and cheap to send to
+    worker processes.
+    """
+
+    FIELDS = (
+        "inputs", "output_dir", "delete_text", "case_sensitive", "whole_word", "patterns", "regexes",
+        "replace_text", "replace_image",
+        "delete_images", "image_index", "image_hashes", "match_images", "textbox", "delete_area", "auto_tables",
+        "ocr", "compact", "save_as_jpeg",
+        "export_format", "export_dpi", "export_quality", "workers",
+        "large_threshold", "window_pages", "incremental", "shard_threshold", "shard_workers", "text_backend",
+        "use_cache", "reuse_templates", "scratch_dir", "metrics_file", "prometheus_file", "profile_over",
+        "profile_dir", "profile_tool",
+    )
+    # Fields that do not change the content of the output PDFs.
+    NON_OUTPUT_FIELDS = (
+        "inputs", "output_dir", "workers", "save_as_jpeg", "export_format", "export_dpi",
+        "export_quality", "large_threshold", "window_pages", "shard_threshold", "shard_workers",
+        "use_cache", "reuse_templates", "scratch_dir",
+        "metrics_file", "prometheus_file", "profile_over", "profile_dir", "profile_tool",
+    )
+    INCREMENTAL_POLICIES = ("never", "safe", "always")
+
+    def __init__(self, inputs=(), output_dir="", delete_text=(), case_sensitive=False,
+                 whole_word=False, patterns=(), regexes=(), replace_text=(),
+                 replace_image=None, delete_images=False, image_index=None,
+                 image_hashes=(), match_images=(),
+                 textbox=None, delete_area=None, auto_tables=None, ocr=None, compact=None,
+                 save_as_jpeg=False,
+                 export_format="jpeg", export_dpi=200, export_quality=90, workers=None,
+                 large_threshold=None, window_pages=None, incremental="safe", shard_threshold=None,
+                 shard_workers=None, text_backend="native",
+                 use_cache=True, reuse_templates=True, scratch_dir=None, metrics_file=None, prometheus_file=None,
+                 profile_over=None, profile_dir=None, profile_tool="cprofile"):
+        self.inputs = list(inputs)
+        self.output_dir = output_dir
+        self.delete_text = list(delete_text)
+        self.case_sensitive = bool(case_sensitive)
+        self.whole_word = bool(whole_word)
+        self.patterns = list(patterns)
+        self.regexes = list(regexes)
+        self.replace_text = [tuple(pair) for pair in replace_text]
+        self.replace_image = replace_image
+        self.delete_images = bool(delete_images)
+        self.image_index = image_index
+        self.image_hashes = list(image_hashes)
+        self.match_images = list(match_images)
+        self.textbox = textbox
+        # One region dict or a list of them; see ``regions.Region``.
+        self.delete_area = [delete_area] if isinstance(delete_area, dict) else list(delete_area or ())
+        self.auto_tables = auto_tables
+        self.ocr = ocr
+        self.compact = compact
+        self.save_as_jpeg = bool(save_as_jpeg)
+        self.export_format = export_format
+        self.export_dpi = export_dpi
+        self.export_quality = export_quality
+        self.workers = workers
+        self.large_threshold = large_threshold
+        self.window_pages = window_pages
+        self.incremental = incremental
+        self.shard_threshold = shard_threshold
+        self.shard_workers = shard_workers
+        self.text_backend = text_backend
+        self.use_cache = bool(use_cache)
+        self.reuse_templates = bool(reuse_templates)
+        self.scratch_dir = scratch_dir
+        self.metrics_file = metrics_file
+        self.prometheus_file = prometheus_file
+        self.profile_over = profile_over
+        self.profile_dir = profile_dir
+        self.profile_tool = profile_tool
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise JobError(f"Unknown job field(s): {', '.join(sorted(unknown))}")
+        data = dict(data)
+        pairs = data.get("replace_text") or ()
+        if isinstance(pairs, dict):
+            data["replace_text"] = list(pairs.items())
+        if isinstance(data.get("inputs"), str):
+            data["inputs"] = [data["inputs"]]
+        for key in ("delete_text", "patterns", "regexes", "image_hashes", "match_images"):
+            if isinstance(data.get(key), str):
+                data[key] = [data[key]]
+        return cls(**data)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        data["replace_text"] = [list(pair) for pair in self.replace_text]
+        return data
+
+    def fingerprint(self):
+        """Canonical hash of everything that determines the output PDFs.
+
+        Image files are included by content, so replacing ``logo.png`` with a
+        new picture under the same name invalidates earlier results.
+        """
+        from .preview import file_hash
+
+        data = {k: v for k, v in self.to_dict().items() if k not in self.NON_OUTPUT_FIELDS}
+        files = [self.replace_image] if self.replace_image else []
+        data["file_hashes"] = [file_hash(path) for path in files + self.match_images]
+        return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def output_archive(self):
+        """True if the outputs go into an archive rather than a directory."""
+        from .archive import is_archive
+
+        return is_archive(self.output_dir)
+
+    def work_dir(self):
+        """Directory for caches and profiles: the output directory, or the one holding the output archive."""
+        if self.output_archive():
+            return os.path.dirname(os.path.abspath(self.output_dir))
+        return self.output_dir
+
+    def result_cache(self):
+        """``cache.ResultCache`` for this job, or ``None`` when caching is off.
+
+        Outputs written into an archive are not cached.
+        """
+        if not self.use_cache or self.output_archive():
+            return None
+        from .cache import ResultCache
+
+        return ResultCache(self.output_dir, self.fingerprint())
+
+    def operations(self):
+        """Build the ordered pipeline operations for this job."""
+        from .operations import (
+            AddTextboxOperation,
+            DeleteAreaOperation,
+            DeleteImageOperation,
+            DeleteTextOperation,
+            ReplaceImageOperation,
+            ReplaceTextOperation,
+        )
+
+        operations = []
+        if self.delete_text or self.patterns or self.regexes:
+            operations.append(DeleteTextOperation(
+                self.delete_text, self.case_sensitive, self.whole_word, self.patterns, self.regexes,
+                self.ocr_engine(),
+            ))
+        if self.replace_text:
+            operations.append(ReplaceTextOperation(self.replace_text, self.text_backend))
+        if self.replace_image:
+            operations.append(ReplaceImageOperation(
+                self.replace_image, self.image_index, self.image_hashes, self.match_images
+            ))
+        if self.delete_images:
+            operations.append(DeleteImageOperation(self.image_index, self.image_hashes, self.match_images))
+        if self.textbox:
+            operations.append(AddTextboxOperation(
+                self.textbox["text"], tuple(self.textbox["rect"]), self.textbox.get("page", 0),
+                self.text_backend,
+            ))
+        if self.delete_area or self.auto_tables is not None:
+            operations.append(DeleteAreaOperation(self.delete_area, self.table_detector()))
+        return operations
+
+    def table_detector(self):
+        """``tables.TableDetector`` for ``auto_tables``, or ``None``.
+
+        Detections are cached in the output directory.
+        """
+        if self.auto_tables is None:
+            return None
+        from .tables import TableDetector, TableFilter
+
+        options = dict(self.auto_tables)
+        header = options.get("header") or ()
+        table_filter = TableFilter(
+            [header] if isinstance(header, str) else header,
+            options.get("min_columns"), options.get("max_columns"), options.get("min_rows"),
+        )
+        cache_path = os.path.join(self.work_dir(), ".redactedge-tables.sqlite") if self.output_dir else None
+        return TableDetector(table_filter, options.get("strategy", "lines"), cache_path)
+
+    def ocr_engine(self):
+        """``ocr.OcrEngine`` for ``ocr``, or ``None``.
+
+        Text layers are cached in the output directory. By default the CPUs
+        are shared between the batch workers.
+        """
+        if self.ocr is None:
+            return None
+        from .ocr import DEFAULT_DPI, OcrEngine
+
+        options = dict(self.ocr)
+        cpus = os.cpu_count() or 1
+        workers = options.get("workers") or max(1, cpus // max(1, self.workers or cpus))
+        cache_dir = os.path.join(self.work_dir(), ".redactedge-ocr") if self.output_dir else None
+        return OcrEngine(
+            options.get("language", "eng"), int(options.get("dpi", DEFAULT_DPI)), int(workers),
+            cache_dir, options.get("tessdata"),
+        )
+
+    def compactor(self):
+        """``compact.Compactor`` for ``compact``, or ``None``."""
+        if self.compact is None:
+            return None
+        from .compact import Compactor
+
+        return Compactor.from_dict(self.compact)
+
+    def export_options(self):
+        """``ExportOptions`` when page images are requested, else ``None``."""
+        if not self.save_as_jpeg:
+            return None
+        from .export import ExportOptions
+
+        return ExportOptions(self.export_format, self.export_dpi, self.export_quality)
+
+    def metrics_sink(self):
+        """``metrics.MetricsSink`` for the configured files, or ``None``."""
+        if not (self.metrics_file or self.prometheus_file):
+            return None
+        from .metrics import MetricsSink
+
+        return MetricsSink(self.metrics_file, self.prometheus_file)
+
+    def profiler(self):
+        """``metrics.Profiler`` when ``profile_over`` is set, else ``None``."""
+        if self.profile_over is None:
+            return None
+        from .metrics import Profiler
+
+        directory = self.profile_dir or os.path.join(self.work_dir(), "profiles")
+        return Profiler(self.profile_over, directory, self.profile_tool)
+
+    def pipeline_options(self):
+        """Keyword arguments for ``Pipeline``; unset values keep its defaults."""
+        options = {"incremental": self.incremental}
+        if self.large_threshold is not None:
+            options["large_threshold"] = int(self.large_threshold)
+        if self.window_pages is not None:
+            options["window_pages"] = int(self.window_pages)
+        if self.shard_threshold is not None:
+            options["shard_threshold"] = int(self.shard_threshold)
+        if self.shard_workers is not None:
+            options["shard_workers"] = int(self.shard_workers)
+        if self.compact is not None:
+            options["compact"] = self.compactor()
+        if self.reuse_templates:
+            from .session import TemplateSession
+
+            options["session"] = TemplateSession()
+        return options
+
+    def validate(self):
+        if not self.output_dir:
+            raise JobError("No output directory given.")
+        if not self.operations():
+            raise JobError("No operation selected.")
+        if self.textbox and not (self.textbox.get("text") and self.textbox.get("rect")):
+            raise JobError("Textbox needs both 'text' and 'rect'.")
+        if self.auto_tables is not None:
+            unknown = set(self.auto_tables) - {"header", "min_columns", "max_columns", "min_rows", "strategy"}
+            if unknown:
+                raise JobError(f"Unknown auto_tables option(s): {', '.join(sorted(unknown))}")
+            try:
+                self.table_detector()
+            except ValueError as e:
+                raise JobError(str(e))
+        if self.ocr is not None:
+            unknown = set(self.ocr) - {"language", "dpi", "workers", "tessdata"}
+            if unknown:
+                raise JobError(f"Unknown ocr option(s): {', '.join(sorted(unknown))}")
+            from .ocr import find_tessdata
+
+            try:
+                find_tessdata(self.ocr.get("tessdata"))
+            except RuntimeError as e:
+                raise JobError(f"OCR needs Tesseract: {e}")
+        for area in self.delete_area:
+            if not area.get("rect"):
+                raise JobError("Delete area needs a 'rect'.")
+            from .regions import Region
+
+            try:
+                Region.from_dict(area)
+            except (TypeError, ValueError) as e:
+                raise JobError(f"Invalid delete area {area}: {e}")
+        if self.patterns or self.regexes:
+            from .patterns import PatternMatcher
+
+            try:
+                PatternMatcher(self.patterns, self.regexes)
+            except (ValueError, re.error) as e:
+                raise JobError(f"Invalid pattern: {e}")
+        try:
+            self.export_options()
+            self.compactor()
+        except (TypeError, ValueError) as e:
+            raise JobError(str(e))
+        if self.text_backend not in ("native", "spire"):
+            raise JobError("text_backend must be 'native' or 'spire'")
+        if self.profile_tool not in ("cprofile", "pyinstrument"):
+            raise JobError("profile_tool must be 'cprofile' or 'pyinstrument'")
+        if self.incremental not in self.INCREMENTAL_POLICIES:
+            raise JobError(f"incremental must be one of {', '.join(self.INCREMENTAL_POLICIES)}")
+        if self.replace_image and not os.path.isfile(self.replace_image):
+            raise JobError(f"Replacement image not found: {self.replace_image}")
+        for path in self.match_images:
+            if not os.path.isfile(path):
+                raise JobError(f"Sample image not found: {path}")
+
+
+def load_job(path):
+    """Load a ``JobSpec`` from a JSON or YAML file."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise JobError("YAML job files need PyYAML (pip install pyyaml).")
+        data = yaml.safe_load(text) or {}
+    else:
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise JobError(f"Job file {path} must contain a mapping.")
+    return JobSpec.from_dict(data)
+
+
+def expand_inputs(patterns):
+    """Expand files, directories (searched recursively) and glob patterns into PDF paths.
+
+    A ZIP or TAR archive, named directly or matched by a pattern, expands to
+    the PDFs inside it (see ``archive``).
+    """
+    from .archive import is_archive, list_members
+
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "**", "*.pdf"), recursive=True))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern]
+        for path in matches:
+            key = os.path.abspath(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            if is_archive(path) and os.path.isfile(path):
+                files.extend(list_members(path))
+            else:
+                files.append(path)
+    return files
+
+
+def job_files(spec):
+    """Expanded inputs of ``spec``, leaving out what the job itself writes."""
+    from .archive import split_member
+
+    output_dir = os.path.abspath(spec.output_dir)
+    output_root = os.path.join(output_dir, "")
+    files = []
+    for path in expand_inputs(spec.inputs):
+        member = split_member(path)
+        location = os.path.abspath(member[0] if member else path)
+        if location != output_dir and not location.startswith(output_root):
+            files.append(path)
+    return files
+
+
+def run_job(spec, log=None):
+    """Process every input of ``spec``; return the list of ``FileResult``."""
+    from .executor import BatchExecutor
+
+    log = log or (lambda message: None)
+    spec.validate()
+    files = job_files(spec)
+    os.makedirs(spec.work_dir(), exist_ok=True)
+    executor = BatchExecutor(
+        spec.operations(), workers=spec.workers, export=spec.export_options(),
+        pipeline_options=spec.pipeline_options(), cache=spec.result_cache(),
+        profiler=spec.profiler(), metrics=spec.metrics_sink(), scratch_dir=spec.scratch_dir,
+    )
+    results = []
+    for result in executor.run(files, spec.output_dir):
+        for message in result.messages:
+            log(message)
+        if not result.ok:
+            log(f"Error processing {result.input_path}: {result.error}")
+        results.append(result)
+    return results
@@ -0,0 +1,144 @@
+"""Single-pass multi-term text matching for redaction.
+
+Each page's characters and glyph boxes are extracted once into a
+``PageText``. All terms are compiled into one regular expression whose
+alternatives are factored into a prefix trie, so the page string is scanned
+once no matter how many terms there are. Match spans are mapped back to one
+rectangle per text line for ``add_redact_annot``.
+"""
+
+import re
+
+import fitz  # PyMuPDF
+
+# Ligatures are expanded so every output character has its own box.
+EXTRACT_FLAGS = (fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP)
+
+
+class PageText:
+    """Plain text of one page plus the box and line of every character.
+
+    With ``styles`` each character also keeps its glyph origin and the span
+    (font, size, flags, color) it belongs to, for re-typesetting.
+    """
+
+    def __init__(self, text, boxes, lines, origins=None, spans=None, span_index=None):
+        self.text = text
+        self.boxes = boxes
+        self.lines = lines
+        self.origins = origins
+        self.spans = spans
+        self.span_index = span_index
+
+    @classmethod
+    def extract(cls, page, textpage=None, styles=False):
+        """Build from ``page.get_text("rawdict")``; lines are joined by a newline."""
+        raw = page.get_text("rawdict", flags=EXTRACT_FLAGS, textpage=textpage)
+        chars, boxes, lines = [], [], []
+        origins, spans, span_index = ([], [], []) if styles else (None, None, None)
+        line_no = 0
+        for block in raw["blocks"]:
+            for line in block.get("lines", ()):
+                for span in line["spans"]:
+                    if styles:
+                        spans.append(span)
+                    for char in span["chars"]:
+                        chars.append(char["c"])
+                        boxes.append(char["bbox"])
+                        lines.append(line_no)
+                        if styles:
+                            origins.append(char["origin"])
+                            span_index.append(len(spans) - 1)
+                chars.append("\n")
+                boxes.append(None)
+                lines.append(line_no)
+                if styles:
+                    origins.append(None)
+                    span_index.append(None)
+                line_no += 1
+        return cls("".join(chars), boxes, lines, origins, spans, span_index)
+
+    def rects(self, start, end):
+        """Return one ``fitz.Rect`` per line covered by ``text[start:end]``."""
+        rects = {}
+        for i in range(start, end):
+            box = self.boxes[i]
+            if box is None:
+                continue
+            line = self.lines[i]
+            if line in rects:
+                rects[line] |= box
+            else:
+                rects[line] = fitz.Rect(box)
+        return list(rects.values())
+
+
+def _term_pattern(chars):
+    return r"\s+" if chars.isspace() else re.escape(chars)
+
+
+def _trie_regex(terms):
+    """Compile ``terms`` into an alternation factored by common prefix.
+
+    Runs of whitespace in a term match any run of whitespace in the page.
+    Where a term ends, an empty group ``t{index}`` marks it, so
+    ``match.lastgroup`` names the term that matched. Longer terms win over
+    their own prefixes because the marker is the last alternative of a node.
+    """
+    trie = {}
+    for index, term in enumerate(terms):
+        node = trie
+        for token in re.findall(r"\s+|\S", term):
+            node = node.setdefault(_term_pattern(token), {})
+        node.setdefault("", index)
+
+    def build(node):
+        branches = [key + build(child) for key, child in sorted(node.items()) if key]
+        if "" in node:
+            branches.append(f"(?P<t{node['']}>)")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+class TermMatcher:
+    """Finds every occurrence of a list of literal terms in one pass.
+
+    Matching is case-insensitive by default, like ``page.search_for``.
+    With ``whole_word`` a match must not be glued to other letters or digits.
+    """
+
+    def __init__(self, terms, case_sensitive=False, whole_word=False):
+        terms = [t.strip() for t in terms if t and t.strip()]
+        if not case_sensitive:
+            terms = [t.lower() for t in terms]
+        self.terms = sorted(set(terms))
+        self.case_sensitive = case_sensitive
+        self.whole_word = whole_word
+        self.regex = None
+        if self.terms:
+            pattern = _trie_regex(self.terms)
+            if whole_word:
+                pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+            self.regex = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+
+    def spans(self, text):
+        """Return ``(start, end)`` of every non-overlapping match in ``text``."""
+        if self.regex is None:
+            return []
+        return [m.span() for m in self.regex.finditer(text)]
+
+    def matches(self, text):
+        """Return ``(start, end, term)`` of every match; ``term`` is the entry of ``terms`` that matched."""
+        if self.regex is None:
+            return []
+        return [(m.start(), m.end(), self.terms[int(m.lastgroup[1:])]) for m in self.regex.finditer(text)]
+
+    def find(self, page_text):
+        """Return the redaction rectangles for every match on a ``PageText``."""
+        rects = []
+        for start, end in self.spans(page_text.text):
+            rects.extend(page_text.rects(start, end))
+        return rects
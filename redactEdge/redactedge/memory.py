@@ -0,0 +1,37 @@
+"""Peak resident-set-size measurement for a single job.
+
+On Linux the kernel's high-water mark (VmHWM) can be reset per process, so
+the value read after a job is that job's own peak even in a long-lived
+worker. Elsewhere the process-lifetime ``ru_maxrss`` is the best available.
+"""
+
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def reset_peak_rss():
+    """Start a new peak measurement window (Linux only; a no-op elsewhere)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss():
+    """Peak resident set size in bytes, or ``None`` when unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
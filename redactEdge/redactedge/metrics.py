@@ -0,0 +1,227 @@
+"""Structured per-stage metrics and an over-budget profiling hook.
+
+``MetricsSink`` turns every ``FileResult`` into JSON-lines events, one per
+pipeline stage plus one per file. "open" and "save" are I/O stages and
+carry bytes read and written; every operation, and "export", is a compute
+stage and carries its match count. The sink also keeps running totals and
+rewrites a Prometheus text-format file after each result, which suits the
+node_exporter textfile collector.
+
+``Profiler`` runs one file's pipeline under cProfile (or pyinstrument when
+available) and keeps the profile only if the file exceeded its time budget.
+"""
+
+import json
+import os
+import threading
+import time
+
+IO_STAGES = ("open", "save")
+# Upper bounds (seconds) of the per-file duration histogram.
+FILE_SECONDS_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 300)
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+def _file_size(path):
+    from .archive import input_size
+
+    try:
+        return input_size(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def stage_events(result):
+    """Return the JSON-ready events describing one ``FileResult``."""
+    now = time.time()
+    name = result.input_path
+    events = []
+    for stage, seconds in result.timings.items():
+        event = {
+            "ts": now, "event": "stage", "file": name, "stage": stage,
+            "kind": "io" if stage in IO_STAGES else "compute",
+            "seconds": round(seconds, 6), "pages": result.pages,
+        }
+        if stage == "open":
+            event["bytes_read"] = _file_size(result.input_path)
+        elif stage == "save":
+            event["bytes_written"] = _file_size(result.output_path)
+        elif stage in result.results:
+            event["matches"] = result.results[stage]
+        events.append(event)
+    io_seconds = sum(s for stage, s in result.timings.items() if stage in IO_STAGES)
+    events.append({
+        "ts": now, "event": "file", "file": name, "output": result.output_path,
+        "ok": result.ok, "cached": result.cached, "error": result.error,
+        "pages": result.pages, "seconds": round(result.elapsed, 6),
+        "io_seconds": round(io_seconds, 6),
+        "compute_seconds": round(sum(result.timings.values()) - io_seconds, 6),
+        "peak_rss": result.peak_rss, "bytes_saved": result.bytes_saved, "profile": result.profile_path,
+    })
+    return events
+
+
+class MetricsSink:
+    """Writes metrics for a stream of ``FileResult`` objects.
+
+    ``jsonl_path`` receives one JSON object per line (appended);
+    ``prometheus_path`` is rewritten atomically after every file. Either may
+    be ``None``. Safe to use from several threads.
+    """
+
+    def __init__(self, jsonl_path=None, prometheus_path=None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.lock = threading.Lock()
+        self.files = {}
+        self.pages = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.bytes_saved = 0
+        self.stage_seconds = {}
+        self.stage_runs = {}
+        self.matches = {}
+        self.buckets = [0] * len(FILE_SECONDS_BUCKETS)
+        self.file_seconds = 0.0
+        self.file_count = 0
+        self.peak_rss = 0
+
+    def record(self, result):
+        events = stage_events(result)
+        with self.lock:
+            self._accumulate(result, events)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    for event in events:
+                        f.write(json.dumps(event) + "\n")
+            if self.prometheus_path:
+                self._write_prometheus()
+
+    def _accumulate(self, result, events):
+        outcome = "cached" if result.cached else "ok" if result.ok else "cancelled" if result.cancelled else "error"
+        self.files[outcome] = self.files.get(outcome, 0) + 1
+        if result.cached:
+            return
+        self.pages += result.pages
+        for event in events:
+            if event["event"] != "stage":
+                continue
+            stage = event["stage"]
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + event["seconds"]
+            self.stage_runs[stage] = self.stage_runs.get(stage, 0) + 1
+            self.matches[stage] = self.matches.get(stage, 0) + (event.get("matches") or 0)
+            self.bytes_read += event.get("bytes_read", 0)
+            self.bytes_written += event.get("bytes_written", 0)
+        for i, bound in enumerate(FILE_SECONDS_BUCKETS):
+            if result.elapsed <= bound:
+                self.buckets[i] += 1
+        self.file_seconds += result.elapsed
+        self.file_count += 1
+        self.peak_rss = max(self.peak_rss, result.peak_rss or 0)
+        self.bytes_saved += result.bytes_saved or 0
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP redactedge_files_total Files finished, by outcome.",
+            "# TYPE redactedge_files_total counter",
+        ]
+        lines += [f'redactedge_files_total{{outcome="{k}"}} {v}' for k, v in sorted(self.files.items())]
+        lines += [
+            "# HELP redactedge_pages_total Pages processed.",
+            "# TYPE redactedge_pages_total counter",
+            f"redactedge_pages_total {self.pages}",
+            "# HELP redactedge_bytes_read_total Input bytes opened.",
+            "# TYPE redactedge_bytes_read_total counter",
+            f"redactedge_bytes_read_total {self.bytes_read}",
+            "# HELP redactedge_bytes_written_total Output bytes saved.",
+            "# TYPE redactedge_bytes_written_total counter",
+            f"redactedge_bytes_written_total {self.bytes_written}",
+            "# HELP redactedge_bytes_saved_total Input bytes minus output bytes of compacted files.",
+            "# TYPE redactedge_bytes_saved_total counter",
+            f"redactedge_bytes_saved_total {self.bytes_saved}",
+            "# HELP redactedge_stage_seconds_total Wall time spent per pipeline stage.",
+            "# TYPE redactedge_stage_seconds_total counter",
+        ]
+        lines += [f'redactedge_stage_seconds_total{{stage="{k}"}} {v:.6f}' for k, v in sorted(self.stage_seconds.items())]
+        lines += ["# HELP redactedge_stage_runs_total Executions per pipeline stage.",
+                  "# TYPE redactedge_stage_runs_total counter"]
+        lines += [f'redactedge_stage_runs_total{{stage="{k}"}} {v}' for k, v in sorted(self.stage_runs.items())]
+        lines += ["# HELP redactedge_matches_total Matches or images handled per stage.",
+                  "# TYPE redactedge_matches_total counter"]
+        lines += [f'redactedge_matches_total{{stage="{k}"}} {v}' for k, v in sorted(self.matches.items()) if v]
+        lines += ["# HELP redactedge_file_seconds Processing time per file.",
+                  "# TYPE redactedge_file_seconds histogram"]
+        lines += [f'redactedge_file_seconds_bucket{{le="{b}"}} {n}' for b, n in zip(FILE_SECONDS_BUCKETS, self.buckets)]
+        lines += [
+            f'redactedge_file_seconds_bucket{{le="+Inf"}} {self.file_count}',
+            f"redactedge_file_seconds_sum {self.file_seconds:.6f}",
+            f"redactedge_file_seconds_count {self.file_count}",
+            "# HELP redactedge_peak_rss_bytes Highest peak resident memory of any file.",
+            "# TYPE redactedge_peak_rss_bytes gauge",
+            f"redactedge_peak_rss_bytes {self.peak_rss}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def _write_prometheus(self):
+        with open(self.prometheus_path + ".part", "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(self.prometheus_path + ".part", self.prometheus_path)
+
+
+class Profiler:
+    """Profiles single files and keeps profiles of those over ``budget`` seconds.
+
+    cProfile dumps are ``.prof`` files (open with ``pstats`` or snakeviz);
+    pyinstrument writes ``.html``. Falls back to cProfile when pyinstrument
+    is not installed.
+    """
+
+    def __init__(self, budget, directory, tool="cprofile"):
+        self.budget = float(budget)
+        self.directory = directory
+        self.tool = tool
+
+    def call(self, name, func):
+        """Return ``(func(), profile path or None)``."""
+        profiler = self._start()
+        started = time.perf_counter()
+        try:
+            value = func()
+        finally:
+            elapsed = time.perf_counter() - started
+            path = self._stop(profiler, name, elapsed)
+        return value, path
+
+    def _start(self):
+        if self.tool == "pyinstrument":
+            try:
+                import pyinstrument
+            except ImportError:
+                pass
+            else:
+                profiler = pyinstrument.Profiler()
+                profiler.start()
+                return profiler
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop(self, profiler, name, elapsed):
+        is_cprofile = hasattr(profiler, "disable")
+        if is_cprofile:
+            profiler.disable()
+        else:
+            profiler.stop()
+        if elapsed <= self.budget:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(name))[0]
+        path = os.path.join(self.directory, f"{stem}-{int(time.time())}.{'prof' if is_cprofile else 'html'}")
+        if is_cprofile:
+            profiler.dump_stats(path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        return path
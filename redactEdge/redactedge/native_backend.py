@@ -0,0 +1,103 @@
+"""PyMuPDF-native text replacement and text drawing.
+
+Replacement redacts every match and types the new text at the match's
+baseline in the nearest Base-14 font at the original size and colour. All
+find/replace pairs are matched in a single pass per page (see
+``matcher.TermMatcher``), and pages without a match are left untouched.
+Unlike the Spire.PDF backend, no evaluation banner has to be painted over.
+"""
+
+import functools
+import re
+
+import fitz  # PyMuPDF
+
+from .matcher import PageText, TermMatcher
+
+# Longer replacements are shrunk to the matched width, but not below this share of the original size.
+MIN_FONT_SCALE = 0.5
+TEXTBOX_FONT = "helv"
+TEXTBOX_SIZE = 12.0
+
+# (serif, monospaced) -> Base-14 names for regular, bold, italic, bold italic
+_BASE14 = {
+    (False, False): ("helv", "hebo", "heit", "hebi"),
+    (True, False): ("tiro", "tibo", "tiit", "tibi"),
+    (False, True): ("cour", "cobo", "coit", "cobi"),
+    (True, True): ("cour", "cobo", "coit", "cobi"),
+}
+
+
+def base14_font(span):
+    """Closest Base-14 font name for a text span of ``rawdict`` output."""
+    return _base14_font(span["font"], span["flags"])
+
+
+@functools.lru_cache(maxsize=1024)
+def _base14_font(font, flags):
+    font = font.lower()
+    serif = bool(flags & fitz.TEXT_FONT_SERIFED) or "times" in font
+    mono = bool(flags & fitz.TEXT_FONT_MONOSPACED) or "courier" in font
+    bold = bool(flags & fitz.TEXT_FONT_BOLD) or "bold" in font
+    italic = bool(flags & fitz.TEXT_FONT_ITALIC) or "italic" in font or "oblique" in font
+    return _BASE14[(serif, mono)][bold + 2 * italic]
+
+
+@functools.lru_cache(maxsize=4096)
+def text_length(text, fontname):
+    """Width of ``text`` at size 1; kept for the life of the process."""
+    return fitz.get_text_length(text, fontname, 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _ascender(fontname):
+    return fitz.Font(fontname).ascender
+
+
+def _key(text):
+    return re.sub(r"\s+", " ", text.strip()).lower()
+
+
+class Replacer:
+    """Replaces all ``(find, replace)`` pairs in a document (case-insensitive)."""
+
+    def __init__(self, pairs):
+        self.replacements = {}
+        for find_text, replace_text in pairs:
+            if find_text and find_text.strip():
+                self.replacements.setdefault(_key(find_text), replace_text)
+        self.matcher = TermMatcher(list(self.replacements))
+
+    def replace_page(self, page):
+        """Replace every match on ``page``; return the number of replacements."""
+        page_text = PageText.extract(page, styles=True)
+        placements = []
+        for start, end, term in self.matcher.matches(page_text.text):
+            rects = page_text.rects(start, end)
+            if not rects:
+                continue
+            for rect in rects:
+                page.add_redact_annot(rect)
+            span = page_text.spans[page_text.span_index[start]]
+            replacement = self.replacements[term]
+            placements.append((page_text.origins[start], rects[0].width, span, replacement))
+        if not placements:
+            return 0
+        page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_LINE_ART_NONE)
+        for origin, width, span, replacement in placements:
+            if replacement:
+                fontname = base14_font(span)
+                size = span["size"]
+                natural = text_length(replacement, fontname) * size
+                if natural > width > 0:
+                    size *= max(width / natural, MIN_FONT_SCALE)
+                page.insert_text(origin, replacement, fontname=fontname, fontsize=size,
+                                 color=fitz.sRGB_to_pdf(span["color"]))
+        return len(placements)
+
+
+def draw_text(page, text, position):
+    """Draw static Helvetica text with its top-left corner at ``position``."""
+    x0, y0 = position[:2]
+    baseline = y0 + _ascender(TEXTBOX_FONT) * TEXTBOX_SIZE
+    page.insert_text((x0, baseline), text, fontname=TEXTBOX_FONT, fontsize=TEXTBOX_SIZE, color=(0, 0, 0))
@@ -0,0 +1,166 @@
+"""OCR text layers for scanned pages.
+
+Text search finds nothing on image-only pages, so ``OcrEngine`` recognizes
+them with Tesseract through PyMuPDF (``page.get_textpage_ocr``). Tesseract
+and its language data must be installed; ``tessdata`` or the
+``TESSDATA_PREFIX`` environment variable point at the data. Each page is
+copied into a one-page PDF that a worker process renders and recognizes,
+so several pages are processed in parallel. The recognized text layer is
+stored on disk, keyed by a hash of the page's content stream and image
+data, so unchanged scans are not recognized again on later runs.
+"""
+
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+
+import fitz  # PyMuPDF
+
+from .matcher import PageText
+
+# Bump when the stored text layer changes.
+CACHE_VERSION = 1
+DEFAULT_DPI = 300
+
+
+def find_tessdata(tessdata=None):
+    """Return the Tesseract language data directory; raise ``RuntimeError`` if there is none."""
+    return tessdata or fitz.get_tessdata()
+
+
+def is_scanned(page, page_text):
+    """True if ``page`` has images but no extractable text."""
+    return not page_text.text.strip() and bool(page.get_images())
+
+
+def page_hash(page):
+    """Hash of the content stream and image data of ``page``."""
+    doc = page.parent
+    digest = hashlib.sha1(f"{CACHE_VERSION}:{tuple(page.rect)}:{page.rotation}:".encode())
+    digest.update(page.read_contents())
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+def single_page_pdf(doc, page_number):
+    """Return ``doc[page_number]`` as the bytes of a one-page PDF."""
+    with fitz.open() as copy:
+        copy.insert_pdf(doc, from_page=page_number, to_page=page_number)
+        return copy.tobytes(garbage=1)
+
+
+def ocr_page(pdf_bytes, language, dpi, tessdata):
+    """Recognize the only page of ``pdf_bytes``; return its ``PageText`` as a dict."""
+    with fitz.open("pdf", pdf_bytes) as doc:
+        page = doc[0]
+        try:
+            textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True, tessdata=tessdata)
+        except Exception as e:
+            # MuPDF exceptions do not pickle; pass the message to the parent process.
+            raise RuntimeError(str(e)) from None
+        page_text = PageText.extract(page, textpage=textpage)
+    return {
+        "text": page_text.text,
+        "boxes": [tuple(box) if box is not None else None for box in page_text.boxes],
+        "lines": page_text.lines,
+    }
+
+
+class OcrCache:
+    """Directory of gzipped JSON text layers named by ``page_hash``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json.gz")
+
+    def get(self, key):
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, layer):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part = f"{path}.{os.getpid()}.part"
+        with gzip.open(part, "wt", encoding="utf-8") as f:
+            json.dump(layer, f)
+        os.replace(part, path)
+
+
+class OcrEngine:
+    """Recognizes scanned pages, ``workers`` pages at a time.
+
+    ``language`` uses Tesseract's codes, e.g. ``"eng"`` or ``"eng+deu"``.
+    Without ``cache_dir`` nothing is stored.
+    """
+
+    def __init__(self, language="eng", dpi=DEFAULT_DPI, workers=1, cache_dir=None, tessdata=None):
+        self.language = language
+        self.dpi = dpi
+        self.workers = max(1, workers)
+        self.cache_dir = cache_dir
+        self.tessdata = tessdata
+        self.hits = 0
+
+    def _key(self, page):
+        return f"{page_hash(page)}-{self.language}-{self.dpi}"
+
+    def text_layers(self, doc, page_numbers, context):
+        """Yield ``(page number, PageText)`` for ``page_numbers`` of ``doc``."""
+        cache = OcrCache(self.cache_dir) if self.cache_dir else None
+        todo = []
+        for pno in page_numbers:
+            context.check_cancelled()
+            key = self._key(doc[pno])
+            layer = cache.get(key) if cache is not None else None
+            if layer is None:
+                todo.append((pno, key))
+            else:
+                self.hits += 1
+                yield pno, _page_text(layer)
+        if not todo:
+            # Everything came from the cache; Tesseract is not needed.
+            return
+        tessdata = find_tessdata(self.tessdata)
+        for pno, key, layer in self._recognize(doc, todo, tessdata, context):
+            if cache is not None:
+                cache.put(key, layer)
+            yield pno, _page_text(layer)
+
+    def _recognize(self, doc, todo, tessdata, context):
+        args = (self.language, self.dpi, tessdata)
+        if self.workers == 1 or len(todo) < 2:
+            for pno, key in todo:
+                context.check_cancelled()
+                yield pno, key, _ocr_or_raise(pno, ocr_page, single_page_pdf(doc, pno), *args)
+            return
+        ctx = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(min(self.workers, len(todo)), mp_context=ctx) as pool:
+            # Submit a few pages per worker at a time so page copies do not pile up in memory.
+            step = self.workers * 2
+            for start in range(0, len(todo), step):
+                context.check_cancelled()
+                batch = [(pno, key, pool.submit(ocr_page, single_page_pdf(doc, pno), *args))
+                         for pno, key in todo[start:start + step]]
+                for pno, key, future in batch:
+                    yield pno, key, _ocr_or_raise(pno, future.result)
+
+
+def _ocr_or_raise(pno, func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        raise RuntimeError(f"OCR failed on page {pno + 1}: {e}") from e
+
+
+def _page_text(layer):
+    boxes = [fitz.Rect(box) if box is not None else None for box in layer["boxes"]]
+    return PageText(layer["text"], boxes, layer["lines"])
@@ -0,0 +1,258 @@
+"""Operation objects for each RedactEdge editing mode."""
+
+import fitz  # PyMuPDF
+
+from . import images
+from .images import ImageSelector
+from .matcher import PageText, TermMatcher
+from .ocr import is_scanned
+from .patterns import PatternMatcher
+from .pipeline import Operation
+from .regions import RegionSet, parse_pages
+
+# Engines for text replacement and textbox drawing.
+TEXT_BACKENDS = ("native", "spire")
+
+
+class DeleteTextOperation(Operation):
+    """Delete text using PyMuPDF redaction annotations.
+
+    Each page's text is extracted once; all literal terms are matched in a
+    single pass (see ``matcher.TermMatcher``) and named PII patterns or user
+    regexes (see ``patterns.PatternMatcher``) run over the same text.
+    With an ``ocr.OcrEngine``, scanned pages (images but no text) are
+    recognized after the other pages, and matches on them also blank the
+    image pixels underneath.
+    """
+
+    name = "delete_text"
+    page_local = True
+
+    def __init__(self, texts, case_sensitive=False, whole_word=False, patterns=(), regexes=(), ocr=None):
+        self.texts = list(texts)
+        self.case_sensitive = case_sensitive
+        self.whole_word = whole_word
+        self.patterns = list(patterns)
+        self.regexes = list(regexes)
+        self.ocr = ocr
+        self._matchers = None
+
+    def describe(self):
+        parts = list(self.texts) + [f"<{name}>" for name in self.patterns] + [f"/{r}/" for r in self.regexes]
+        return ", ".join(parts)
+
+    def apply(self, doc, context):
+        if self._matchers is None:
+            # Compiled once and kept for every later document of the batch.
+            self._matchers = (TermMatcher(self.texts, self.case_sensitive, self.whole_word),
+                              PatternMatcher(self.patterns, self.regexes))
+        matcher, pattern_matcher = self._matchers
+
+        def redact(page, page_text, images):
+            rects = matcher.find(page_text)
+            for start, end in pattern_matcher.spans(page_text.text):
+                rects.extend(page_text.rects(start, end))
+            if rects:
+                for rect in rects:
+                    page.add_redact_annot(rect)
+                page.apply_redactions(images=images)
+                context.touched.add(page.number)
+            return len(rects)
+
+        hits = 0
+        scanned = []
+        for page in context.iter_pages(doc):
+            page_text = PageText.extract(page)
+            if self.ocr is not None and is_scanned(page, page_text):
+                scanned.append(page.number)
+                continue
+            hits += redact(page, page_text, fitz.PDF_REDACT_IMAGE_NONE)
+        if scanned:
+            cached = self.ocr.hits
+            for pno, page_text in self.ocr.text_layers(doc, scanned, context):
+                hits += redact(doc[pno], page_text, fitz.PDF_REDACT_IMAGE_PIXELS)
+            context.log(f"OCR: {len(scanned)} scanned page(s), {self.ocr.hits - cached} from cache")
+        context.results[self.name] = hits
+        context.log(f"Deleted text(s) [{self.describe()}]: {hits} match(es)")
+
+
+class ReplaceTextOperation(Operation):
+    """Replace text pairs (case-insensitive, all occurrences).
+
+    The ``native`` backend redacts and re-types matches with PyMuPDF in one
+    pass per page (see ``native_backend``); ``spire`` round-trips the
+    document through Spire.PDF in memory.
+    """
+
+    name = "replace_text"
+
+    def __init__(self, pairs, backend="native"):
+        self.pairs = list(pairs)
+        self.backend = backend
+        self.page_local = backend == "native"
+        self._replacer = None
+
+    def apply(self, doc, context):
+        if self.backend == "spire":
+            from . import spire_backend
+
+            new_doc = spire_backend.run_spire(doc, lambda sd: spire_backend.replace_text(sd, self.pairs))
+            context.report(1, 1)
+            context.log("Text replacement completed")
+            return new_doc
+
+        from .native_backend import Replacer
+
+        if self._replacer is None:
+            self._replacer = Replacer(self.pairs)
+        replacer = self._replacer
+        count = 0
+        for page in context.iter_pages(doc):
+            replaced = replacer.replace_page(page)
+            if replaced:
+                context.touched.add(page.number)
+                count += replaced
+        context.results[self.name] = count
+        context.log(f"Text replacement completed ({count} replacement(s))")
+
+
+class ReplaceImageOperation(Operation):
+    """Replace the selected images, inserting the new image only once.
+
+    Selection is per-page position (``image_index``), exact stream hash or
+    resemblance to sample images; see ``images.ImageSelector``.
+    """
+
+    name = "replace_image"
+    page_local = True
+
+    def __init__(self, image_path, image_index=None, hashes=(), sample_images=()):
+        self.image_path = image_path
+        self.selector = ImageSelector(image_index, hashes, sample_images)
+
+    def apply(self, doc, context):
+        stream = images.load_image(self.image_path)
+        count = images.replace_images(doc, self.selector.select(doc, context), stream=stream)
+        context.save_options["garbage"] = 4
+        context.results[self.name] = count
+        context.log(f"Image replacement completed ({count} unique image(s))")
+
+
+class DeleteImageOperation(Operation):
+    """Delete the selected images (see ``ReplaceImageOperation``)."""
+
+    name = "delete_image"
+    page_local = True
+
+    def __init__(self, image_index=None, hashes=(), sample_images=()):
+        self.selector = ImageSelector(image_index, hashes, sample_images)
+
+    def apply(self, doc, context):
+        count = images.delete_images(doc, self.selector.select(doc, context))
+        context.save_options["garbage"] = 4
+        context.results[self.name] = count
+        context.log(f"Image deletion completed ({count} unique image(s))")
+
+
+class AddTextboxOperation(Operation):
+    """Add static text with PyMuPDF or, with ``backend="spire"``, Spire.PDF."""
+
+    name = "add_textbox"
+    removes_content = False
+
+    def __init__(self, text, position, page_num, backend="native"):
+        self.text = text
+        self.position = position
+        self.page_num = page_num
+        self.backend = backend
+        self.page_local = backend == "native"
+
+    def apply(self, doc, context):
+        if self.backend == "spire":
+            from . import spire_backend
+
+            new_doc = spire_backend.run_spire(
+                doc, lambda sd: spire_backend.draw_text(sd, self.text, self.position, self.page_num)
+            )
+            context.report(1, 1)
+            context.log("Textbox addition completed")
+            return new_doc
+
+        from .native_backend import draw_text
+
+        if self.page_num < len(doc) and context.in_range(self.page_num):
+            draw_text(doc[self.page_num], self.text, self.position)
+            context.touched.add(self.page_num)
+        context.report(1, 1)
+        context.log("Textbox addition completed")
+
+
+class DeleteAreaOperation(Operation):
+    """Truly redact rectangular areas (table regions, headers, footers).
+
+    ``regions`` is a ``regions.RegionSet`` (or a list of region dicts).
+    ``tables`` is an optional ``tables.TableDetector`` that adds the
+    detected tables of every page; with a template session, documents of a
+    known layout reuse the tables found in the first one. All rectangles of
+    a page become redaction annotations that are applied in one pass per
+    page. Text and line art underneath are removed and overlapping image
+    pixels are blanked, rather than just painted over.
+    """
+
+    name = "delete_area"
+    page_local = True
+
+    def __init__(self, regions=(), tables=None):
+        self.regions = regions if isinstance(regions, RegionSet) else RegionSet(regions)
+        self.tables = tables
+        self._resolved = {}
+
+    def detect_tables(self, doc, context):
+        """``{page number: detected tables}`` for the pages of this run."""
+        try:
+            return {page.number: self.tables.detect(page) for page in context.iter_pages(doc)}
+        finally:
+            self.tables.finish()
+
+    def apply(self, doc, context):
+        # Areas depend only on the page count; resolve each count once per batch.
+        if len(doc) not in self._resolved:
+            self._resolved[len(doc)] = self.regions.by_page(len(doc))
+        by_page = {pno: list(rects) for pno, rects in self._resolved[len(doc)].items() if context.in_range(pno)}
+        for region in self.regions if context.in_range(0) else ():
+            if not parse_pages(region.pages, len(doc)):
+                context.log(f"Area {region.describe()} is outside this {len(doc)}-page document; skipped")
+        found = 0
+        if self.tables is not None:
+            cached = self.tables.hits
+            numbers = range(len(doc)) if context.page_range is None else context.page_range
+            template = context.template(doc, numbers)
+            if template is None:
+                detected = self.detect_tables(doc, context)
+            else:
+                # Same page boxes and text layout as an earlier document: its tables are these.
+                key = ("tables", self.tables.strategy)
+                if key in template.values:
+                    context.log("Reusing the tables detected in an earlier document with the same layout")
+                detected = template.get(key, lambda: self.detect_tables(doc, context))
+                context.report(1, 1)
+            for pno, tables in detected.items():
+                rects = [fitz.Rect(bbox) for bbox in self.tables.select(tables)]
+                if rects:
+                    by_page.setdefault(pno, []).extend(rects)
+                    found += len(rects)
+            context.log(f"Detected {found} matching table(s) ({self.tables.hits - cached} page(s) from cache)")
+        done = 0
+        for pno in sorted(by_page):
+            context.check_cancelled()
+            page = doc[pno]
+            for rect in by_page[pno]:
+                page.add_redact_annot(rect, fill=(1, 1, 1))
+            page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_PIXELS)
+            context.touched.add(pno)
+            done += 1
+            if self.tables is None:
+                context.report(done, len(by_page))
+        count = sum(len(rects) for rects in by_page.values())
+        context.results[self.name] = count
+        context.log(f"Deleted {count} area(s) on {len(by_page)} page(s)")
@@ -0,0 +1,291 @@
+"""Single-pass document pipeline: open once, edit in memory, save once."""
+
+import os
+import time
+
+import fitz  # PyMuPDF
+
+from .archive import copy_input, input_size, open_input
+from .memory import peak_rss, reset_peak_rss
+
+# Documents with at least this many pages are processed in large-document mode.
+LARGE_DOCUMENT_PAGES = 500
+# Pages between two flushes of MuPDF's resource store in large-document mode.
+WINDOW_PAGES = 64
+
+
+def share_shard_workers(pipeline_options, workers):
+    """``pipeline_options`` for one of ``workers`` processes that run files side by side.
+
+    Each gets an equal share, at least one, of ``shard_workers`` (default:
+    the CPU count), so their shard pools do not add up to CPUs² processes.
+    """
+    if workers <= 1:
+        return pipeline_options
+    total = pipeline_options.get("shard_workers") or os.cpu_count() or 1
+    return dict(pipeline_options, shard_workers=max(1, total // workers))
+
+
+class Cancelled(Exception):
+    """Raised between pages when the caller asked the run to stop."""
+
+
+class CancelFlag:
+    """Cancellation flag that worker processes see through the file system.
+
+    Unlike a ``multiprocessing.Event`` it can be pickled into tasks that are
+    submitted to an already running pool.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def is_set(self):
+        return os.path.exists(self.path)
+
+    def set(self):
+        open(self.path, "w").close()
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class PipelineContext:
+    """Carries logging, progress, cancellation and results through a run.
+
+    ``progress`` is called with the fraction (0..1) of the current file that
+    is done; ``cancel_event`` is anything with an ``is_set()`` method.
+    Operations may put entries in ``save_options`` to override the
+    pipeline's options for the final save, and should add the numbers of
+    pages whose content they changed to ``touched``. ``timings`` maps each
+    stage ("open", every operation's name, "save") to its wall time in seconds.
+    With a ``session.TemplateSession`` in ``session``, ``template(doc, pages)``
+    returns the document's shared ``Template``. A ``page_range`` restricts
+    the operations to those pages (see ``shard``). When the compaction
+    stage ran, ``bytes_saved`` is the size of the input minus the size of
+    the output, or, if the stage measured it, the size of the document
+    just before the stage (``size_before_compact``) minus the output's.
+    """
+
+    def __init__(self, log=None, progress=None, cancel_event=None):
+        self.log = log or (lambda message: None)
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.results = {}
+        self.save_options = {}
+        self.touched = set()
+        self.window = 0
+        self.incremental = False
+        self.peak_rss = None
+        self.timings = {}
+        self.pages = 0
+        self.op_index = 0
+        self.op_count = 1
+        self.session = None
+        self.page_range = None
+        self.size_before_compact = None
+        self.bytes_saved = None
+
+    def template(self, doc, pages):
+        """The session ``Template`` of ``doc`` fingerprinted on ``pages``, or ``None``."""
+        if self.session is None:
+            return None
+        return self.session.bind(doc, pages)
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise Cancelled()
+
+    def report(self, done, total):
+        """Report that ``done`` of ``total`` pages of the current operation are finished."""
+        if self.progress is not None and total:
+            self.progress((self.op_index + done / total) / self.op_count)
+
+    def in_range(self, page_number):
+        return self.page_range is None or page_number in self.page_range
+
+    def iter_pages(self, doc):
+        """Iterate over ``doc`` pages (of ``page_range``), reporting progress and honouring cancellation."""
+        numbers = range(len(doc)) if self.page_range is None else self.page_range
+        count = len(numbers)
+        for i, pno in enumerate(numbers):
+            self.check_cancelled()
+            page = doc[pno]
+            yield page
+            del page
+            self.report(i + 1, count)
+            if self.window and (i + 1) % self.window == 0:
+                fitz.TOOLS.store_shrink(100)
+
+
+class Operation:
+    """One edit applied to an open fitz.Document.
+
+    ``apply`` may modify ``doc`` in place and return ``None``, or return a
+    new document (e.g. after a Spire round-trip) that replaces it.
+    """
+
+    name = "operation"
+    # True if the operation removes or overwrites existing content. Such
+    # content would stay recoverable in the file's history after an
+    # incremental save, so these operations force a full rewrite.
+    removes_content = True
+    # True if the operation's effect on a page depends on that page alone
+    # (and on no page numbering), so page ranges can be processed apart.
+    page_local = False
+
+    def apply(self, doc, context):
+        raise NotImplementedError
+
+    def describe(self):
+        return self.name
+
+
+class Pipeline:
+    """Runs an ordered list of operations against one in-memory document.
+
+    Documents with ``large_threshold`` pages or more run in large-document
+    mode. In this mode MuPDF's resource store is flushed every
+    ``window_pages`` pages, and the save skips object merging and
+    recompresses only the content streams of pages in ``context.touched``.
+    ``incremental`` can be "never", "safe" (only when no operation removes
+    content) or "always". It lets large-document mode append changes to a
+    copy of the input with ``saveIncr`` instead of rewriting the file.
+    ``session`` is an optional ``session.TemplateSession`` shared by the
+    documents of a batch; it is not used in large-document mode. Documents
+    with ``shard_threshold`` pages or more (0 = never) are split into page
+    ranges processed by ``shard_workers`` processes when every operation
+    is ``page_local`` (see ``shard``). ``compact`` is an optional
+    ``compact.Compactor`` run once before the save; it rules out
+    incremental saves.
+    """
+
+    def __init__(self, operations, save_options=None, large_threshold=LARGE_DOCUMENT_PAGES,
+                 window_pages=WINDOW_PAGES, incremental="safe", session=None, shard_threshold=0,
+                 shard_workers=None, compact=None):
+        self.operations = list(operations)
+        self.save_options = save_options or {"garbage": 3, "deflate": True}
+        self.large_threshold = large_threshold
+        self.window_pages = window_pages
+        self.incremental = incremental
+        self.session = session
+        self.shard_threshold = shard_threshold
+        self.shard_workers = max(1, shard_workers or os.cpu_count() or 1)
+        self.compact = compact
+
+    def incremental_allowed(self):
+        if self.compact is not None:
+            return False
+        if self.incremental == "always":
+            return True
+        if self.incremental == "safe":
+            return not any(op.removes_content for op in self.operations)
+        return False
+
+    def run(self, input_path, output_path, context=None):
+        """Process ``input_path`` (a file, archive member name or PDF bytes) into ``output_path``."""
+        context = context or PipelineContext()
+        reset_peak_rss()
+        temp_path = output_path + ".part"
+        started = time.perf_counter()
+        doc = open_input(input_path)
+        if self.shard_workers > 1 and self.shard_threshold and doc.page_count >= self.shard_threshold:
+            from .shard import shard_blocker
+
+            blocker = shard_blocker(doc, self.operations)
+            if blocker:
+                context.log(f"Not sharding {doc.page_count} pages: {blocker}")
+            else:
+                page_count = doc.page_count
+                doc.close()
+                context.timings["open"] = time.perf_counter() - started
+                return self.run_sharded(input_path, output_path, page_count, context)
+        large = bool(self.large_threshold) and doc.page_count >= self.large_threshold
+        if large and self.incremental_allowed() and doc.can_save_incrementally():
+            doc.close()
+            copy_input(input_path, temp_path)
+            doc = fitz.open(temp_path)
+            context.incremental = True
+        context.window = self.window_pages if large else 0
+        context.session = None if large else self.session
+        context.timings["open"] = time.perf_counter() - started
+        try:
+            context.op_count = max(len(self.operations), 1)
+            for index, op in enumerate(self.operations):
+                context.op_index = index
+                context.check_cancelled()
+                started = time.perf_counter()
+                new_doc = op.apply(doc, context)
+                if new_doc is not None and new_doc is not doc:
+                    doc.close()
+                    doc = new_doc
+                    context.incremental = False
+                context.timings[op.name] = context.timings.get(op.name, 0.0) + time.perf_counter() - started
+            context.check_cancelled()
+            context.pages = len(doc)
+            if context.incremental:
+                started = time.perf_counter()
+                doc.saveIncr()
+            else:
+                if large:
+                    self.compress_touched(doc, context.touched)
+                    options = dict({"garbage": 1}, **context.save_options)
+                else:
+                    options = dict(self.save_options, **context.save_options)
+                if self.compact is not None:
+                    started = time.perf_counter()
+                    options = self.compact.run(doc, options, context)
+                    context.timings["compact"] = time.perf_counter() - started
+                started = time.perf_counter()
+                doc.save(temp_path, **options)
+        except BaseException:
+            doc.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        doc.close()
+        os.replace(temp_path, output_path)
+        context.timings["save"] = time.perf_counter() - started
+        context.peak_rss = peak_rss()
+        self.report_savings(input_path, output_path, context)
+        return context
+
+    def run_sharded(self, input_path, output_path, page_count, context):
+        from .shard import run_sharded
+
+        temp_path = output_path + ".part"
+        window = self.window_pages if self.large_threshold and page_count >= self.large_threshold else 0
+        try:
+            run_sharded(input_path, temp_path, self.operations, page_count, self.shard_workers, window,
+                        self.save_options, context, self.compact)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        os.replace(temp_path, output_path)
+        context.pages = page_count
+        self.report_savings(input_path, output_path, context)
+        return context
+
+    def report_savings(self, input_path, output_path, context):
+        if self.compact is None:
+            return
+        before = context.size_before_compact
+        if before is None:
+            before = input_size(input_path)
+            what = "input"
+        else:
+            what = "before compaction"
+        after = os.path.getsize(output_path)
+        context.bytes_saved = before - after
+        share = f" ({context.bytes_saved / before:.0%})" if before else ""
+        context.log(f"Compacted to {after / 1024:,.0f} KiB from {before / 1024:,.0f} KiB {what}, "
+                    f"saved {context.bytes_saved / 1024:,.0f} KiB{share}")
+
+    @staticmethod
+    def compress_touched(doc, touched):
+        """Deflate the content streams of changed pages only."""
+        for pno in sorted(touched):
+            for xref in doc[pno].get_contents():
+                doc.update_stream(xref, doc.xref_stream(xref), compress=True)
@@ -0,0 +1,206 @@
+"""Rendered-page and tile cache for the GUI preview.
+
+The previewed document stays open while the user pages through it. Pages
+are rendered as fixed-size tiles at the current zoom with
+``page.get_pixmap(clip=..., matrix=...)``, so only the visible part of a
+poster-size page is ever rasterised. Tiles are kept in a memory-bounded LRU
+keyed by (file hash, page, zoom, tile); marked areas are drawn over the
+preview, so they never change a tile. Tiles of neighbouring pages are
+rendered ahead of time on a background thread. PyMuPDF is not thread-safe,
+so every call into the open document is serialised through ``render_lock``.
+The LRU has a lock of its own that is never held while rendering, so a
+cached tile is returned at once even while a neighbour is being rendered;
+a tile that is not cached waits for at most one render.
+"""
+
+import collections
+import hashlib
+import math
+import os
+import threading
+
+import fitz  # PyMuPDF
+
+from .archive import input_stat, open_binary, open_input
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Edge length of a preview tile in device pixels.
+TILE_SIZE = 512
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-1 of the file (or archive member) contents."""
+    digest = hashlib.sha1()
+    with open_binary(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RenderedPage:
+    """RGB samples of one rendered page plus the page geometry they came from."""
+
+    def __init__(self, width, height, samples, page_rect):
+        self.width = width
+        self.height = height
+        self.samples = samples
+        self.page_rect = page_rect
+
+    @property
+    def nbytes(self):
+        return len(self.samples)
+
+
+class PreviewCache:
+    """Memory-bounded LRU of rendered pages and tiles for one open document.
+
+    ``render_lock`` is always taken before ``lock`` when both are needed.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, prefetch=1):
+        self.max_bytes = max_bytes
+        self.prefetch_distance = prefetch
+        self.entries = collections.OrderedDict()
+        self.used_bytes = 0
+        self.lock = threading.RLock()
+        self.render_lock = threading.Lock()
+        self.doc = None
+        self.path = None
+        self.stat = None
+        self.digest = None
+        self.prefetch_queue = collections.deque()
+        self.prefetch_wakeup = threading.Event()
+        self.prefetch_thread = None
+
+    @property
+    def page_count(self):
+        with self.render_lock:
+            return len(self.doc) if self.doc is not None else 0
+
+    def open(self, path):
+        """Make ``path`` the previewed document; reuses the handle if unchanged."""
+        key = input_stat(path)
+        with self.render_lock:
+            if self.doc is not None and self.path == path and self.stat == key:
+                return
+            self._close_doc()
+            doc = open_input(path)
+            digest = file_hash(path)
+            with self.lock:
+                self.doc = doc
+                self.path = path
+                self.stat = key
+                self.digest = digest
+                self.prefetch_queue.clear()
+
+    def close(self):
+        with self.render_lock:
+            self._close_doc()
+            with self.lock:
+                self.prefetch_queue.clear()
+
+    def _close_doc(self):
+        if self.doc is not None:
+            self.doc.close()
+        with self.lock:
+            self.doc = None
+            self.path = None
+            self.stat = None
+            self.digest = None
+
+    def page_rect(self, page_num):
+        with self.render_lock:
+            return fitz.Rect(self.doc[page_num].rect)
+
+    def get(self, page_num, dpi=120):
+        """Return the whole page rendered at ``dpi`` as a ``RenderedPage``."""
+        return self._get((self.digest, page_num, dpi / 72, None))
+
+    def get_tile(self, page_num, zoom, col, row):
+        """Return tile (``col``, ``row``) of the page rendered at ``zoom`` (1.0 = 72 dpi)."""
+        return self._get((self.digest, page_num, zoom, (col, row)))
+
+    def tile_grid(self, page_num, zoom):
+        """Number of (columns, rows) of tiles covering the page at ``zoom``."""
+        rect = self.page_rect(page_num)
+        return (
+            max(1, math.ceil(rect.width * zoom / TILE_SIZE)),
+            max(1, math.ceil(rect.height * zoom / TILE_SIZE)),
+        )
+
+    def _lookup(self, key):
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+            return cached
+
+    def _get(self, key):
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        with self.render_lock:
+            # Another thread may have rendered it while this one waited.
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            if key[0] != self.digest or self.doc is None:
+                raise ValueError("The previewed document has changed")
+            rendered = self._render(key)
+        with self.lock:
+            self._store(key, rendered)
+        return rendered
+
+    def _render(self, key):
+        _, page_num, zoom, tile = key
+        page = self.doc[page_num]
+        matrix = fitz.Matrix(zoom, zoom)
+        if tile is None:
+            pix = page.get_pixmap(matrix=matrix)
+        else:
+            col, row = tile
+            clip = fitz.Rect(col, row, col + 1, row + 1) * (TILE_SIZE / zoom)
+            clip = (clip + (page.rect.x0, page.rect.y0, page.rect.x0, page.rect.y0)) & page.rect
+            pix = page.get_pixmap(matrix=matrix, clip=clip)
+        return RenderedPage(pix.width, pix.height, pix.samples, fitz.Rect(page.rect))
+
+    def _store(self, key, rendered):
+        self.entries[key] = rendered
+        self.used_bytes += rendered.nbytes
+        while self.used_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.used_bytes -= evicted.nbytes
+
+    def prefetch(self, page_num, zoom, tiles=None):
+        """Queue the same ``tiles`` (or whole pages) of the neighbouring pages."""
+        count = self.page_count
+        wanted = []
+        for offset in range(1, self.prefetch_distance + 1):
+            for neighbour in (page_num + offset, page_num - offset):
+                if 0 <= neighbour < count:
+                    for tile in tiles or (None,):
+                        wanted.append((self.digest, neighbour, zoom, tile))
+        with self.lock:
+            self.prefetch_queue.clear()
+            self.prefetch_queue.extend(k for k in wanted if k not in self.entries)
+        if self.prefetch_thread is None:
+            self.prefetch_thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+            self.prefetch_thread.start()
+        self.prefetch_wakeup.set()
+
+    def _prefetch_loop(self):
+        while True:
+            self.prefetch_wakeup.wait()
+            self.prefetch_wakeup.clear()
+            while True:
+                # Only the queue is touched under the lock; the render happens outside it.
+                with self.lock:
+                    if not self.prefetch_queue:
+                        break
+                    key = self.prefetch_queue.popleft()
+                    if key[0] != self.digest or key in self.entries:
+                        continue
+                try:
+                    self._get(key)
+                except Exception:
+                    pass
@@ -0,0 +1,112 @@
+"""Rectangular redaction regions across pages.
+
+A ``Region`` is a rectangle in PDF points plus the pages it applies to: a
+single 0-based page number, or a page spec string as in print dialogs
+(1-based): ``"all"``, ``"odd"``, ``"even"``, ``"last"``, ``"1-3,7"``, or
+``"5-"`` for page 5 to the end. Specs make recurring headers and footers one
+region instead of one per page. A ``RegionSet`` lives in memory until the
+pipeline resolves it against the page count of each document.
+"""
+
+import re
+
+import fitz  # PyMuPDF
+
+_RANGE = re.compile(r"^(\d+|last)?\s*(-)?\s*(\d+|last)?$")
+
+
+def parse_pages(spec, page_count):
+    """Return the sorted 0-based page numbers ``spec`` selects in a document.
+
+    Raises ``ValueError`` for a malformed spec; numbers past the end of the
+    document are dropped.
+    """
+    if isinstance(spec, int):
+        return [spec] if 0 <= spec < page_count else []
+    spec = str(spec).strip().lower()
+    if spec == "all":
+        return list(range(page_count))
+    if spec == "odd":
+        return list(range(0, page_count, 2))
+    if spec == "even":
+        return list(range(1, page_count, 2))
+    pages = set()
+    for part in spec.split(","):
+        m = _RANGE.match(part.strip())
+        if not part.strip() or not m or not (m.group(1) or m.group(3)):
+            raise ValueError(f"Invalid page spec {spec!r}")
+        first, dash, last = m.groups()
+        start = page_count if first == "last" else int(first) if first else 1
+        if dash:
+            end = page_count if last in (None, "last") else int(last)
+        else:
+            end = start
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range {part.strip()!r}")
+        pages.update(range(start - 1, min(end, page_count)))
+    return sorted(pages)
+
+
+class Region:
+    """A rectangle (x0, y0, x1, y1) applied to the pages selected by ``pages``."""
+
+    def __init__(self, rect, pages=0):
+        if len(rect) != 4:
+            raise ValueError("A region needs a rect of four numbers")
+        self.rect = tuple(float(v) for v in rect)
+        self.pages = pages
+        parse_pages(pages, 1)
+
+    def to_dict(self):
+        key = "page" if isinstance(self.pages, int) else "pages"
+        return {"rect": list(self.rect), key: self.pages}
+
+    @classmethod
+    def from_dict(cls, data):
+        if "pages" in data:
+            return cls(data["rect"], data["pages"])
+        return cls(data["rect"], int(data.get("page", 0)))
+
+    def describe(self):
+        pages = f"page {self.pages + 1}" if isinstance(self.pages, int) else f"pages {self.pages}"
+        x0, y0, x1, y1 = self.rect
+        return f"({x0:.1f}, {y0:.1f})-({x1:.1f}, {y1:.1f}) on {pages}"
+
+
+class RegionSet:
+    """An ordered collection of regions, resolved per document at apply time."""
+
+    def __init__(self, regions=()):
+        self.regions = [r if isinstance(r, Region) else Region.from_dict(r) for r in regions]
+
+    def __len__(self):
+        return len(self.regions)
+
+    def __iter__(self):
+        return iter(self.regions)
+
+    def add(self, rect, pages=0):
+        region = Region(rect, pages)
+        self.regions.append(region)
+        return region
+
+    def pop(self):
+        return self.regions.pop()
+
+    def clear(self):
+        self.regions.clear()
+
+    def on_page(self, page_num, page_count):
+        """Regions that apply to 0-based ``page_num`` of a ``page_count``-page document."""
+        return [r for r in self.regions if page_num in parse_pages(r.pages, page_count)]
+
+    def by_page(self, page_count):
+        """Return ``{page number: [fitz.Rect, ...]}`` for a document of ``page_count`` pages."""
+        pages = {}
+        for region in self.regions:
+            for pno in parse_pages(region.pages, page_count):
+                pages.setdefault(pno, []).append(fitz.Rect(region.rect))
+        return pages
+
+    def to_list(self):
+        return [region.to_dict() for region in self.regions]
@@ -0,0 +1,278 @@
+"""Read-only scan of PDFs for the find list of a job, and leak verification.
+
+``Scanner`` counts the matches of a job's find list (``delete_text``, the
+find half of ``replace_text``, ``patterns`` and ``regexes``) per file and
+per page. Each page's text is extracted once as plain text; nothing is
+rendered, changed or saved, so a scan runs at text-extraction speed.
+Annotations and form fields, metadata, bookmarks and embedded files can be
+scanned as well. With the job's ``delete_area`` regions, text inside an
+area is reported too.
+
+``verify`` is the same scan over outputs: any hit, or any text left inside
+a delete area, is a leak. That catches text that was only covered (a white
+box drawn over it) instead of removed. Tables found by ``auto_tables`` are
+not re-detected, so only fixed areas are checked.
+"""
+
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import time
+
+import fitz  # PyMuPDF
+
+from .archive import open_input
+from .matcher import EXTRACT_FLAGS, TermMatcher
+from .patterns import PatternMatcher
+
+SOURCES = ("annotations", "metadata", "bookmarks", "embedded")
+# Files handed to a worker at a time; small files make IPC the bottleneck.
+MAX_CHUNK = 64
+# Characters of leftover area text kept in a result.
+AREA_SNIPPET = 80
+
+
+class ScanResult:
+    """Matches found in one file.
+
+    ``pages`` and ``annotations`` map a 0-based page number to
+    ``{label: count}``; ``document`` maps "metadata", "bookmarks" or
+    "embedded" to ``{label: count}``. ``areas`` maps a page number to the
+    text found inside its delete areas.
+    """
+
+    def __init__(self, input_path):
+        self.input_path = input_path
+        self.page_count = 0
+        self.pages = {}
+        self.annotations = {}
+        self.document = {}
+        self.areas = {}
+        self.error = None
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def hits(self):
+        """Total number of matches in every source."""
+        groups = list(self.pages.values()) + list(self.annotations.values()) + list(self.document.values())
+        return sum(sum(counts.values()) for counts in groups)
+
+    @property
+    def clean(self):
+        """True if the file was read and nothing matched."""
+        return self.ok and not self.hits and not self.areas
+
+    def totals(self):
+        """``{label: count}`` over every source."""
+        totals = collections.Counter()
+        for counts in list(self.pages.values()) + list(self.annotations.values()) + list(self.document.values()):
+            totals.update(counts)
+        return dict(totals)
+
+    def describe(self):
+        """One line for a log: where and what matched."""
+        if not self.ok:
+            return f"{self.input_path}: error: {self.error}"
+        parts = []
+        if self.pages:
+            parts.append("pages " + ", ".join(str(p + 1) for p in sorted(self.pages)))
+        if self.annotations:
+            parts.append("annotations on pages " + ", ".join(str(p + 1) for p in sorted(self.annotations)))
+        parts.extend(sorted(self.document))
+        if self.areas:
+            parts.append("text in delete areas on pages " + ", ".join(str(p + 1) for p in sorted(self.areas)))
+        if not parts:
+            return f"{self.input_path}: no matches"
+        labels = ", ".join(f"{label} x{count}" for label, count in sorted(self.totals().items()))
+        found = f"{self.hits} match(es) ({labels})" if self.hits else "no matches"
+        return f"{self.input_path}: {found} in {'; '.join(parts)}"
+
+    def to_dict(self):
+        return {
+            "input_path": self.input_path,
+            "ok": self.ok,
+            "error": self.error,
+            "page_count": self.page_count,
+            "hits": self.hits,
+            "totals": self.totals(),
+            "pages": [{"page": p + 1, "matches": counts} for p, counts in sorted(self.pages.items())],
+            "annotations": [{"page": p + 1, "matches": counts} for p, counts in sorted(self.annotations.items())],
+            "document": self.document,
+            "areas": [{"page": p + 1, "text": text} for p, text in sorted(self.areas.items())],
+            "elapsed": round(self.elapsed, 4),
+        }
+
+
+class Scanner:
+    """Counts the matches of a find list in PDFs without modifying them.
+
+    ``terms`` follow ``case_sensitive`` and ``whole_word`` like text
+    deletion; ``finds`` (replacement search terms) are matched
+    case-insensitively like text replacement. A term is labelled as written
+    (lower-cased unless case-sensitive), a pattern ``pattern:NAME`` and a
+    regex ``regex:EXPR``. ``sources`` selects extra content from
+    ``SOURCES``; ``areas`` is a ``regions.RegionSet`` or ``None``.
+    """
+
+    def __init__(self, terms=(), case_sensitive=False, whole_word=False, patterns=(), regexes=(), finds=(),
+                 sources=(), areas=None):
+        unknown = set(sources) - set(SOURCES)
+        if unknown:
+            raise ValueError(f"Unknown content source(s): {', '.join(sorted(unknown))}")
+        # (matcher, whether its labels are lower-cased)
+        self.matchers = [(TermMatcher(terms, case_sensitive, whole_word), not case_sensitive)]
+        if finds:
+            self.matchers.append((TermMatcher(finds), True))
+        self.patterns = [(f"pattern:{name}", PatternMatcher([name])) for name in patterns]
+        self.patterns += [(f"regex:{expression}", PatternMatcher(regexes=[expression])) for expression in regexes]
+        self.sources = frozenset(sources)
+        self.areas = areas if areas else None
+
+    @classmethod
+    def for_job(cls, spec, sources=(), verify=False):
+        """Scanner for the find list and delete areas of a ``JobSpec``.
+
+        When verifying, a replacement search term that its own replacement
+        contains is left out, since the output is expected to show it.
+        """
+        from .regions import RegionSet
+
+        finds = [find for find, replacement in spec.replace_text
+                 if not (verify and find.lower() in replacement.lower())]
+        return cls(
+            spec.delete_text, spec.case_sensitive, spec.whole_word, spec.patterns, spec.regexes, finds,
+            sources, RegionSet(spec.delete_area) if spec.delete_area else None,
+        )
+
+    def __bool__(self):
+        return any(m.regex is not None for m, _ in self.matchers) or bool(self.patterns) or bool(self.areas)
+
+    def count(self, text):
+        """Return ``{label: count}`` of the matches in ``text``."""
+        counts = collections.Counter()
+        if not text:
+            return counts
+        for matcher, fold in self.matchers:
+            for start, end in matcher.spans(text):
+                label = " ".join(text[start:end].split())
+                counts[label.lower() if fold else label] += 1
+        for label, matcher in self.patterns:
+            found = len(matcher.spans(text))
+            if found:
+                counts[label] += found
+        return counts
+
+    def scan(self, source):
+        """Scan a path, archive member name or PDF bytes; never raises."""
+        result = ScanResult(source if isinstance(source, str) else "<bytes>")
+        started = time.perf_counter()
+        try:
+            with open_input(source) as doc:
+                self._scan_document(doc, result)
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _scan_document(self, doc, result):
+        if doc.needs_pass:
+            raise ValueError("document is encrypted")
+        result.page_count = doc.page_count
+        areas = self.areas.by_page(doc.page_count) if self.areas else {}
+        for page in doc:
+            counts = self.count(page.get_text("text", flags=EXTRACT_FLAGS))
+            if counts:
+                result.pages[page.number] = dict(counts)
+            if page.number in areas:
+                text = self._area_text(page, areas[page.number])
+                if text:
+                    result.areas[page.number] = text
+            if "annotations" in self.sources:
+                counts = self.count("\n".join(_annotation_texts(page)))
+                if counts:
+                    result.annotations[page.number] = dict(counts)
+        for source, texts in (("metadata", _metadata_texts), ("bookmarks", _bookmark_texts),
+                              ("embedded", _embedded_texts)):
+            if source in self.sources:
+                counts = self.count("\n".join(texts(doc)))
+                if counts:
+                    result.document[source] = dict(counts)
+
+    def _area_text(self, page, rects):
+        """Text still inside ``rects``, shortened to ``AREA_SNIPPET`` characters."""
+        text = " ".join(
+            " ".join(page.get_text("text", clip=rect, flags=EXTRACT_FLAGS).split()) for rect in rects
+        ).strip()
+        return text[:AREA_SNIPPET] + ("..." if len(text) > AREA_SNIPPET else "")
+
+
+def _annotation_texts(page):
+    for annot in page.annots():
+        info = annot.info
+        yield from (info.get(key) or "" for key in ("content", "title", "subject"))
+    for widget in page.widgets():
+        if isinstance(widget.field_value, str):
+            yield widget.field_value
+
+
+def _metadata_texts(doc):
+    yield from (value for value in (doc.metadata or {}).values() if isinstance(value, str))
+    yield doc.get_xml_metadata() or ""
+
+
+def _bookmark_texts(doc):
+    for _, title, _ in doc.get_toc(simple=True):
+        yield title
+
+
+def _embedded_texts(doc):
+    """Names, descriptions and contents of embedded files; embedded PDFs by page text."""
+    for name in doc.embfile_names():
+        info = doc.embfile_info(name)
+        yield from (name, info.get("filename") or "", info.get("description") or "")
+        data = doc.embfile_get(name)
+        if data.startswith(b"%PDF"):
+            try:
+                with fitz.open("pdf", data) as embedded:
+                    yield from (page.get_text("text", flags=EXTRACT_FLAGS) for page in embedded)
+            except Exception:
+                pass
+        else:
+            yield data.decode("utf-8", errors="ignore")
+
+
+_scanner = None
+
+
+def _init_worker(scanner):
+    global _scanner
+    _scanner = scanner
+
+
+def _scan(source):
+    return _scanner.scan(source)
+
+
+def scan_files(files, scanner, workers=None):
+    """Yield a ``ScanResult`` for every file, in input order.
+
+    Files are spread over ``workers`` processes (default: CPU count) in
+    chunks, each worker holding its own copy of ``scanner``.
+    """
+    files = list(files)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    if workers == 1:
+        for path in files:
+            yield scanner.scan(path)
+        return
+    chunksize = max(1, min(MAX_CHUNK, len(files) // (workers * 4)))
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        workers, mp_context=ctx, initializer=_init_worker, initargs=(scanner,)
+    ) as pool:
+        yield from pool.map(_scan, files, chunksize=chunksize)
@@ -0,0 +1,613 @@
+"""Warm worker service with a local HTTP/JSON job API.
+
+``Service`` keeps a pool of worker processes alive between jobs. Each worker
+imports PyMuPDF (and Spire.PDF when installed) once, loads the Base-14 fonts,
+reads the configured replacement images, and keeps a template session for
+its whole life. A small document therefore costs its processing time, not
+interpreter and library start-up. Requests are served by a ``ThreadingHTTPServer`` on localhost or on a Unix socket:
+
+``POST /jobs``
+    Job fields as in a job file (JSON); ``output_dir`` defaults to
+    ``<service output dir>/<job id>``. Answers 202 with the job id.
+``GET /jobs`` and ``GET /jobs/<id>``
+    Job status and per-file results.
+``DELETE /jobs/<id>``
+    Cancel: files not started are dropped, running files stop between pages.
+``GET /jobs/<id>/files/<index>``
+    Stream one output PDF back.
+``POST /documents``
+    Process the PDF in the request body with the job fields given as JSON
+    in the ``X-Job`` header and stream the result back in the response.
+``GET /metrics``
+    Prometheus text: queue depth, running files, job counts and the per-stage
+    totals of ``metrics.MetricsSink``.
+``GET /health``
+    Liveness check.
+
+At most ``max_queue`` files may wait for a worker; further submissions are
+refused with 503 so callers can back off. A job with more files than that
+could never be admitted and is refused with 413 instead. Jobs may only read files below
+the service's input roots and write below its output roots; other paths are
+refused with 400.
+"""
+
+import concurrent.futures
+import glob
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import signal
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .archive import split_member
+from .job import JobError, JobSpec, job_files
+from .pipeline import CancelFlag, share_shard_workers
+from .tasks import FileResult, output_path_for, process_document
+
+DEFAULT_PORT = 8765
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+# Finished jobs kept for status queries.
+MAX_FINISHED_JOBS = 1000
+_CHUNK = 64 * 1024
+
+
+class JobTooLarge(JobError):
+    """Raised for a job with more files than the service queue can ever hold."""
+
+
+def _within(path, roots):
+    path = os.path.realpath(path)
+    return any(os.path.commonpath([path, root]) == root for root in roots)
+
+
+def _glob_base(pattern):
+    """The leading part of a glob pattern without wildcards, e.g. ``/data/in`` for ``/data/in/*/x.pdf``."""
+    member = split_member(pattern)
+    if member is not None:
+        return member[0]
+    if not glob.has_magic(pattern):
+        return pattern
+    parts = []
+    for part in pattern.replace(os.sep, "/").split("/"):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return "/".join(parts) or "."
+
+
+# Per-process state of a service worker.
+_session = None
+
+
+def _warm(preload_images):
+    """Worker initializer: import engines and load fonts and images ahead of the first job."""
+    global _session
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import fitz  # PyMuPDF
+
+    from . import images, native_backend
+    from .session import TemplateSession
+
+    try:
+        import spire.pdf  # noqa: F401
+    except ImportError:
+        pass
+    for fonts in native_backend._BASE14.values():
+        for name in fonts:
+            fitz.Font(name)
+            native_backend.text_length(" ", name)
+    for path in preload_images:
+        try:
+            images.load_image(path)
+        except OSError:
+            pass
+    _session = TemplateSession()
+
+
+def _ping():
+    return os.getpid()
+
+
+def _process(index, input_path, output_path, operations, export, cancel_flag, pipeline_options, profiler, data):
+    """Run one file in a warm worker, with the worker's own template session."""
+    if "session" in pipeline_options:
+        pipeline_options = dict(pipeline_options, session=_session)
+    return process_document(
+        index, input_path, output_path, operations, export, None, cancel_flag, 1, pipeline_options, profiler,
+        data,
+    )
+
+
+class ServiceJob:
+    """One submitted job and the results of its files; ``data`` is the PDF of a one-document job."""
+
+    def __init__(self, job_id, spec, files, data=None):
+        self.id = job_id
+        self.spec = spec
+        self.data = data
+        self.files = files
+        self.status = "queued"
+        self.error = None
+        self.results = {}
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_flag = CancelFlag(os.path.join(spec.output_dir, f".redactedge-cancel-{job_id}"))
+        # Guards ``results``, which the job's thread fills while requests read it.
+        self.lock = threading.Lock()
+
+    def add_result(self, result):
+        with self.lock:
+            self.results[result.index] = result
+
+    def to_dict(self, details=True):
+        with self.lock:
+            results = dict(self.results)
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "total": len(self.files),
+            "done": len(results),
+            "failed": sum(1 for r in results.values() if not r.ok and not r.cancelled),
+            "output_dir": self.spec.output_dir,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if details:
+            data["files"] = [results[i].to_dict() for i in sorted(results)]
+        return data
+
+
+class Service:
+    """Warm process pool plus job bookkeeping; transport-independent.
+
+    ``workers`` processes run files; each is replaced after
+    ``max_tasks_per_child`` files (``None`` = never) to bound memory growth.
+    ``preload_images`` are read into every worker at start-up. Jobs may
+    read inputs and images only below ``input_roots`` (default: the current
+    directory) and write only below ``output_roots`` and ``output_dir``.
+    """
+
+    def __init__(self, output_dir, workers=None, max_queue=None, max_tasks_per_child=None,
+                 preload_images=(), log=None, input_roots=None, output_roots=()):
+        from .metrics import MetricsSink
+
+        self.output_dir = os.path.abspath(output_dir)
+        self.input_roots = [os.path.realpath(root) for root in (input_roots or [os.getcwd()])]
+        self.output_roots = [os.path.realpath(root) for root in [self.output_dir, *output_roots]]
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_queue = max_queue or self.workers * 16
+        self.max_tasks_per_child = max_tasks_per_child
+        self.preload_images = [os.path.abspath(path) for path in preload_images]
+        self.log = log or (lambda message: None)
+        self.metrics = MetricsSink()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.queued = 0
+        self.running = 0
+        self.pool = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.pool = self._new_pool()
+        # Start every worker now instead of on the first request.
+        futures = [self.pool.submit(_ping) for _ in range(self.workers)]
+        concurrent.futures.wait(futures)
+        self.log(f"{self.workers} warm worker(s) ready")
+
+    def _new_pool(self):
+        ctx = multiprocessing.get_context("spawn")
+        return concurrent.futures.ProcessPoolExecutor(
+            self.workers, mp_context=ctx, initializer=_warm, initargs=(self.preload_images,),
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+
+    def close(self):
+        for job in list(self.jobs.values()):
+            if job.status in ("queued", "running"):
+                job.cancel_flag.set()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def build_spec(self, data, job_id):
+        if not isinstance(data, dict):
+            raise JobError("The job must be a JSON object.")
+        spec = JobSpec.from_dict(data)
+        if not spec.output_dir:
+            spec.output_dir = os.path.join(self.output_dir, str(job_id))
+        spec.validate()
+        if spec.output_archive():
+            raise JobError("The service writes outputs to a directory, not an archive.")
+        self._check_paths(spec)
+        return spec
+
+    def _check_paths(self, spec):
+        """Refuse a job that reads outside ``input_roots`` or writes outside ``output_roots``."""
+        reads = [_glob_base(pattern) for pattern in spec.inputs] + spec.match_images
+        reads += [spec.replace_image] if spec.replace_image else []
+        writes = [spec.output_dir, spec.metrics_file, spec.prometheus_file, spec.profile_dir, spec.scratch_dir]
+        for path in reads:
+            if not _within(path, self.input_roots):
+                raise JobError(f"Not below an input root of the service: {path}")
+        for path in filter(None, writes):
+            if not _within(path, self.output_roots):
+                raise JobError(f"Not below an output root of the service: {path}")
+
+    def submit(self, data):
+        """Validate and queue a job; return it.
+
+        Raises ``JobError`` (``JobTooLarge`` for more files than ``max_queue``)
+        or ``OverflowError`` while the queue is too full to take the job.
+        """
+        job_id = next(self.ids)
+        spec = self.build_spec(data, job_id)
+        files = job_files(spec)
+        if not files:
+            raise JobError("No PDF files found.")
+        for path in files:
+            # Globs and symbolic links may still lead outside the roots.
+            member = split_member(path)
+            if not _within(member[0] if member else path, self.input_roots):
+                raise JobError(f"Not below an input root of the service: {path}")
+        job = self._admit(ServiceJob(job_id, spec, files))
+        threading.Thread(target=self._run_job, args=(job,), name=f"job-{job_id}", daemon=True).start()
+        return job
+
+    def _admit(self, job):
+        if len(job.files) > self.max_queue:
+            raise JobTooLarge(f"The job has {len(job.files)} files; the service accepts at most "
+                              f"{self.max_queue} per job. Split it into smaller jobs.")
+        with self.lock:
+            if self.queued + len(job.files) > self.max_queue:
+                raise OverflowError(f"Queue full ({self.queued} file(s) waiting, limit {self.max_queue})")
+            self.queued += len(job.files)
+            self.jobs[job.id] = job
+            finished = [j for j in self.jobs.values() if j.finished is not None]
+            for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[old.id]
+        return job
+
+    def _run_job(self, job):
+        spec = job.spec
+        job.status = "running"
+        job.started = time.time()
+        os.makedirs(spec.output_dir, exist_ok=True)
+        cache = spec.result_cache()
+        sink = spec.metrics_sink()
+        left = len(job.files)
+        try:
+            operations = spec.operations()
+            export = spec.export_options()
+            pipeline_options = share_shard_workers(spec.pipeline_options(), self.workers)
+            profiler = spec.profiler()
+            futures = {}
+            for index, path in enumerate(job.files):
+                output_path = output_path_for(path, spec.output_dir)
+                hit = cache.lookup(index, path, output_path) if cache is not None else None
+                if hit is not None:
+                    self._finish(job, hit, cache, sink)
+                    left -= 1
+                    continue
+                future = self._submit_file(
+                    index, path, output_path, operations, export, job.cancel_flag, pipeline_options, profiler,
+                    job.data,
+                )
+                futures[future] = (index, path, output_path)
+            for future in concurrent.futures.as_completed(futures):
+                index, path, output_path = futures[future]
+                try:
+                    result = future.result()
+                except concurrent.futures.CancelledError:
+                    result = FileResult(index, path, output_path)
+                    result.cancelled = True
+                    result.error = "Cancelled"
+                except concurrent.futures.process.BrokenProcessPool as e:
+                    result = FileResult(index, path, output_path)
+                    result.error = f"Worker process crashed: {e}"
+                    self._replace_pool()
+                self._finish(job, result, cache, sink)
+                left -= 1
+            if job.cancel_flag.is_set():
+                job.status = "cancelled"
+            else:
+                job.status = "done" if all(r.ok for r in job.results.values()) else "failed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            with self.lock:
+                self.queued -= left
+            job.cancel_flag.clear()
+            if cache is not None:
+                cache.close()
+            job.finished = time.time()
+            self.log(f"Job {job.id} {job.status}: {len(job.results)}/{len(job.files)} file(s)")
+
+    def _submit_file(self, *args):
+        def finished(future):
+            with self.lock:
+                self.running -= 1
+
+        with self.lock:
+            future = self.pool.submit(_process, *args)
+            self.running += 1
+        future.add_done_callback(finished)
+        return future
+
+    def _replace_pool(self):
+        with self.lock:
+            broken, self.pool = self.pool, self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _finish(self, job, result, cache, sink):
+        if result.ok and cache is not None and not result.cached:
+            try:
+                cache.record(result)
+            except Exception as e:
+                result.messages.append(f"Could not record {result.output_path} in the result cache: {e}")
+        self.metrics.record(result)
+        if sink is not None:
+            try:
+                sink.record(result)
+            except OSError as e:
+                result.messages.append(f"Could not write metrics: {e}")
+        job.add_result(result)
+        with self.lock:
+            self.queued -= 1
+
+    def cancel(self, job):
+        if job.status in ("queued", "running"):
+            job.cancel_flag.set()
+
+    def process_bytes(self, data, options):
+        """Process one PDF given as bytes; return its ``FileResult`` and the scratch directory of the output.
+
+        The input is opened from memory and never written to disk.
+        """
+        if not isinstance(options, dict):
+            raise JobError("The X-Job header must be a JSON object.")
+        scratch = tempfile.mkdtemp(prefix="redactedge-doc-", dir=self.output_dir)
+        options = dict(options, inputs=[], output_dir=scratch, use_cache=False)
+        options.pop("save_as_jpeg", None)
+        try:
+            job = self._admit(ServiceJob(next(self.ids), self.build_spec(options, 0), ["document.pdf"], data))
+        except Exception:
+            shutil.rmtree(scratch, ignore_errors=True)
+            raise
+        self._run_job(job)
+        with self.lock:
+            # Its output lives only as long as the request.
+            del self.jobs[job.id]
+        return job.results[0], scratch
+
+    def prometheus_text(self):
+        with self.lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+            lines = [
+                "# HELP redactedge_service_queue_depth Files accepted and not yet finished.",
+                "# TYPE redactedge_service_queue_depth gauge",
+                f"redactedge_service_queue_depth {self.queued}",
+                "# HELP redactedge_service_running Files submitted to the worker pool and not yet finished.",
+                "# TYPE redactedge_service_running gauge",
+                f"redactedge_service_running {self.running}",
+                "# HELP redactedge_service_workers Warm worker processes.",
+                "# TYPE redactedge_service_workers gauge",
+                f"redactedge_service_workers {self.workers}",
+                "# HELP redactedge_service_jobs Known jobs, by status.",
+                "# TYPE redactedge_service_jobs gauge",
+            ]
+            lines += [f'redactedge_service_jobs{{status="{k}"}} {v}' for k, v in counts.items()]
+        with self.metrics.lock:
+            return "\n".join(lines) + "\n" + self.metrics.prometheus_text()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Routes API requests to ``self.server.service``."""
+
+    server_version = "RedactEdge"
+    routes = (
+        ("GET", r"/health", "health"),
+        ("GET", r"/metrics", "metrics"),
+        ("GET", r"/jobs", "list_jobs"),
+        ("POST", r"/jobs", "create_job"),
+        ("GET", r"/jobs/(\d+)", "get_job"),
+        ("DELETE", r"/jobs/(\d+)", "delete_job"),
+        ("GET", r"/jobs/(\d+)/files/(\d+)", "get_file"),
+        ("POST", r"/documents", "process_document"),
+    )
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def address_string(self):
+        # Unix socket peers have no address.
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):
+        self.server.log(f"{self.address_string()} {format % args}")
+
+    def dispatch(self, method):
+        token = self.server.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            return self.send_json(401, {"error": "Missing or wrong bearer token"})
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                try:
+                    return getattr(self, name)(*match.groups())
+                except (BrokenPipeError, ConnectionResetError):
+                    return None
+                except Exception as e:
+                    return self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        self.send_json(404, {"error": f"No route for {method} {path}"})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_pdf(self, path, name):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, _CHUNK)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def find_job(self, job_id):
+        job = self.server.service.jobs.get(int(job_id))
+        if job is None:
+            self.send_json(404, {"error": f"No job {job_id}"})
+        return job
+
+    def health(self):
+        self.send_json(200, {"ok": True, "workers": self.server.service.workers})
+
+    def metrics(self):
+        body = self.server.service.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def list_jobs(self):
+        with self.server.service.lock:
+            jobs = list(self.server.service.jobs.values())
+        self.send_json(200, {"jobs": [job.to_dict(details=False) for job in jobs]})
+
+    def create_job(self):
+        try:
+            data = json.loads(self.read_body() or b"{}")
+            job = self.server.service.submit(data)
+        except JobTooLarge as e:
+            return self.send_json(413, {"error": str(e)})
+        except (ValueError, JobError, OSError) as e:
+            return self.send_json(400, {"error": str(e)})
+        except OverflowError as e:
+            return self.send_json(503, {"error": str(e)})
+        self.send_json(202, job.to_dict(details=False))
+
+    def get_job(self, job_id):
+        job = self.find_job(job_id)
+        if job is not None:
+            self.send_json(200, job.to_dict())
+
+    def delete_job(self, job_id):
+        job = self.find_job(job_id)
+        if job is not None:
+            self.server.service.cancel(job)
+            self.send_json(202, job.to_dict(details=False))
+
+    def get_file(self, job_id, index):
+        job = self.find_job(job_id)
+        if job is None:
+            return
+        result = job.results.get(int(index))
+        if result is None:
+            status = 404 if int(index) >= len(job.files) else 409
+            return self.send_json(status, {"error": f"File {index} of job {job_id} is not finished"})
+        if not result.ok:
+            return self.send_json(422, {"error": result.error})
+        self.send_pdf(result.output_path, os.path.basename(result.output_path))
+
+    def process_document(self):
+        try:
+            options = json.loads(self.headers.get("X-Job") or "{}")
+            data = self.read_body()
+            if not data.startswith(b"%PDF"):
+                raise JobError("The request body must be a PDF document.")
+            result, scratch = self.server.service.process_bytes(data, options)
+        except (ValueError, JobError) as e:
+            return self.send_json(400, {"error": str(e)})
+        except OverflowError as e:
+            return self.send_json(503, {"error": str(e)})
+        try:
+            if not result.ok:
+                return self.send_json(422, result.to_dict())
+            self.send_pdf(result.output_path, "document_modified.pdf")
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, token=None, log=None):
+        self.service = service
+        self.token = token
+        self.log = log or (lambda message: None)
+        super().__init__(address, Handler)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, service, token=None, log=None):
+        self.service = service
+        self.token = token
+        self.log = log or (lambda message: None)
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, Handler)
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None, token=None, log=None):
+    """HTTP server for ``service`` on ``host:port`` or, with ``socket_path``, a Unix socket."""
+    if socket_path:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not available on this platform")
+        return _UnixServer(socket_path, service, token, log)
+    return _Server((host, port), service, token, log)
+
+
+def serve(service, server):
+    """Run ``server`` until SIGINT or SIGTERM, then stop the workers."""
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        server.server_close()
+        service.close()
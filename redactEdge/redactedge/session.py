@@ -0,0 +1,108 @@
+"""Template sessions for batches of documents made from one template.
+
+Batches are often thousands of files made from one template: the same page
+geometry and the same layout, with only the body text changing. A
+``TemplateSession`` lives as long as a worker process. It fingerprints a
+document from its page count, the page boxes and rotation of every page,
+and the text layout of the pages an operation is about to work on: the
+position, font and size of every text line, without the text itself.
+Documents with the same fingerprint share a ``Template``, where operations
+keep what they resolved for the first one, such as the tables detected on
+each page. The layout behind a fingerprint is compared in full before a
+template is reused; a document that matches no known template takes the
+full path and starts a new one.
+"""
+
+import collections
+import hashlib
+
+# Bump when the fingerprint changes.
+FINGERPRINT_VERSION = 2
+MAX_TEMPLATES = 16
+# Decimals kept of line positions and font sizes (in points).
+PRECISION = 1
+
+
+def page_boxes(doc):
+    """(media box, crop box, rotation) of every page, read from the page dictionaries."""
+    boxes = []
+    for pno in range(doc.page_count):
+        xref = doc.page_xref(pno)
+        boxes.append((
+            doc.xref_get_key(xref, "MediaBox")[1], tuple(doc.page_cropbox(pno)),
+            doc.xref_get_key(xref, "Rotate")[1],
+        ))
+    return tuple(boxes)
+
+
+def text_layout(page):
+    """(origin, font, size, direction) of every text line on ``page``."""
+    lines = []
+    for block in page.get_text("dict", flags=0)["blocks"]:
+        for line in block.get("lines", ()):
+            if not line["spans"]:
+                continue
+            span = line["spans"][0]
+            x, y = span["origin"]
+            lines.append((
+                round(x, PRECISION), round(y, PRECISION), span["font"], round(span["size"], PRECISION),
+                line["wmode"], tuple(round(d, 3) for d in line["dir"]),
+            ))
+    return tuple(lines)
+
+
+def describe_layout(doc, pages):
+    """Everything a fingerprint covers, for the pages numbered in ``pages``."""
+    return (doc.page_count, page_boxes(doc), tuple((pno, text_layout(doc[pno])) for pno in pages))
+
+
+def fingerprint(layout):
+    return hashlib.sha1(f"{FINGERPRINT_VERSION}:{layout!r}".encode()).hexdigest()
+
+
+class Template:
+    """Values shared by every document with one layout."""
+
+    def __init__(self, fingerprint, layout):
+        self.fingerprint = fingerprint
+        self.layout = layout
+        self.values = {}
+        self.documents = 0
+
+    def get(self, key, compute):
+        """Return the value stored under ``key``, computing it on first use."""
+        if key not in self.values:
+            self.values[key] = compute()
+        return self.values[key]
+
+
+class TemplateSession:
+    """Recently seen templates of a worker process, least recently used first out."""
+
+    def __init__(self, max_templates=MAX_TEMPLATES):
+        self.max_templates = max_templates
+        self.templates = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Every worker process builds its own templates.
+        state = dict(self.__dict__)
+        state["templates"] = collections.OrderedDict()
+        return state
+
+    def bind(self, doc, pages):
+        """Return the ``Template`` of ``doc`` as seen on ``pages``, creating it for a new layout."""
+        layout = describe_layout(doc, pages)
+        key = fingerprint(layout)
+        template = self.templates.get(key)
+        if template is None or template.layout != layout:
+            self.misses += 1
+            template = self.templates[key] = Template(key, layout)
+            while len(self.templates) > self.max_templates:
+                self.templates.popitem(last=False)
+        else:
+            self.hits += 1
+        self.templates.move_to_end(key)
+        template.documents += 1
+        return template
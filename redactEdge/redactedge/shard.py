@@ -0,0 +1,191 @@
+"""Page-range sharding of one large document across worker processes.
+
+A document with ``shard_threshold`` pages or more is split into contiguous
+page ranges. Each worker opens the same source file read-only and runs the
+operations on its own range only (``PipelineContext.page_range``). It then
+keeps just those pages (``Document.select``) and saves them to a shard file
+next to the output. The shards are concatenated in page order with
+``insert_pdf``, and the merged file is saved with ``garbage=4``, so fonts and
+images that every shard copied are stored once again. Document-level
+structure that ``insert_pdf`` does not carry over is restored from the
+source: metadata, the outline, page labels and viewer settings. Links that
+point into another shard are recorded by the worker before it drops the
+other pages, and added again after the merge.
+
+Only operations whose effect on a page depends on that page alone can be
+sharded (``Operation.page_local``). Documents with catalog structures that
+refer to pages across the whole file (form fields, name trees such as
+embedded files or named destinations, a tagged-PDF structure tree, an open
+action) always run serially.
+"""
+
+import concurrent.futures
+import math
+import multiprocessing
+import os
+import time
+
+import fitz  # PyMuPDF
+
+from .archive import open_input
+from .memory import peak_rss
+from .pipeline import CancelFlag, PipelineContext
+
+# More shards than workers, so one slow range does not leave the others idle.
+SHARDS_PER_WORKER = 2
+# Catalog entries copied from the source document to the merged one.
+CATALOG_KEYS = ("PageMode", "PageLayout", "Lang", "ViewerPreferences")
+# Catalog entries that insert_pdf cannot rebuild; their documents run serially.
+SERIAL_CATALOG_KEYS = ("AcroForm", "Names", "Dests", "StructTreeRoot", "OpenAction")
+
+
+def shard_blocker(doc, operations):
+    """Return why ``doc`` cannot be sharded with ``operations``, or ``None``."""
+    serial = [op.name for op in operations if not op.page_local]
+    if serial:
+        return f"{', '.join(serial)} needs the whole document"
+    catalog = doc.pdf_catalog()
+    present = [key for key in SERIAL_CATALOG_KEYS if doc.xref_get_key(catalog, key)[0] != "null"]
+    if present:
+        return f"the document has {', '.join(present)}"
+    return None
+
+
+def page_ranges(page_count, shards):
+    """Split ``range(page_count)`` into at most ``shards`` contiguous ``(start, stop)`` ranges."""
+    size = max(1, math.ceil(page_count / max(1, shards)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def run_shard(input_path, shard_path, operations, start, stop, window, cancel_flag):
+    """Apply ``operations`` to pages ``start``..``stop - 1`` and save only those pages."""
+    messages = []
+    context = PipelineContext(messages.append, cancel_event=cancel_flag)
+    context.page_range = range(start, stop)
+    context.window = window
+    context.op_count = max(len(operations), 1)
+    with open_input(input_path) as doc:
+        for index, op in enumerate(operations):
+            context.op_index = index
+            started = time.perf_counter()
+            op.apply(doc, context)
+            context.timings[op.name] = time.perf_counter() - started
+        context.check_cancelled()
+        links = _outside_links(doc, context.page_range)
+        doc.select(list(context.page_range))
+        doc.save(shard_path, garbage=1)
+    return {
+        "links": links,
+        "results": context.results,
+        "messages": messages,
+        "timings": context.timings,
+        "save_options": context.save_options,
+        "peak_rss": peak_rss(),
+    }
+
+
+def _outside_links(doc, page_range):
+    """``(page number, link)`` for links of ``page_range`` that point to pages outside it."""
+    links = []
+    for pno in page_range:
+        for link in doc[pno].get_links():
+            target = link.get("page", -1)
+            if link["kind"] == fitz.LINK_GOTO and target >= 0 and target not in page_range:
+                links.append((pno, {
+                    "kind": fitz.LINK_GOTO, "page": target, "from": tuple(link["from"]),
+                    "to": tuple(link.get("to") or (0, 0)), "zoom": link.get("zoom", 0),
+                }))
+    return links
+
+
+def _restore_structure(source, merged):
+    merged.set_metadata({k: v for k, v in source.metadata.items() if k not in ("format", "encryption")})
+    xml = source.get_xml_metadata()
+    if xml:
+        merged.set_xml_metadata(xml)
+    toc = source.get_toc(simple=False)
+    if toc:
+        merged.set_toc(toc)
+    labels = source.get_page_labels()
+    if labels:
+        merged.set_page_labels(labels)
+    source_catalog, merged_catalog = source.pdf_catalog(), merged.pdf_catalog()
+    for key in CATALOG_KEYS:
+        kind, value = source.xref_get_key(source_catalog, key)
+        if kind == "string":
+            merged.xref_set_key(merged_catalog, key, fitz.get_pdf_str(value))
+        elif kind in ("name", "dict", "bool", "int"):
+            merged.xref_set_key(merged_catalog, key, value)
+
+
+def run_sharded(input_path, output_path, operations, page_count, workers, window, save_options, context,
+                compact=None):
+    """Process ``input_path`` in page-range shards and save the merged result to ``output_path``.
+
+    ``compact`` (a ``compact.Compactor``) runs on the merged document.
+    """
+    ranges = page_ranges(page_count, workers * SHARDS_PER_WORKER)
+    shard_paths = [f"{output_path}.shard{number}" for number in range(len(ranges))]
+    cancel_flag = CancelFlag(output_path + ".cancel")
+    cancel_flag.clear()
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with concurrent.futures.ProcessPoolExecutor(min(workers, len(ranges)), mp_context=ctx) as pool:
+            futures = [
+                pool.submit(run_shard, input_path, path, operations, start, stop, window, cancel_flag)
+                for path, (start, stop) in zip(shard_paths, ranges)
+            ]
+            pending = set(futures)
+            context.op_index, context.op_count = 0, 1
+            try:
+                while pending:
+                    done, pending = concurrent.futures.wait(pending, timeout=0.2)
+                    for future in done:
+                        if future.exception() is not None:
+                            raise future.exception()
+                    context.check_cancelled()
+                    context.report(len(futures) - len(pending), len(futures))
+            except BaseException:
+                cancel_flag.set()
+                for future in pending:
+                    future.cancel()
+                raise
+            shards = [future.result() for future in futures]
+
+        started = time.perf_counter()
+        context.check_cancelled()
+        for (start, stop), shard in zip(ranges, shards):
+            for message in shard["messages"]:
+                context.log(f"[pages {start + 1}-{stop}] {message}")
+            for name, value in shard["results"].items():
+                context.results[name] = context.results.get(name, 0) + value
+            for name, seconds in shard["timings"].items():
+                # Shards run side by side: the slowest one is what the caller waits for.
+                context.timings[name] = max(context.timings.get(name, 0.0), seconds)
+            context.save_options.update(shard["save_options"])
+        context.peak_rss = max([s["peak_rss"] or 0 for s in shards] + [peak_rss() or 0]) or None
+        with fitz.open() as merged, open_input(input_path) as source:
+            for path in shard_paths:
+                with fitz.open(path) as shard:
+                    merged.insert_pdf(shard)
+            _restore_structure(source, merged)
+            for shard in shards:
+                for pno, link in shard["links"]:
+                    link["from"], link["to"] = fitz.Rect(link["from"]), fitz.Point(link["to"])
+                    merged[pno].insert_link(link)
+            options = dict(save_options, **context.save_options)
+            options["garbage"] = 4
+            context.timings["merge"] = time.perf_counter() - started
+            if compact is not None:
+                started = time.perf_counter()
+                options = compact.run(merged, options, context)
+                context.timings["compact"] = time.perf_counter() - started
+            started = time.perf_counter()
+            merged.save(output_path, **options)
+        context.timings["save"] = time.perf_counter() - started
+        context.log(f"Processed {page_count} pages in {len(ranges)} shards on {min(workers, len(ranges))} worker(s)")
+    finally:
+        cancel_flag.clear()
+        for path in shard_paths:
+            if os.path.exists(path):
+                os.remove(path)
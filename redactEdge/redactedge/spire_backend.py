@@ -0,0 +1,49 @@
+"""In-memory bridge to Spire.PDF for the steps PyMuPDF cannot do itself."""
+
+from spire.pdf.common import *
+from spire.pdf import *
+
+import fitz  # PyMuPDF
+
+WATERMARK_HEIGHT = 25
+
+
+def hide_watermark(doc):
+    """Paint over the Spire evaluation banner on every page of a fitz doc."""
+    for page in doc:
+        rect = fitz.Rect(0, 0, page.rect.width, WATERMARK_HEIGHT)
+        page.draw_rect(rect, color=(1, 1, 1), fill=(1, 1, 1))
+
+
+def run_spire(doc, edit):
+    """Pass ``doc`` through Spire via byte buffers and return a new fitz doc.
+
+    ``edit`` receives the loaded ``PdfDocument``. Nothing touches the disk.
+    """
+    spire_doc = PdfDocument()
+    spire_doc.LoadFromStream(Stream(doc.tobytes()))
+    edit(spire_doc)
+    out = Stream()
+    spire_doc.SaveToStream(out, FileFormat.PDF)
+    spire_doc.Close()
+    new_doc = fitz.open("pdf", bytes(out.ToArray()))
+    hide_watermark(new_doc)
+    return new_doc
+
+
+def replace_text(spire_doc, pairs):
+    """Replace text using Spire.PDF (case-insensitive, all occurrences)."""
+    for find_text, replace_text in pairs:
+        for i in range(spire_doc.Pages.Count):
+            replacer = PdfTextReplacer(spire_doc.Pages[i])
+            replacer.ReplaceAllText(find_text, replace_text)
+
+
+def draw_text(spire_doc, text, position, page_num):
+    """Draw static Helvetica text at the top-left corner of ``position``."""
+    if page_num < spire_doc.Pages.Count:
+        page = spire_doc.Pages[page_num]
+        x1, y1, x2, y2 = position
+        font = PdfFont(PdfFontFamily.Helvetica, 12.0)
+        brush = PdfBrushes.get_Black()
+        page.Canvas.DrawString(text, font, brush, float(x1), float(y1))
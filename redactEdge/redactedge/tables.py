@@ -0,0 +1,162 @@
+"""Automatic table detection for Delete Table Area.
+
+``TableDetector`` runs ``page.find_tables()`` and keeps the tables that pass
+a ``TableFilter`` (header text, column and row counts). Detection is the
+slowest part of layout analysis, so results are stored in a SQLite cache
+keyed by a hash of the page's content streams, resource dictionary, geometry
+and detection strategy. A page that is unchanged between runs, or repeated
+across documents, is analysed only once. Several worker processes may share
+one cache file.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+
+# Bump when the stored table description changes.
+CACHE_VERSION = 1
+STRATEGIES = ("lines", "text")
+
+
+class TableFilter:
+    """Which detected tables to redact.
+
+    ``header`` is a list of case-insensitive substrings; a table matches if
+    any of them occurs in its header row. Column and row limits are
+    inclusive; ``None`` means no limit.
+    """
+
+    def __init__(self, header=(), min_columns=None, max_columns=None, min_rows=None):
+        self.header = [h.lower() for h in header if h]
+        self.min_columns = min_columns
+        self.max_columns = max_columns
+        self.min_rows = min_rows
+
+    def matches(self, table):
+        columns, rows = table["columns"], table["rows"]
+        if self.min_columns is not None and columns < self.min_columns:
+            return False
+        if self.max_columns is not None and columns > self.max_columns:
+            return False
+        if self.min_rows is not None and rows < self.min_rows:
+            return False
+        if self.header:
+            text = " ".join(table["header"]).lower()
+            return any(h in text for h in self.header)
+        return True
+
+
+def detect_tables(page, strategy="lines"):
+    """Return ``[{"bbox", "columns", "rows", "header"}, ...]`` for one page."""
+    tables = []
+    for table in page.find_tables(strategy=strategy).tables:
+        header = [re.sub(r"\s+", " ", name or "").strip() for name in table.header.names]
+        tables.append({
+            "bbox": list(table.bbox),
+            "columns": table.col_count,
+            "rows": table.row_count,
+            "header": header,
+        })
+    return tables
+
+
+def page_key(page, strategy):
+    """Hash of everything ``find_tables`` looks at on ``page``."""
+    doc = page.parent
+    digest = hashlib.sha1(f"{CACHE_VERSION}:{strategy}:{tuple(page.rect)}:{page.rotation}:".encode())
+    digest.update(page.read_contents())
+    resources = doc.xref_get_key(page.xref, "Resources")
+    digest.update(repr(resources).encode())
+    return digest.hexdigest()
+
+
+class TableCache:
+    """SQLite store of detected tables by ``page_key``; opened lazily."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+        self.pending = {}
+
+    def _connect(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, timeout=30)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS tables (key TEXT PRIMARY KEY, tables TEXT)")
+        return self.db
+
+    def get(self, key):
+        if key in self.pending:
+            return self.pending[key]
+        row = self._connect().execute("SELECT tables FROM tables WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, tables):
+        self.pending[key] = tables
+
+    def flush(self):
+        """Write the tables detected since the last flush in one transaction."""
+        if not self.pending:
+            return
+        db = self._connect()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO tables VALUES (?, ?)",
+                [(key, json.dumps(tables)) for key, tables in self.pending.items()],
+            )
+        self.pending = {}
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+class TableDetector:
+    """Finds the rectangles of the tables to redact on a page."""
+
+    def __init__(self, table_filter=None, strategy="lines", cache_path=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown table strategy {strategy!r}; choose from {', '.join(STRATEGIES)}")
+        self.filter = table_filter or TableFilter()
+        self.strategy = strategy
+        self.cache_path = cache_path
+        self.cache = None
+        self.hits = 0
+
+    def __getstate__(self):
+        # Sent to worker processes: the open cache stays behind.
+        state = dict(self.__dict__)
+        state["cache"] = None
+        return state
+
+    def detect(self, page):
+        """Return every table ``find_tables`` reports on ``page``, through the cache."""
+        if self.cache_path and self.cache is None:
+            self.cache = TableCache(self.cache_path)
+        if self.cache is None:
+            return detect_tables(page, self.strategy)
+        key = page_key(page, self.strategy)
+        tables = self.cache.get(key)
+        if tables is None:
+            tables = detect_tables(page, self.strategy)
+            self.cache.put(key, tables)
+        else:
+            self.hits += 1
+        return tables
+
+    def select(self, tables):
+        """Bounding boxes of the ``detect`` results that pass the filter."""
+        return [tuple(t["bbox"]) for t in tables if self.filter.matches(t)]
+
+    def find(self, page):
+        """Return the bounding boxes of the matching tables on ``page``."""
+        return self.select(self.detect(page))
+
+    def finish(self):
+        """Persist new detections; call once per document."""
+        if self.cache is not None:
+            self.cache.flush()
+            self.cache.close()
+            self.cache = None
@@ -0,0 +1,176 @@
+"""Picklable, GUI-free job functions.
+
+These are plain module-level functions so they can be shipped to worker
+processes. Errors are raised to the caller, except in ``process_document``
+which captures them in the returned ``FileResult``.
+"""
+
+import os
+import time
+
+from .export import export_pages
+from .operations import (
+    AddTextboxOperation,
+    DeleteImageOperation,
+    DeleteTextOperation,
+    ReplaceImageOperation,
+    ReplaceTextOperation,
+)
+from .pipeline import Cancelled, Pipeline, PipelineContext
+
+
+class FileResult:
+    """Outcome of processing one input file."""
+
+    def __init__(self, index, input_path, output_path=None):
+        self.index = index
+        self.input_path = input_path
+        self.output_path = output_path
+        self.ok = False
+        self.cancelled = False
+        self.error = None
+        self.messages = []
+        self.results = {}
+        self.pages = 0
+        self.elapsed = 0.0
+        self.peak_rss = None
+        self.cached = False
+        self.timings = {}
+        self.profile_path = None
+        self.bytes_saved = None
+
+    def to_dict(self):
+        """JSON-ready summary, as used in reports and the service API."""
+        return {
+            "index": self.index,
+            "input": self.input_path,
+            "output": self.output_path if self.ok else None,
+            "ok": self.ok,
+            "cancelled": self.cancelled,
+            "cached": self.cached,
+            "error": self.error,
+            "pages": self.pages,
+            "elapsed": round(self.elapsed, 3),
+            "peak_rss": self.peak_rss,
+            "bytes_saved": self.bytes_saved,
+            "results": self.results,
+            "messages": self.messages,
+        }
+
+    def __repr__(self):
+        state = "ok" if self.ok else f"error={self.error!r}"
+        return f"<FileResult #{self.index} {os.path.basename(self.input_path)} {state}>"
+
+
+def output_path_for(file_path, output_dir):
+    """Return the ``{name}_modified{ext}`` output path for ``file_path``.
+
+    A member of an archive keeps its folder inside the archive, under a
+    folder with the archive's full file name, so ``x.zip`` and ``x.tar``
+    do not share one: ``{output_dir}/{archive}/{folder}/``.
+    """
+    from .archive import split_member
+
+    member = split_member(file_path)
+    if member is not None:
+        archive, file_path = member
+        folder = os.path.dirname(file_path).lstrip("/").split("/")
+        output_dir = os.path.join(output_dir, os.path.basename(archive), *[p for p in folder if p not in ("", ".", "..")])
+    name, ext = os.path.splitext(os.path.basename(file_path))
+    return os.path.join(output_dir, f"{name}_modified{ext}")
+
+
+def run_operations(pdf_path, output_path, operations, log=None, progress=None, cancel_event=None,
+                   pipeline_options=None):
+    """Run ``operations`` over one file and return the pipeline context.
+
+    ``pdf_path`` may also be an archive member name or the PDF as bytes.
+    ``pipeline_options`` are extra keyword arguments for ``Pipeline``.
+    """
+    context = PipelineContext(log, progress, cancel_event)
+    return Pipeline(operations, **(pipeline_options or {})).run(pdf_path, output_path, context)
+
+
+def delete_text_in_pdf(pdf_path, output_path, delete_texts, log=None):
+    """Delete text using PyMuPDF redaction annotations."""
+    return run_operations(pdf_path, output_path, [DeleteTextOperation(delete_texts)], log)
+
+
+def replace_text_in_pdf(pdf_path, output_path, pairs, log=None, backend="native"):
+    """Replace text (case-insensitive, all occurrences) natively or with Spire.PDF."""
+    return run_operations(pdf_path, output_path, [ReplaceTextOperation(pairs, backend)], log)
+
+
+def replace_images_in_pdf(pdf_path, output_path, replacement_image_path, image_index=None, log=None):
+    """Replace images using PyMuPDF."""
+    operation = ReplaceImageOperation(replacement_image_path, image_index)
+    return run_operations(pdf_path, output_path, [operation], log)
+
+
+def delete_images_in_pdf(pdf_path, output_path, image_index=None, log=None):
+    """Delete images using PyMuPDF."""
+    return run_operations(pdf_path, output_path, [DeleteImageOperation(image_index)], log)
+
+
+def add_textbox_to_pdf(pdf_path, output_path, text, position, page_num, log=None, backend="native"):
+    """Add static text to a PDF natively or with Spire.PDF."""
+    operation = AddTextboxOperation(text, position, page_num, backend)
+    return run_operations(pdf_path, output_path, [operation], log)
+
+
+def export_result(result, export, workers=1):
+    """Export page images of ``result.output_path``; outcome goes to its messages."""
+    output_path = result.output_path
+    try:
+        rendered, skipped = export_pages(output_path, os.path.dirname(output_path), export, workers)
+        result.messages.append(
+            f"Saved {rendered} {export.format.upper()}(s) for {output_path}"
+            + (f" ({skipped} already up to date)" if skipped else "")
+        )
+    except Exception as e:
+        result.messages.append(f"Error saving page images for {output_path}: {e}")
+
+
+def process_document(index, input_path, output_path, operations, export=None,
+                     progress=None, cancel_event=None, export_workers=1, pipeline_options=None,
+                     profiler=None, data=None):
+    """Run the full pipeline (plus optional page image export) for one file.
+
+    With ``data`` (the PDF as bytes), ``input_path`` only names the document.
+    Never raises: failures are reported through ``FileResult.error``. A run
+    cancelled through ``cancel_event`` stops between pages and writes nothing.
+    """
+    result = FileResult(index, input_path, output_path)
+    started = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        run = lambda: run_operations(
+            input_path if data is None else data, output_path, operations, result.messages.append, progress,
+            cancel_event, pipeline_options,
+        )
+        if profiler is None:
+            context = run()
+        else:
+            context, result.profile_path = profiler.call(input_path, run)
+            if result.profile_path:
+                result.messages.append(f"Over the {profiler.budget:g}s budget, profile saved: {result.profile_path}")
+        result.results = context.results
+        result.peak_rss = context.peak_rss
+        result.timings = context.timings
+        result.bytes_saved = context.bytes_saved
+        saved = "appended incrementally" if context.incremental else "saved"
+        peak = f", peak memory {context.peak_rss / 2**20:.0f} MiB" if context.peak_rss else ""
+        result.messages.append(f"Processed file {saved}: {output_path}{peak}")
+        if export is not None:
+            export_started = time.perf_counter()
+            export_result(result, export, export_workers)
+            result.timings["export"] = time.perf_counter() - export_started
+        result.pages = context.pages
+        result.ok = True
+    except Cancelled:
+        result.cancelled = True
+        result.error = "Cancelled"
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed = time.perf_counter() - started
+    return result
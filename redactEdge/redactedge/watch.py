@@ -0,0 +1,334 @@
+"""Hot-folder service: process PDFs as soon as they are dropped into a folder.
+
+An asyncio loop watches the job's input directories (recursively) through
+inotify when available, and otherwise by polling. A new or changed ``*.pdf``
+becomes a candidate, and it is queued only after its size and mtime have
+stayed the same for ``settle`` seconds. Outputs mirror the folders below the
+watched directory, under a folder named after it when several are watched. That way files still being copied
+are never picked up. The queue is bounded: when the workers fall behind,
+intake pauses until a slot frees up. Files are processed in a pool of worker
+processes. Each output is written atomically (``.part`` + rename) and is
+followed by an atomic JSON sidecar report, ``{name}_modified.report.json``.
+With the job's result cache, files that were already processed are not
+redone after a restart. Cache lookups hash the whole file, so they run on a
+thread of their own, never on the event loop.
+"""
+
+import asyncio
+import concurrent.futures
+import ctypes
+import ctypes.util
+import json
+import multiprocessing
+import os
+import signal
+import struct
+import time
+
+from .pipeline import share_shard_workers
+from .tasks import FileResult, output_path_for, process_document
+
+DEFAULT_SETTLE = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_EVENT = struct.Struct("iIII")
+
+
+def _ignore_sigint():
+    # Ctrl+C reaches the whole process group; only the service loop handles it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def is_candidate(path):
+    name = os.path.basename(path)
+    return name.lower().endswith(".pdf") and not name.startswith(".")
+
+
+def report_path_for(output_path):
+    return os.path.splitext(output_path)[0] + ".report.json"
+
+
+def write_report(result):
+    """Atomically write the sidecar JSON report of a ``FileResult``."""
+    report = dict(result.to_dict(), finished_at=time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+    path = report_path_for(result.output_path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + ".part", path)
+    return path
+
+
+class Inotify:
+    """Minimal recursive inotify wrapper through ``ctypes`` (Linux only)."""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+
+    def add_tree(self, root):
+        for path, _, _ in os.walk(root):
+            self.add(path)
+
+    def add(self, path):
+        wd = self._add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.dirs[wd] = path
+
+    def read(self):
+        """Return ``(path, is_dir)`` for the pending events; ``(None, False)`` on queue overflow."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, False))
+            elif wd in self.dirs and name:
+                events.append((os.path.join(self.dirs[wd], os.fsdecode(name)), bool(mask & IN_ISDIR)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class HotFolder:
+    """Watches ``spec.inputs`` (directories) and processes PDFs dropped into them.
+
+    ``workers`` files are processed at a time. At most ``queue_size`` settled
+    files wait for a worker. Set ``use_inotify=False`` to force polling, for
+    example on network shares where inotify sees no remote writes.
+    """
+
+    def __init__(self, spec, settle=DEFAULT_SETTLE, poll_interval=DEFAULT_POLL_INTERVAL,
+                 queue_size=None, use_inotify=True, log=None):
+        self.spec = spec
+        self.roots = [os.path.abspath(path) for path in spec.inputs]
+        # Output folder of each root: the output directory itself, or one per root when there are several.
+        self.root_dirs = {}
+        names = set()
+        for number, root in enumerate(self.roots):
+            name = os.path.basename(root.rstrip(os.sep)) or f"root{number}"
+            if name in names:
+                name = f"{name}_{number}"
+            names.add(name)
+            self.root_dirs[root] = spec.output_dir if len(self.roots) == 1 else os.path.join(spec.output_dir, name)
+        self.output_root = os.path.join(os.path.abspath(spec.output_dir), "")
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.workers = max(1, spec.workers or os.cpu_count() or 1)
+        self.queue_size = queue_size or self.workers * 2
+        self.use_inotify = use_inotify
+        self.log = log or (lambda message: None)
+        self.operations = spec.operations()
+        self.export = spec.export_options()
+        self.pipeline_options = share_shard_workers(spec.pipeline_options(), self.workers)
+        # Arguments are sent with every file here, so a template session would start empty each time.
+        self.pipeline_options.pop("session", None)
+        self.cache = spec.result_cache()
+        self.cache_thread = None
+        self.profiler = spec.profiler()
+        self.metrics = spec.metrics_sink()
+        self.pending = {}
+        self.queued = set()
+        self.done = {}
+        self.count = 0
+        self.pool = None
+
+    def output_path(self, path):
+        """Output of ``path``: its place below the watched root, mirrored into the output directory."""
+        roots = [root for root in self.roots if os.path.commonpath([path, root]) == root]
+        root = max(roots, key=len)
+        folder = os.path.dirname(os.path.relpath(path, root))
+        return output_path_for(path, os.path.join(self.root_dirs[root], folder))
+
+    def _stat(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def notice(self, path):
+        """Register a new or changed file; it is queued once it has settled."""
+        path = os.path.abspath(path)
+        if not is_candidate(path) or path.startswith(self.output_root) or path in self.queued:
+            return
+        stat = self._stat(path)
+        if stat is None or self.done.get(path) == stat:
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[0] != stat:
+            self.pending[path] = (stat, time.monotonic())
+
+    def scan(self):
+        for root in self.roots:
+            for directory, _, names in os.walk(root):
+                for name in names:
+                    self.notice(os.path.join(directory, name))
+
+    async def serve(self):
+        """Run until SIGINT or SIGTERM, then finish the files being processed."""
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await self.run(stop)
+
+    async def run(self, stop=None):
+        """Serve until ``stop`` (an ``asyncio.Event``) is set or the task is cancelled."""
+        loop = asyncio.get_running_loop()
+        stop = stop or asyncio.Event()
+        os.makedirs(self.spec.output_dir, exist_ok=True)
+        queue = asyncio.Queue(self.queue_size)
+        self.pool = self._new_pool()
+        # One thread for every cache call: the SQLite connection belongs to the thread that opened it.
+        self.cache_thread = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="cache")
+        inotify = self._start_inotify(loop)
+        self.scan()
+        tasks = [loop.create_task(self._settle_loop(queue, inotify is None))]
+        tasks += [loop.create_task(self._worker(queue)) for _ in range(self.workers)]
+        self.log(f"Watching {', '.join(self.roots)} ({'inotify' if inotify else 'polling'}), "
+                 f"{self.workers} worker(s), output in {self.spec.output_dir}")
+        try:
+            await stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if inotify is not None:
+                loop.remove_reader(inotify.fd)
+                inotify.close()
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            if self.cache is not None:
+                self.cache_thread.submit(self.cache.close)
+            self.cache_thread.shutdown(wait=True)
+
+    def _start_inotify(self, loop):
+        if not self.use_inotify:
+            return None
+        try:
+            inotify = Inotify()
+            for root in self.roots:
+                inotify.add_tree(root)
+        except (OSError, AttributeError) as e:
+            self.log(f"inotify unavailable ({e}); polling every {self.poll_interval}s")
+            return None
+
+        def on_events():
+            for path, is_dir in inotify.read():
+                if path is None:
+                    self.scan()
+                elif is_dir:
+                    try:
+                        inotify.add_tree(path)
+                    except OSError:
+                        pass
+                    for directory, _, names in os.walk(path):
+                        for name in names:
+                            self.notice(os.path.join(directory, name))
+                else:
+                    self.notice(path)
+
+        loop.add_reader(inotify.fd, on_events)
+        return inotify
+
+    async def _settle_loop(self, queue, polling):
+        interval = min(self.poll_interval, self.settle / 4) if polling else self.settle / 4
+        last_scan = 0.0
+        while True:
+            if polling and time.monotonic() - last_scan >= self.poll_interval:
+                self.scan()
+                last_scan = time.monotonic()
+            now = time.monotonic()
+            for path, (stat, since) in list(self.pending.items()):
+                current = self._stat(path)
+                if current is None:
+                    del self.pending[path]
+                elif current != stat:
+                    self.pending[path] = (current, now)
+                elif now - since >= self.settle:
+                    del self.pending[path]
+                    self.queued.add(path)
+                    # Blocks while the queue is full, which pauses intake.
+                    await queue.put((path, stat))
+            await asyncio.sleep(interval)
+
+    def _new_pool(self):
+        ctx = multiprocessing.get_context("spawn")
+        return concurrent.futures.ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_ignore_sigint)
+
+    async def _worker(self, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            path, stat = await queue.get()
+            index = self.count
+            self.count += 1
+            output_path = self.output_path(path)
+            try:
+                result = await self._process(loop, index, path, output_path)
+            except Exception as e:
+                # Anything unexpected (a locked cache, an unpicklable job) fails this file only.
+                result = FileResult(index, path, output_path)
+                result.error = f"{type(e).__name__}: {e}"
+            finally:
+                self.queued.discard(path)
+                queue.task_done()
+            self.done[path] = stat
+            try:
+                write_report(result)
+                if self.metrics is not None:
+                    self.metrics.record(result)
+            except OSError as e:
+                self.log(f"Could not write report or metrics for {path}: {e}")
+            for message in result.messages:
+                self.log(message)
+            if not result.ok:
+                self.log(f"Error processing {path}: {result.error}")
+
+    async def _process(self, loop, index, path, output_path):
+        if self.cache is not None:
+            cached = await loop.run_in_executor(self.cache_thread, self.cache.lookup, index, path, output_path)
+            if cached is not None:
+                return cached
+        pool = self.pool
+        try:
+            result = await loop.run_in_executor(
+                pool, process_document, index, path, output_path, self.operations, self.export,
+                None, None, 1, self.pipeline_options, self.profiler,
+            )
+        except concurrent.futures.process.BrokenProcessPool as e:
+            result = FileResult(index, path, output_path)
+            result.error = f"Worker process crashed: {e}"
+            # A broken pool refuses new work; replace it once for the next files.
+            if pool is self.pool:
+                pool.shutdown(wait=False)
+                self.pool = self._new_pool()
+        if result.ok and self.cache is not None:
+            try:
+                await loop.run_in_executor(self.cache_thread, self.cache.record, result)
+            except Exception as e:
+                result.messages.append(f"Could not record {output_path} in the result cache: {e}")
+        return result
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Write a PDF with one page per string in ``pages`` and return its path."""
+    import fitz  # PyMuPDF
+
+    def make(name, pages):
+        doc = fitz.open()
+        for text in pages:
+            doc.new_page().insert_text((72, 72), text)
+        path = str(tmp_path / name)
+        doc.save(path)
+        doc.close()
+        return path
+
+    return make
@@ -0,0 +1,67 @@
+import os
+import tarfile
+import zipfile
+
+import fitz  # PyMuPDF
+
+from redactedge import BatchExecutor, DeleteTextOperation
+from redactedge.archive import input_stat, list_members, member_ref, open_input, split_member
+from redactedge.job import expand_inputs
+
+
+def pdf_bytes(text):
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), text)
+        return doc.tobytes()
+
+
+def make_zip(path, members, compression=zipfile.ZIP_STORED):
+    with zipfile.ZipFile(path, "w", compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return path
+
+
+def test_members_are_listed_and_opened_in_place(tmp_path):
+    path = make_zip(str(tmp_path / "in.zip"), {
+        "a.pdf": pdf_bytes("first"), "docs/b.pdf": pdf_bytes("second"), "notes.txt": b"x",
+        "__MACOSX/docs/._b.pdf": b"x",
+    })
+    names = list_members(path)
+    assert names == [member_ref(path, "a.pdf"), member_ref(path, "docs/b.pdf")]
+    assert split_member(names[1]) == (path, "docs/b.pdf")
+    assert split_member(str(tmp_path / "plain.pdf")) is None
+    with open_input(names[1]) as doc:
+        assert "second" in doc[0].get_text()
+    assert input_stat(names[0]) == (len(pdf_bytes("first")), os.stat(path).st_mtime_ns)
+    assert expand_inputs([str(tmp_path / "*.zip")]) == names
+    assert not os.path.exists(tmp_path / "a.pdf")
+
+
+def test_compressed_zip_and_tar_members(tmp_path):
+    deflated = make_zip(str(tmp_path / "in.zip"), {"a.pdf": pdf_bytes("deflated")}, zipfile.ZIP_DEFLATED)
+    source = tmp_path / "b.pdf"
+    source.write_bytes(pdf_bytes("gzipped"))
+    with tarfile.open(tmp_path / "in.tar.gz", "w:gz") as archive:
+        archive.add(source, "folder/b.pdf")
+    zip_member, = list_members(deflated)
+    tar_member, = list_members(str(tmp_path / "in.tar.gz"))
+    with open_input(zip_member) as doc:
+        assert "deflated" in doc[0].get_text()
+    with open_input(tar_member) as doc:
+        assert "gzipped" in doc[0].get_text()
+
+
+def test_batch_from_one_archive_into_another(tmp_path):
+    path = make_zip(str(tmp_path / "in.zip"), {"a.pdf": pdf_bytes("a secret"), "docs/b.pdf": pdf_bytes("b secret")})
+    output = str(tmp_path / "out.tar")
+    executor = BatchExecutor([DeleteTextOperation(["secret"])], workers=1, scratch_dir=str(tmp_path / "scratch"))
+    results = list(executor.run(list_members(path), output))
+    assert all(r.ok for r in results)
+    assert [r.output_path for r in results] == [
+        member_ref(output, "in.zip/a_modified.pdf"), member_ref(output, "in.zip/docs/b_modified.pdf"),
+    ]
+    with open_input(results[1].output_path) as doc:
+        assert doc[0].get_text().strip() == "b"
+    assert not os.path.exists(output + ".part")
+    assert os.listdir(tmp_path / "scratch") == []
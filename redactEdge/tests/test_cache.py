@@ -0,0 +1,89 @@
+import os
+import shutil
+
+from redactedge import BatchExecutor, DeleteTextOperation
+from redactedge import executor as executor_module
+from redactedge.cache import ResultCache
+from redactedge.tasks import process_document
+
+
+def process(path, output_path, cache):
+    result = process_document(0, path, output_path, [DeleteTextOperation(["secret"])])
+    assert result.ok
+    cache.record(result)
+    return result
+
+
+def test_lookup_hits_only_after_a_record(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["secret"])
+    output_path = str(tmp_path / "out" / "a.pdf")
+    os.makedirs(tmp_path / "out")
+    cache = ResultCache(str(tmp_path / "out"), "job")
+    assert cache.lookup(0, path, output_path) is None
+    process(path, output_path, cache)
+    hit = cache.lookup(3, path, output_path)
+    assert hit.ok and hit.cached and hit.index == 3 and hit.pages == 1
+    assert "kept existing output" in hit.messages[0]
+    cache.close()
+
+
+def test_same_content_under_another_name_is_linked(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["secret"])
+    copy = str(tmp_path / "copy.pdf")
+    shutil.copy(path, copy)
+    os.makedirs(tmp_path / "out")
+    cache = ResultCache(str(tmp_path / "out"), "job")
+    first = process(path, str(tmp_path / "out" / "a.pdf"), cache)
+    target = str(tmp_path / "out" / "copy.pdf")
+    hit = cache.lookup(0, copy, target)
+    assert hit.cached and "linked cached output" in hit.messages[0]
+    assert os.path.samefile(target, first.output_path) or open(target, "rb").read() == open(
+        first.output_path, "rb").read()
+    # The linked copy is recorded in its own right.
+    os.remove(first.output_path)
+    assert cache.lookup(0, copy, target).cached
+    cache.close()
+
+
+def test_other_job_or_changed_input_or_output_misses(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["secret"])
+    output_path = str(tmp_path / "out" / "a.pdf")
+    os.makedirs(tmp_path / "out")
+    cache = ResultCache(str(tmp_path / "out"), "job")
+    process(path, output_path, cache)
+    cache.close()
+    assert ResultCache(str(tmp_path / "out"), "other job").lookup(0, path, output_path) is None
+    with open(output_path, "ab") as f:
+        f.write(b"\n")
+    assert cache.lookup(0, path, output_path) is None
+    process(path, output_path, cache)
+    make_pdf("a.pdf", ["secret, edited"])
+    assert cache.lookup(0, path, output_path) is None
+    cache.close()
+
+
+def test_lookups_stream_with_processing(tmp_path, make_pdf, monkeypatch):
+    files = [make_pdf(f"f{i}.pdf", [f"secret {i}"]) for i in range(3)]
+    output_dir = str(tmp_path / "out")
+    executor = BatchExecutor([DeleteTextOperation(["secret"])], workers=1,
+                             cache=ResultCache(output_dir, "job"))
+    list(executor.run(files[:2], output_dir))
+    events = []
+    real_lookup, real_process = ResultCache.lookup, executor_module.process_document
+    monkeypatch.setattr(ResultCache, "lookup",
+                        lambda self, index, *args: events.append(("lookup", index)) or real_lookup(self, index, *args))
+    monkeypatch.setattr(executor_module, "process_document",
+                        lambda index, *args, **kwargs: events.append(("process", index)) or real_process(
+                            index, *args, **kwargs))
+    results = list(executor.run([files[2], files[0], files[1]], output_dir))
+    assert [(r.index, r.cached) for r in results] == [(0, False), (1, True), (2, True)]
+    assert events == [("lookup", 0), ("process", 0), ("lookup", 1), ("lookup", 2)]
+
+
+def test_worker_processes_use_the_cache(tmp_path, make_pdf):
+    files = [make_pdf(f"f{i}.pdf", [f"secret {i}"]) for i in range(3)]
+    output_dir = str(tmp_path / "out")
+    executor = BatchExecutor([DeleteTextOperation(["secret"])], workers=2, cache=ResultCache(output_dir, "job"))
+    assert [r.cached for r in executor.run(files[:2], output_dir)] == [False, False]
+    results = list(executor.run(files, output_dir))
+    assert [(r.index, r.ok, r.cached) for r in results] == [(0, True, True), (1, True, True), (2, True, False)]
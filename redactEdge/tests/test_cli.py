@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_building_the_parser_does_not_import_pymupdf():
+    code = (
+        "import sys\n"
+        "from redactedge import cli\n"
+        "for command in ('--help', 'run --help', 'watch --help', 'serve --help', 'scan --help', 'verify --help'):\n"
+        "    try:\n"
+        "        cli.main(command.split())\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        "print(sorted(name for name in ('fitz', 'pymupdf') if name in sys.modules))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,54 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+from redactedge.compact import Compactor
+from redactedge.operations import DeleteTextOperation
+from redactedge.pipeline import Pipeline
+
+
+@pytest.fixture
+def bloated_pdf(tmp_path):
+    """Twenty pages of text saved without compression."""
+    doc = fitz.open()
+    for number in range(20):
+        doc.new_page().insert_text((72, 72), f"secret page {number}")
+    path = str(tmp_path / "in.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_bytes_saved_compares_output_with_input_without_a_shadow_save(tmp_path, bloated_pdf, monkeypatch):
+    monkeypatch.setattr(fitz.Document, "tobytes", lambda *args, **kwargs: pytest.fail("document serialized twice"))
+    output = str(tmp_path / "out.pdf")
+    context = Pipeline([DeleteTextOperation(["secret"])], compact=Compactor()).run(bloated_pdf, output)
+    assert context.size_before_compact is None
+    assert context.bytes_saved == os.path.getsize(bloated_pdf) - os.path.getsize(output) > 0
+    with fitz.open(output) as doc:
+        assert len(doc) == 20
+        assert "secret" not in doc[3].get_text()
+
+
+def test_measure_counts_only_the_stage(tmp_path, bloated_pdf):
+    output = str(tmp_path / "out.pdf")
+    context = Pipeline([DeleteTextOperation(["secret"])], compact=Compactor(measure=True)).run(bloated_pdf, output)
+    assert context.bytes_saved == context.size_before_compact - os.path.getsize(output)
+    # The redactions made the document smaller before the stage ran.
+    assert context.size_before_compact < os.path.getsize(bloated_pdf)
+
+
+def test_save_options_pack_and_deflate():
+    options = Compactor(garbage=3).save_options({"garbage": 1, "deflate": False})
+    assert options["garbage"] == 3
+    assert options["deflate"] and options["use_objstms"] == 1
+    assert "use_objstms" not in Compactor(object_streams=False).save_options({})
+
+
+def test_unknown_and_invalid_options_are_rejected():
+    with pytest.raises(ValueError, match="Unknown compact option"):
+        Compactor.from_dict({"dpi": 150})
+    with pytest.raises(ValueError):
+        Compactor(image_quality=0)
+    assert Compactor.from_dict({"image_dpi": "150", "measure": True}).image_dpi == 150
@@ -0,0 +1,74 @@
+import os
+
+import fitz  # PyMuPDF
+
+from redactedge import BatchExecutor, DeleteTextOperation, Operation
+from redactedge.executor import make_chunks
+
+
+class CrashOperation(Operation):
+    """Takes its worker process down on files with "crash" in their name."""
+
+    name = "crash"
+
+    def apply(self, doc, context):
+        if "crash" in os.path.basename(doc.name):
+            os._exit(3)
+
+
+class PageOperation(Operation):
+    """Visits every page, so a run can be cancelled between pages."""
+
+    name = "pages"
+    removes_content = False
+
+    def apply(self, doc, context):
+        for _ in context.iter_pages(doc):
+            pass
+
+
+def test_make_chunks_keeps_order_and_isolates_large_files():
+    chunks = make_chunks(list("abcde"), [1, 1, 100, 1, 1], 2)
+    assert [item for chunk in chunks for item in chunk] == list("abcde")
+    assert ["c"] in chunks
+
+
+def test_batch_results_in_input_order(tmp_path, make_pdf):
+    files = [make_pdf(f"f{i}.pdf", [f"secret {i}"]) for i in range(4)]
+    executor = BatchExecutor([DeleteTextOperation(["secret"])], workers=2)
+    results = list(executor.run(files, str(tmp_path / "out")))
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert all(r.ok for r in results)
+    with fitz.open(results[0].output_path) as doc:
+        assert "secret" not in doc[0].get_text()
+
+
+def test_worker_crash_fails_only_its_own_file(tmp_path, make_pdf):
+    files = [make_pdf("a.pdf", ["a"]), make_pdf("crash.pdf", ["b"]), make_pdf("c.pdf", ["c"]),
+             make_pdf("d.pdf", ["d"])]
+    executor = BatchExecutor([CrashOperation()], workers=2)
+    results = list(executor.run(files, str(tmp_path / "out")))
+    assert [r.input_path for r in results] == files
+    assert [r.ok for r in results] == [True, False, True, True]
+    assert "crashed" in results[1].error
+    assert all(os.path.exists(r.output_path) for r in results if r.ok)
+
+
+def test_cancel_stops_the_running_file_and_skips_the_rest(tmp_path, make_pdf):
+    files = [make_pdf(f"f{i}.pdf", ["x"] * 20) for i in range(3)]
+    executor = BatchExecutor([PageOperation()], workers=1,
+                             on_progress=lambda index, fraction: executor.cancel())
+    results = list(executor.run(files, str(tmp_path / "out")))
+    assert executor.cancelled
+    assert [(r.index, r.cancelled) for r in results] == [(0, True)]
+    assert not os.path.exists(results[0].output_path)
+
+
+def test_cancel_in_worker_processes(tmp_path, make_pdf):
+    files = [make_pdf(f"f{i}.pdf", ["x"] * 200) for i in range(6)]
+    executor = BatchExecutor([PageOperation()], workers=2,
+                             on_progress=lambda index, fraction: executor.cancel())
+    results = list(executor.run(files, str(tmp_path / "out")))
+    assert results
+    assert len(results) < len(files)
+    assert all(r.cancelled and not r.ok for r in results)
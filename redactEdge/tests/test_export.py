@@ -0,0 +1,49 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+from redactedge.export import ExportOptions, export_pages, page_path
+
+
+def images(folder):
+    return sorted(name for name in os.listdir(folder) if not name.startswith("."))
+
+
+def test_options_are_validated():
+    assert ExportOptions("JPG").extension == "jpg"
+    with pytest.raises(ValueError):
+        ExportOptions("gif")
+
+
+def test_second_export_skips_pages_already_on_disk(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["one", "two", "three"])
+    folder = str(tmp_path / "pages")
+    options = ExportOptions("png", dpi=36)
+    assert export_pages(path, folder, options) == (3, 0)
+    assert images(folder) == ["a_page_1.png", "a_page_2.png", "a_page_3.png"]
+    assert export_pages(path, folder, options) == (0, 3)
+    os.remove(page_path(path, folder, 1, options))
+    assert export_pages(path, folder, options) == (1, 2)
+
+
+def test_other_settings_or_content_render_again(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["one", "two"])
+    folder = str(tmp_path / "pages")
+    export_pages(path, folder, ExportOptions("png", dpi=36))
+    assert export_pages(path, folder, ExportOptions("png", dpi=72)) == (2, 0)
+    with fitz.open(page_path(path, folder, 0, ExportOptions("png"))) as image:
+        assert round(image[0].rect.width) == 595
+    make_pdf("a.pdf", ["one", "changed"])
+    assert export_pages(path, folder, ExportOptions("png", dpi=72)) == (2, 0)
+    assert export_pages(path, folder, ExportOptions("jpeg", dpi=72)) == (2, 0)
+    assert len(images(folder)) == 4
+
+
+def test_parallel_export_renders_every_page_once(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", [str(n) for n in range(5)])
+    folder = str(tmp_path / "pages")
+    options = ExportOptions("jpeg", dpi=36, quality=50)
+    assert export_pages(path, folder, options, workers=2) == (5, 0)
+    assert export_pages(path, folder, options, workers=2) == (0, 5)
+    assert not [name for name in os.listdir(folder) if name.endswith(".part")]
@@ -0,0 +1,103 @@
+import fitz  # PyMuPDF
+
+from redactedge import images
+from redactedge.images import ImageSelector, content_hash
+from redactedge.operations import DeleteImageOperation, ReplaceImageOperation
+from redactedge.pipeline import Pipeline
+
+
+def picture(size, pixel):
+    """PNG bytes of a ``size`` x ``size`` grey image whose pixel (x, y) is ``pixel(x, y, size)``."""
+    samples = bytes(pixel(x, y, size) for y in range(size) for x in range(size))
+    return fitz.Pixmap(fitz.csGRAY, size, size, samples, 0).tobytes("png")
+
+
+def logo(x, y, size):
+    return 0 if x < size // 2 else 255
+
+
+def stripes(x, y, size):
+    return 0 if (y * 8 // size) % 2 else 255
+
+
+def brochure(path):
+    """Three pages sharing one logo; the first page also has a striped photo."""
+    doc = fitz.open()
+    shared = None
+    for pno in range(3):
+        page = doc.new_page()
+        if shared is None:
+            page.insert_image(fitz.Rect(300, 300, 400, 400), stream=picture(32, stripes))
+            shared = page.insert_image(fitz.Rect(50, 50, 100, 100), stream=picture(64, logo))
+        else:
+            page.insert_image(fitz.Rect(50, 50, 100, 100), xref=shared)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def xrefs(doc):
+    return {pno: [img[0] for img in doc[pno].get_images(full=True)] for pno in range(len(doc))}
+
+
+def test_candidates_keep_the_per_page_position():
+    pages = [[(10,), (11,)], [(11,)], []]
+    assert ImageSelector().candidates(pages) == {10: 0, 11: 0}
+    assert ImageSelector(0).candidates(pages) == {10: 0, 11: 1}
+    assert ImageSelector(1).candidates(pages) == {11: 0}
+    assert ImageSelector(5).candidates(pages) == {}
+
+
+def test_select_by_content_hash_and_by_sample(tmp_path):
+    path = brochure(str(tmp_path / "a.pdf"))
+    sample = tmp_path / "logo.png"
+    sample.write_bytes(picture(48, logo))
+    with fitz.open(path) as doc:
+        photo, shared = sorted(set(xrefs(doc)[0]), key=lambda xref: doc.extract_image(xref)["width"])
+        assert ImageSelector().select(doc) == {photo: 0, shared: 0}
+        assert ImageSelector(hashes=[content_hash(doc, photo).upper()]).select(doc) == {photo: 0}
+        assert ImageSelector(sample_images=[str(sample)]).select(doc) == {shared: 0}
+
+
+def test_match_decisions_are_kept_per_content_hash(tmp_path, monkeypatch):
+    path = brochure(str(tmp_path / "a.pdf"))
+    sample = tmp_path / "logo.png"
+    sample.write_bytes(picture(64, logo))
+    selector = ImageSelector(sample_images=[str(sample)])
+    calls = []
+    real = images.perceptual_hash
+    monkeypatch.setattr(images, "perceptual_hash", lambda doc, xref: calls.append(xref) or real(doc, xref))
+    for _ in range(2):
+        with fitz.open(path) as doc:
+            assert len(selector.select(doc)) == 1
+    assert len(calls) == 2
+
+
+def test_shared_image_is_replaced_once_for_every_page(tmp_path):
+    path = brochure(str(tmp_path / "a.pdf"))
+    replacement = tmp_path / "new.png"
+    replacement.write_bytes(picture(16, stripes))
+    output = str(tmp_path / "out.pdf")
+    sample = tmp_path / "logo.png"
+    sample.write_bytes(picture(64, logo))
+    context = Pipeline([ReplaceImageOperation(str(replacement), sample_images=[str(sample)])]).run(path, output)
+    assert context.results["replace_image"] == 1
+    with fitz.open(output) as doc:
+        used = xrefs(doc)
+        assert used[1] == used[2] and used[1][0] in used[0]
+        assert doc.extract_image(used[1][0])["width"] == 16
+        assert sorted(doc.extract_image(xref)["width"] for xref in set(used[0])) == [16, 32]
+
+
+def test_delete_by_position(tmp_path):
+    path = brochure(str(tmp_path / "a.pdf"))
+    first, second = str(tmp_path / "first.pdf"), str(tmp_path / "second.pdf")
+    # Image 0 is the photo on page 1 and the logo on pages 2 and 3.
+    assert Pipeline([DeleteImageOperation(image_index=0)]).run(path, first).results["delete_image"] == 2
+    assert Pipeline([DeleteImageOperation(image_index=1)]).run(path, second).results["delete_image"] == 1
+    with fitz.open(first) as doc:
+        assert {doc.extract_image(xref)["width"] for xref in sum(xrefs(doc).values(), [])} == {1}
+    with fitz.open(second) as doc:
+        widths = [{doc.extract_image(xref)["width"] for xref in used} for used in xrefs(doc).values()]
+    # The logo is one xref, so it goes from every page.
+    assert widths == [{32, 1}, {1}, {1}]
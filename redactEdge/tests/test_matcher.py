@@ -0,0 +1,49 @@
+import fitz  # PyMuPDF
+
+from redactedge.matcher import PageText, TermMatcher
+
+
+def found(matcher, text):
+    return [text[start:end] for start, end in matcher.spans(text)]
+
+
+def test_terms_match_case_insensitively_by_default():
+    assert found(TermMatcher(["secret"]), "Secret, SECRET and secret") == ["Secret", "SECRET", "secret"]
+
+
+def test_case_sensitive():
+    assert found(TermMatcher(["Secret"], case_sensitive=True), "Secret secret") == ["Secret"]
+
+
+def test_whole_word():
+    matcher = TermMatcher(["cat"], whole_word=True)
+    assert found(matcher, "cat catalog bobcat cat.") == ["cat", "cat"]
+
+
+def test_longer_term_wins_over_its_prefix():
+    assert found(TermMatcher(["john", "john smith"]), "john smith and john") == ["john smith", "john"]
+
+
+def test_whitespace_in_a_term_matches_any_run_of_whitespace():
+    assert found(TermMatcher(["john smith"]), "john \n  smith") == ["john \n  smith"]
+
+
+def test_empty_terms_are_ignored():
+    matcher = TermMatcher(["", "  "])
+    assert matcher.regex is None
+    assert matcher.spans("anything") == []
+
+
+def test_matches_name_the_term_without_refolding_the_text():
+    matcher = TermMatcher(["straße", "ab", "abc"])
+    assert matcher.matches("STRASSE Straße abc ab") == [(8, 14, "straße"), (15, 18, "abc"), (19, 21, "ab")]
+
+
+def test_page_text_rects_cover_the_match():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "public secret public")
+    page_text = PageText.extract(page)
+    rects = TermMatcher(["secret"]).find(page_text)
+    assert len(rects) == 1
+    assert page.get_text("text", clip=rects[0]).strip() == "secret"
@@ -0,0 +1,52 @@
+import fitz  # PyMuPDF
+
+from redactedge.native_backend import MIN_FONT_SCALE, base14_font
+from redactedge.operations import ReplaceTextOperation
+from redactedge.pipeline import Pipeline, PipelineContext
+
+
+def spans(page):
+    return [span for block in page.get_text("dict")["blocks"] for line in block.get("lines", [])
+            for span in line["spans"]]
+
+
+def test_base14_font_follows_the_span_style():
+    assert base14_font({"font": "Helvetica", "flags": 0}) == "helv"
+    assert base14_font({"font": "Times-Bold", "flags": 0}) == "tibo"
+    assert base14_font({"font": "Arial", "flags": fitz.TEXT_FONT_ITALIC}) == "heit"
+    assert base14_font({"font": "CourierNew-BoldOblique", "flags": 0}) == "cobi"
+
+
+def test_every_pair_and_occurrence_is_replaced_in_one_pass(tmp_path):
+    path = str(tmp_path / "a.pdf")
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((72, 72), "Contact ACME today.")
+        page.insert_text((72, 120), "acme and Bob", fontname="tibo", fontsize=14, color=(1, 0, 0))
+        doc.new_page().insert_text((72, 72), "Nothing to change")
+        doc.save(path)
+    output = str(tmp_path / "out.pdf")
+    context = Pipeline([ReplaceTextOperation([("acme", "Initech"), ("Bob", ""), ("", "ignored")])]).run(
+        path, output, PipelineContext())
+    assert context.results["replace_text"] == 3
+    assert context.touched == {0}
+    with fitz.open(output) as doc:
+        text = doc[0].get_text()
+        assert "ACME" not in text and "acme" not in text and "Bob" not in text
+        assert text.count("Initech") == 2
+        styled = [span for span in spans(doc[0]) if span["text"] == "Initech"]
+        assert any(span["font"] == "Times-Bold" and 7 <= span["size"] <= 14 and span["color"] == 0xFF0000
+                   for span in styled)
+        assert doc[1].get_text().strip() == "Nothing to change"
+
+
+def test_longer_replacements_shrink_to_the_matched_width(tmp_path):
+    path = str(tmp_path / "a.pdf")
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), "ID: X1 end", fontsize=12)
+        doc.save(path)
+    output = str(tmp_path / "out.pdf")
+    Pipeline([ReplaceTextOperation([("X1", "a much longer identifier")])]).run(path, output)
+    with fitz.open(output) as doc:
+        span, = [span for span in spans(doc[0]) if "longer" in span["text"]]
+    assert 12 * MIN_FONT_SCALE - 0.01 <= span["size"] < 12
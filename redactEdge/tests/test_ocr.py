@@ -0,0 +1,73 @@
+import fitz  # PyMuPDF
+
+from redactedge import ocr
+from redactedge.matcher import PageText
+from redactedge.ocr import OcrCache, OcrEngine, is_scanned, page_hash
+from redactedge.operations import DeleteTextOperation
+from redactedge.pipeline import Pipeline, PipelineContext
+
+
+def scan_pdf(path, shade=128):
+    """A text page and a scanned page: one grey image and no text."""
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "typed page")
+    pix = fitz.Pixmap(fitz.csGRAY, 40, 40, bytes([shade]) * 1600, 0)
+    doc.new_page().insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pix)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def fake_ocr(calls):
+    """Stands in for Tesseract: every page reads "secret" across the top of the image."""
+
+    def recognize(pdf_bytes, language, dpi, tessdata):
+        calls.append(language)
+        boxes = [(72 + 20 * i, 72, 92 + 20 * i, 92) for i in range(6)] + [None]
+        return {"text": "secret\n", "boxes": boxes, "lines": [0] * 7}
+
+    return recognize
+
+
+def test_scanned_pages_have_images_but_no_text(tmp_path):
+    with fitz.open(scan_pdf(str(tmp_path / "a.pdf"))) as doc:
+        assert [is_scanned(page, PageText.extract(page)) for page in doc] == [False, True]
+
+
+def test_text_layers_are_cached_by_page_content(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr, "ocr_page", fake_ocr(calls))
+    # Tesseract is only looked for when a page is recognized.
+    monkeypatch.setattr(ocr, "find_tessdata", lambda tessdata: calls.append("tessdata"))
+    cache_dir = str(tmp_path / "ocr")
+    path = scan_pdf(str(tmp_path / "a.pdf"))
+
+    def run(source, name):
+        engine = OcrEngine(cache_dir=cache_dir)
+        messages = []
+        output = str(tmp_path / name)
+        Pipeline([DeleteTextOperation(["secret"], ocr=engine)]).run(source, output, PipelineContext(messages.append))
+        return engine.hits, messages
+
+    hits, messages = run(path, "first.pdf")
+    assert (hits, calls) == (0, ["tessdata", "eng"])
+    assert "OCR: 1 scanned page(s), 0 from cache" in messages
+    assert any("1 match(es)" in message for message in messages)
+    hits, messages = run(path, "second.pdf")
+    assert (hits, calls) == (1, ["tessdata", "eng"])
+    with fitz.open(path) as doc:
+        assert OcrCache(cache_dir).get(f"{page_hash(doc[1])}-eng-300")["text"] == "secret\n"
+    run(scan_pdf(str(tmp_path / "darker.pdf"), shade=40), "third.pdf")
+    assert calls == ["tessdata", "eng", "tessdata", "eng"]
+
+
+def test_matches_on_scanned_pages_blank_the_pixels(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr, "ocr_page", fake_ocr([]))
+    path = scan_pdf(str(tmp_path / "a.pdf"), shade=0)
+    output = str(tmp_path / "out.pdf")
+    Pipeline([DeleteTextOperation(["secret"], ocr=OcrEngine(tessdata="unused"))]).run(path, output)
+    with fitz.open(output) as doc:
+        pix = doc[1].get_pixmap(clip=fitz.Rect(80, 75, 180, 90))
+        assert set(pix.samples) == {255}
+        pix = doc[1].get_pixmap(clip=fitz.Rect(80, 150, 180, 200))
+        assert set(pix.samples) == {0}
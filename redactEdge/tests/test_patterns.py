@@ -0,0 +1,57 @@
+import pytest
+
+from redactedge.patterns import PatternMatcher, iban_valid, luhn_valid, split_terms
+
+
+@pytest.mark.parametrize("number", ["4111 1111 1111 1111", "5500-0000-0000-0004", "378282246310005"])
+def test_luhn_accepts_valid_card_numbers(number):
+    assert luhn_valid(number)
+
+
+@pytest.mark.parametrize("number", ["4111 1111 1111 1112", "1234567890123", "4111 1111"])
+def test_luhn_rejects_invalid_card_numbers(number):
+    assert not luhn_valid(number)
+
+
+@pytest.mark.parametrize("iban", ["DE89 3704 0044 0532 0130 00", "GB82WEST12345698765432", "fr1420041010050500013m02606"])
+def test_iban_accepts_valid_ibans(iban):
+    assert iban_valid(iban)
+
+
+@pytest.mark.parametrize("iban", ["DE89 3704 0044 0532 0130 01", "GB82WEST1234", "XX00 0000 0000 0000 0000 00"])
+def test_iban_rejects_invalid_ibans(iban):
+    assert not iban_valid(iban)
+
+
+def found(matcher, text):
+    return [text[start:end] for start, end in matcher.spans(text)]
+
+
+def test_credit_card_pattern_drops_numbers_failing_luhn():
+    text = "card 4111 1111 1111 1111, ref 4111 1111 1111 1112"
+    assert found(PatternMatcher(["credit_card"]), text) == ["4111 1111 1111 1111"]
+
+
+def test_iban_pattern_drops_bad_checksums():
+    text = "pay DE89 3704 0044 0532 0130 00 not DE89 3704 0044 0532 0130 01"
+    assert found(PatternMatcher(["iban"]), text) == ["DE89 3704 0044 0532 0130 00"]
+
+
+def test_ssn_and_email_patterns():
+    text = "SSN 123-45-6789, not 000-12-3456 or 1123-45-67890; mail jane.doe+x@example.co.uk"
+    assert found(PatternMatcher(["ssn"]), text) == ["123-45-6789"]
+    assert found(PatternMatcher(["email"]), text) == ["jane.doe+x@example.co.uk"]
+
+
+def test_user_regexes_run_with_named_patterns():
+    matcher = PatternMatcher(["ssn"], [r"ID-\d+"])
+    assert found(matcher, "ID-42 and 123-45-6789") == ["123-45-6789", "ID-42"]
+
+
+def test_unknown_pattern_is_rejected():
+    with pytest.raises(ValueError, match="Unknown pattern"):
+        PatternMatcher(["passport"])
+
+
+def test_split_terms_keeps_escaped_commas():
+    assert split_terms(r"ACME, Smith\, John ,, x") == ["ACME", "Smith, John", "x"]
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from redactedge.preview import TILE_SIZE, PreviewCache
+
+
+@pytest.fixture
+def cache(make_pdf):
+    cache = PreviewCache()
+    cache.open(make_pdf("doc.pdf", [f"page {number}" for number in range(4)]))
+    yield cache
+    cache.close()
+
+
+def test_tiles_are_cached_and_cover_the_page(cache):
+    rect = cache.page_rect(0)
+    columns, rows = cache.tile_grid(0, 2.0)
+    assert (columns, rows) == (-(-rect.width * 2 // TILE_SIZE), -(-rect.height * 2 // TILE_SIZE))
+    tile = cache.get_tile(0, 2.0, 0, 0)
+    assert (tile.width, tile.height) == (TILE_SIZE, TILE_SIZE)
+    assert cache.get_tile(0, 2.0, 0, 0) is tile
+    edge = cache.get_tile(0, 2.0, columns - 1, rows - 1)
+    assert edge.width == rect.width * 2 - (columns - 1) * TILE_SIZE
+
+
+def test_least_recently_used_tiles_are_evicted_first(cache):
+    first = cache.get_tile(0, 1.0, 0, 0)
+    cache.max_bytes = first.nbytes * 2
+    cache.get_tile(1, 1.0, 0, 0)
+    cache.get_tile(0, 1.0, 0, 0)
+    cache.get_tile(2, 1.0, 0, 0)
+    assert [key[1] for key in cache.entries] == [0, 2]
+    assert cache.used_bytes <= cache.max_bytes
+
+
+def test_cached_tiles_do_not_wait_for_a_render(cache):
+    cache.get_tile(0, 1.0, 0, 0)
+    got = []
+    with cache.render_lock:
+        # A render (e.g. a prefetch) is in progress: cached tiles are still served.
+        hit = threading.Thread(target=lambda: got.append(cache.get_tile(0, 1.0, 0, 0)))
+        miss = threading.Thread(target=lambda: got.append(cache.get_tile(3, 1.0, 0, 0)))
+        hit.start()
+        miss.start()
+        hit.join(timeout=5)
+        assert len(got) == 1
+        assert miss.is_alive()
+    miss.join(timeout=5)
+    assert len(got) == 2
+
+
+def test_neighbouring_pages_are_prefetched(cache):
+    cache.prefetch(1, 1.0, [(0, 0)])
+    wanted = {(cache.digest, page, 1.0, (0, 0)) for page in (0, 2)}
+    deadline = time.monotonic() + 10
+    while not wanted <= set(cache.entries) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert wanted <= set(cache.entries)
+
+
+def test_a_changed_file_is_opened_again(make_pdf):
+    cache = PreviewCache()
+    path = make_pdf("doc.pdf", ["one"])
+    cache.open(path)
+    doc, digest = cache.doc, cache.digest
+    cache.open(path)
+    assert cache.doc is doc
+    time.sleep(0.01)
+    make_pdf("doc.pdf", ["one", "two"])
+    cache.open(path)
+    assert cache.digest != digest and cache.page_count == 2
+    cache.close()
@@ -0,0 +1,46 @@
+import fitz  # PyMuPDF
+import pytest
+
+from redactedge.regions import Region, RegionSet, parse_pages
+
+
+@pytest.mark.parametrize("spec, pages", [
+    (0, [0]),
+    (9, []),
+    ("all", [0, 1, 2, 3, 4]),
+    ("odd", [0, 2, 4]),
+    ("even", [1, 3]),
+    ("last", [4]),
+    ("1-3,5", [0, 1, 2, 4]),
+    ("4-", [3, 4]),
+    ("2-last", [1, 2, 3, 4]),
+    ("3-99", [2, 3, 4]),
+])
+def test_parse_pages(spec, pages):
+    assert parse_pages(spec, 5) == pages
+
+
+@pytest.mark.parametrize("spec", ["", "0", "3-1", "x", "1,,2", "-"])
+def test_parse_pages_rejects_malformed_specs(spec):
+    with pytest.raises(ValueError):
+        parse_pages(spec, 5)
+
+
+def test_region_round_trips_through_dict():
+    for data in ({"rect": [0.0, 0.0, 10.0, 20.0], "page": 2}, {"rect": [1.0, 2.0, 3.0, 4.0], "pages": "odd"}):
+        assert Region.from_dict(data).to_dict() == data
+
+
+def test_region_needs_four_numbers():
+    with pytest.raises(ValueError):
+        Region((0, 0, 10))
+
+
+def test_region_set_resolves_per_document():
+    regions = RegionSet([{"rect": [0, 0, 10, 10], "pages": "all"}, {"rect": [5, 5, 6, 6], "page": 1}])
+    pages = regions.by_page(2)
+    assert sorted(pages) == [0, 1]
+    assert pages[0] == [fitz.Rect(0, 0, 10, 10)]
+    assert pages[1] == [fitz.Rect(0, 0, 10, 10), fitz.Rect(5, 5, 6, 6)]
+    assert [r.pages for r in regions.on_page(1, 2)] == ["all", 1]
+    assert regions.by_page(1) == {0: [fitz.Rect(0, 0, 10, 10)]}
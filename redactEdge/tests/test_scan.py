@@ -0,0 +1,62 @@
+import fitz  # PyMuPDF
+
+from redactedge import DeleteTextOperation
+from redactedge.job import JobSpec
+from redactedge.pipeline import Pipeline
+from redactedge.regions import RegionSet
+from redactedge.scan import Scanner, scan_files
+
+
+def test_counts_terms_and_patterns_per_page(make_pdf):
+    path = make_pdf("a.pdf", ["Secret plan", "mail bob@example.com", "secret SECRET"])
+    result = Scanner(["secret"], patterns=["email"]).scan(path)
+    assert result.ok and result.page_count == 3
+    assert result.pages == {0: {"secret": 1}, 1: {"pattern:email": 1}, 2: {"secret": 2}}
+    assert result.totals() == {"secret": 3, "pattern:email": 1}
+    assert "pages 1, 2, 3" in result.describe()
+
+
+def test_extra_sources_only_when_asked(tmp_path):
+    path = str(tmp_path / "a.pdf")
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((72, 72), "nothing here")
+        page.add_text_annot((72, 100), "secret note")
+        doc.set_metadata({"title": "secret title"})
+        doc.set_toc([[1, "Secret chapter", 1]])
+        doc.embfile_add("notes.txt", b"the secret", filename="notes.txt")
+        doc.save(path)
+    assert Scanner(["secret"]).scan(path).clean
+    result = Scanner(["secret"], sources=("annotations", "metadata", "bookmarks", "embedded")).scan(path)
+    assert result.annotations == {0: {"secret": 1}}
+    assert result.document == {"metadata": {"secret": 1}, "bookmarks": {"secret": 1}, "embedded": {"secret": 1}}
+
+
+def test_verify_catches_covered_text_but_not_removed_text(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["account secret"])
+    covered = str(tmp_path / "covered.pdf")
+    with fitz.open(path) as doc:
+        doc[0].draw_rect(fitz.Rect(0, 0, 300, 100), color=(1, 1, 1), fill=(1, 1, 1))
+        doc.save(covered)
+    removed = str(tmp_path / "removed.pdf")
+    Pipeline([DeleteTextOperation(["secret"])]).run(path, removed)
+    spec = JobSpec(delete_text=["secret"], delete_area=[{"rect": [0, 0, 300, 100], "page": 0}])
+    scanner = Scanner.for_job(spec, verify=True)
+    leaked, clean = scan_files([covered, removed], scanner, workers=1)
+    assert leaked.pages == {0: {"secret": 1}} and leaked.areas == {0: "account secret"}
+    assert clean.pages == {} and clean.areas == {0: "account"}
+
+
+def test_replacements_that_keep_their_term_are_not_leaks():
+    spec = JobSpec(replace_text=[("ACME", "ACME Ltd"), ("Bob", "Robert")])
+    assert [m.terms for m, _ in Scanner.for_job(spec, verify=True).matchers[1:]] == [["bob"]]
+
+
+def test_unreadable_files_and_order_across_workers(tmp_path, make_pdf):
+    files = [make_pdf(f"f{i}.pdf", ["secret"] * (i + 1)) for i in range(3)]
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    results = list(scan_files(files + [str(broken)], Scanner(["secret"], areas=RegionSet()), workers=2))
+    assert [r.input_path for r in results] == files + [str(broken)]
+    assert [r.hits for r in results[:3]] == [1, 2, 3]
+    assert not results[3].ok and "error" in results[3].describe()
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import fitz  # PyMuPDF
+import pytest
+
+from redactedge.job import JobError
+from redactedge.service import JobTooLarge, Service, make_server
+
+
+@pytest.fixture
+def inputs(tmp_path, make_pdf):
+    folder = tmp_path / "in"
+    folder.mkdir()
+    return [make_pdf(f"in/f{i}.pdf", [f"secret {i}"]) for i in range(3)]
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = Service(str(tmp_path / "out"), workers=1, max_queue=2, input_roots=[str(tmp_path / "in")])
+    yield service
+    service.close()
+
+
+def test_a_job_larger_than_the_queue_is_refused_for_good(service, inputs):
+    with pytest.raises(JobTooLarge, match="at most 2"):
+        service.submit({"inputs": inputs, "delete_text": ["secret"]})
+    assert service.queued == 0
+
+
+def test_a_full_queue_is_refused_until_it_drains(service, inputs):
+    service.queued = 1
+    with pytest.raises(OverflowError, match="Queue full"):
+        service.submit({"inputs": inputs[:2], "delete_text": ["secret"]})
+
+
+def test_jobs_may_not_read_or_write_outside_the_roots(service, inputs, tmp_path):
+    outside = tmp_path / "elsewhere.pdf"
+    outside.write_bytes(open(inputs[0], "rb").read())
+    os.symlink(outside, tmp_path / "in" / "link.pdf")
+    refused = [
+        {"inputs": [str(outside)]},
+        {"inputs": [str(tmp_path / "in" / ".." / "elsewhere.pdf")]},
+        {"inputs": [str(tmp_path / "in" / "link.pdf")]},
+        {"inputs": inputs[:1], "output_dir": str(tmp_path / "elsewhere")},
+        {"inputs": inputs[:1], "metrics_file": "/tmp/metrics.jsonl"},
+        {"inputs": inputs[:1], "replace_image": "/etc/hostname"},
+    ]
+    for data in refused:
+        with pytest.raises(JobError, match="root of the service"):
+            service.submit(dict(data, delete_text=["secret"]))
+
+
+def test_http_jobs_run_in_warm_workers(service, inputs):
+    service.start()
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def request(method, path, body=None):
+        req = urllib.request.Request(base + path, data=body, method=method)
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    try:
+        status, body = request("POST", "/jobs", json.dumps({"inputs": inputs, "delete_text": ["x"]}).encode())
+        assert status == 413
+        status, body = request("POST", "/jobs", json.dumps({"inputs": inputs[:2], "delete_text": ["secret"]}).encode())
+        assert status == 202
+        job_id = json.loads(body)["id"]
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            job = json.loads(request("GET", f"/jobs/{job_id}")[1])
+            if job["status"] not in ("queued", "running"):
+                break
+            time.sleep(0.1)
+        assert job["status"] == "done" and job["done"] == 2
+        status, pdf = request("GET", f"/jobs/{job_id}/files/1")
+        assert status == 200
+        with fitz.open("pdf", pdf) as doc:
+            assert "secret" not in doc[0].get_text()
+        assert request("POST", "/documents", b"not a pdf")[0] == 400
+        assert service.queued == 0
+    finally:
+        server.shutdown()
+        server.server_close()
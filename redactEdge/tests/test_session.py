@@ -0,0 +1,77 @@
+import fitz  # PyMuPDF
+
+from redactedge import tables
+from redactedge.operations import DeleteAreaOperation
+from redactedge.pipeline import Pipeline
+from redactedge.session import TemplateSession
+from redactedge.tables import TableDetector
+
+
+def table_pdf(path, cells, top=100):
+    """A one-page PDF with a ruled table of ``cells`` whose top edge is at ``top``."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Monthly report")
+    rows, columns = len(cells), len(cells[0])
+    for row in range(rows + 1):
+        page.draw_line((72, top + 20 * row), (72 + 120 * columns, top + 20 * row))
+    for column in range(columns + 1):
+        page.draw_line((72 + 120 * column, top), (72 + 120 * column, top + 20 * rows))
+    for row, values in enumerate(cells):
+        for column, text in enumerate(values):
+            page.insert_text((76 + 120 * column, top + 14 + 20 * row), text)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def run(tmp_path, names, session, monkeypatch):
+    """Redact the detected tables of every file; return the pages detected and each output's text."""
+    detected = []
+
+    def detect(page, strategy="lines"):
+        detected.append(page.parent.name)
+        return real_detect(page, strategy)
+
+    real_detect = tables.detect_tables
+    monkeypatch.setattr(tables, "detect_tables", detect)
+    pipeline = Pipeline([DeleteAreaOperation(tables=TableDetector())], session=session)
+    texts = []
+    for name in names:
+        output = str(tmp_path / f"out_{name}")
+        pipeline.run(str(tmp_path / name), output)
+        with fitz.open(output) as doc:
+            texts.append(doc[0].get_text())
+    return [name.rsplit("/", 1)[-1] for name in detected], texts
+
+
+def test_files_differing_only_in_body_text_reuse_the_tables(tmp_path, monkeypatch):
+    table_pdf(str(tmp_path / "a.pdf"), [["Name", "Amount"], ["Alice", "100"]])
+    table_pdf(str(tmp_path / "b.pdf"), [["Name", "Amount"], ["Bob", "250"]])
+    session = TemplateSession()
+    detected, texts = run(tmp_path, ["a.pdf", "b.pdf"], session, monkeypatch)
+    assert detected == ["a.pdf"]
+    assert (session.hits, session.misses) == (1, 1)
+    assert "Bob" not in texts[1] and "250" not in texts[1]
+    assert "Monthly report" in texts[1]
+
+
+def test_a_different_layout_takes_the_full_path(tmp_path, monkeypatch):
+    table_pdf(str(tmp_path / "a.pdf"), [["Name", "Amount"], ["Alice", "100"]])
+    table_pdf(str(tmp_path / "moved.pdf"), [["Name", "Amount"], ["Carol", "300"]], top=300)
+    table_pdf(str(tmp_path / "longer.pdf"), [["Name", "Amount"], ["Dan", "1"], ["Eve", "2"]])
+    session = TemplateSession()
+    detected, texts = run(tmp_path, ["a.pdf", "moved.pdf", "longer.pdf"], session, monkeypatch)
+    assert detected == ["a.pdf", "moved.pdf", "longer.pdf"]
+    assert (session.hits, session.misses) == (0, 3)
+    assert "Carol" not in texts[1]
+    assert "Eve" not in texts[2]
+
+
+def test_other_page_boxes_do_not_match(tmp_path):
+    session = TemplateSession()
+    with fitz.open() as letter, fitz.open() as a4:
+        letter.new_page(width=612, height=792).insert_text((72, 72), "x")
+        a4.new_page(width=595, height=842).insert_text((72, 72), "x")
+        assert session.bind(letter, [0]) is not session.bind(a4, [0])
+        assert session.bind(letter, [0]) is session.bind(letter, [0])
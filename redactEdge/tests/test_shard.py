@@ -0,0 +1,64 @@
+import fitz  # PyMuPDF
+
+from redactedge import DeleteTextOperation, Operation
+from redactedge.pipeline import Pipeline, PipelineContext, share_shard_workers
+from redactedge.shard import page_ranges, shard_blocker
+
+
+def book(path, pages=6):
+    """A PDF with metadata, an outline, page labels and a link from the first page to the last."""
+    doc = fitz.open()
+    for pno in range(pages):
+        doc.new_page().insert_text((72, 72), f"Chapter {pno + 1} secret")
+    doc.set_metadata({"title": "Annual report", "author": "Finance"})
+    doc.set_toc([[1, f"Chapter {pno + 1}", pno + 1] for pno in range(pages)])
+    doc.set_page_labels([{"startpage": 0, "prefix": "A-", "style": "D", "firstpagenum": 1}])
+    doc[0].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(72, 100, 200, 120), "page": pages - 1,
+                        "to": fitz.Point(72, 72)})
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def run(path, output_path, **options):
+    messages = []
+    Pipeline([DeleteTextOperation(["secret"])], **options).run(path, output_path, PipelineContext(messages.append))
+    return messages
+
+
+def test_sharded_result_matches_a_serial_run(tmp_path):
+    path = book(str(tmp_path / "book.pdf"))
+    sharded, serial = str(tmp_path / "sharded.pdf"), str(tmp_path / "serial.pdf")
+    messages = run(path, sharded, shard_threshold=2, shard_workers=2)
+    assert any("shards on 2 worker(s)" in message for message in messages)
+    run(path, serial, shard_workers=1)
+    with fitz.open(sharded) as a, fitz.open(serial) as b:
+        assert a.page_count == b.page_count == 6
+        assert [page.get_text() for page in a] == [page.get_text() for page in b]
+        assert "secret" not in a[5].get_text()
+        assert a.metadata["title"] == "Annual report" and a.metadata["author"] == "Finance"
+        assert a.get_toc() == b.get_toc()
+        assert [page.get_label() for page in a] == [f"A-{pno + 1}" for pno in range(6)]
+        links = a[0].get_links()
+        assert [(link["kind"], link["page"]) for link in links] == [(fitz.LINK_GOTO, 5)]
+
+
+def test_whole_document_operations_are_not_sharded(tmp_path):
+    class Renumber(Operation):
+        name = "renumber"
+
+        def apply(self, doc, context):
+            pass
+
+    path = book(str(tmp_path / "book.pdf"))
+    with fitz.open(path) as doc:
+        assert shard_blocker(doc, [DeleteTextOperation(["secret"])]) is None
+        assert "renumber" in shard_blocker(doc, [Renumber()])
+    assert page_ranges(5, 2) == [(0, 3), (3, 5)]
+
+
+def test_batch_workers_share_the_shard_workers():
+    assert share_shard_workers({"shard_workers": 8}, 1) == {"shard_workers": 8}
+    assert share_shard_workers({"shard_workers": 8}, 4) == {"shard_workers": 2}
+    assert share_shard_workers({"shard_workers": 2}, 4) == {"shard_workers": 1}
+    assert share_shard_workers({}, 64)["shard_workers"] == 1
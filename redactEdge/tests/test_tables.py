@@ -0,0 +1,73 @@
+import pickle
+
+import fitz  # PyMuPDF
+import pytest
+
+from redactedge import tables
+from redactedge.operations import DeleteAreaOperation
+from redactedge.pipeline import Pipeline
+from redactedge.tables import TableDetector, TableFilter
+
+
+def table_pdf(path, header, rows=2, note="Quarterly figures"):
+    """A page of text above a ruled table with ``header`` and ``rows`` body rows."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), note)
+    top, columns = 100, len(header)
+    for row in range(rows + 2):
+        page.draw_line((72, top + 20 * row), (72 + 120 * columns, top + 20 * row))
+    for column in range(columns + 1):
+        page.draw_line((72 + 120 * column, top), (72 + 120 * column, top + 20 * (rows + 1)))
+    for column, name in enumerate(header):
+        page.insert_text((76 + 120 * column, top + 14), name)
+        for row in range(rows):
+            page.insert_text((76 + 120 * column, top + 34 + 20 * row), f"{name[0]}{row}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_filter_by_header_and_size():
+    table = {"columns": 3, "rows": 4, "header": ["Name", "IBAN", "Amount"]}
+    assert TableFilter().matches(table)
+    assert TableFilter(header=["iban"]).matches(table)
+    assert not TableFilter(header=["salary"]).matches(table)
+    assert TableFilter(min_columns=3, max_columns=3, min_rows=4).matches(table)
+    assert not TableFilter(max_columns=2).matches(table)
+    assert not TableFilter(min_rows=5).matches(table)
+    with pytest.raises(ValueError):
+        TableDetector(strategy="guess")
+
+
+def test_detections_are_cached_by_page_content(tmp_path, monkeypatch):
+    calls = []
+    real = tables.detect_tables
+    monkeypatch.setattr(tables, "detect_tables", lambda page, strategy: calls.append(strategy) or real(page, strategy))
+    cache_path = str(tmp_path / "tables.sqlite")
+    path = table_pdf(str(tmp_path / "a.pdf"), ["Name", "Amount"])
+    copy = table_pdf(str(tmp_path / "b.pdf"), ["Name", "Amount"])
+    other = table_pdf(str(tmp_path / "c.pdf"), ["Name", "Amount"], rows=3)
+    found = []
+    for source in (path, copy, other):
+        detector = pickle.loads(pickle.dumps(TableDetector(cache_path=cache_path)))
+        with fitz.open(source) as doc:
+            found.append(detector.find(doc[0]))
+        detector.finish()
+    assert calls == ["lines", "lines"]
+    assert found[0] == found[1] and found[0] != found[2]
+    x0, y0, x1, y1 = found[0][0]
+    assert (round(x0), round(y0), round(x1), round(y1)) == (72, 100, 312, 160)
+
+
+def test_only_matching_tables_are_redacted(tmp_path):
+    path = table_pdf(str(tmp_path / "a.pdf"), ["Name", "IBAN"])
+    kept, redacted = str(tmp_path / "kept.pdf"), str(tmp_path / "redacted.pdf")
+    Pipeline([DeleteAreaOperation(tables=TableDetector(TableFilter(header=["salary"])))]).run(path, kept)
+    Pipeline([DeleteAreaOperation(tables=TableDetector(TableFilter(header=["iban"])))]).run(path, redacted)
+    with fitz.open(kept) as doc:
+        assert "IBAN" in doc[0].get_text()
+    with fitz.open(redacted) as doc:
+        text = doc[0].get_text()
+    assert "IBAN" not in text and "N0" not in text
+    assert "Quarterly figures" in text
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+import fitz  # PyMuPDF
+
+from redactedge.job import JobSpec
+from redactedge.watch import HotFolder, report_path_for
+
+
+def watch(folder, reports, timeout=60):
+    """Serve ``folder`` until every path in ``reports`` exists; return the parsed reports."""
+
+    async def main():
+        stop = asyncio.Event()
+        task = asyncio.create_task(folder.run(stop))
+        deadline = time.monotonic() + timeout
+        while not all(os.path.exists(path) for path in reports) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        stop.set()
+        await task
+
+    asyncio.run(main())
+    loaded = []
+    for path in reports:
+        with open(path, encoding="utf-8") as f:
+            loaded.append(json.load(f))
+    return loaded
+
+
+def hot_folder(tmp_path, **fields):
+    spec = JobSpec([str(tmp_path / "in")], str(tmp_path / "out"), delete_text=["secret"], workers=1, **fields)
+    return HotFolder(spec, settle=0.2, poll_interval=0.05, use_inotify=False)
+
+
+def drop(tmp_path, make_pdf, *names):
+    for name in names:
+        os.makedirs(tmp_path / "in" / os.path.dirname(name), exist_ok=True)
+        make_pdf(f"in/{name}", [f"secret in {name}"])
+
+
+def test_outputs_mirror_the_watched_folders(tmp_path, make_pdf):
+    drop(tmp_path, make_pdf, "a/x.pdf", "b/x.pdf", "top.pdf")
+    out = tmp_path / "out"
+    outputs = [str(out / "a" / "x_modified.pdf"), str(out / "b" / "x_modified.pdf"), str(out / "top_modified.pdf")]
+    reports = watch(hot_folder(tmp_path), [report_path_for(path) for path in outputs])
+    assert [report["ok"] for report in reports] == [True, True, True]
+    assert [os.path.relpath(report["input"], tmp_path / "in") for report in reports] == [
+        os.path.join("a", "x.pdf"), os.path.join("b", "x.pdf"), "top.pdf"]
+    for path in outputs:
+        with fitz.open(path) as doc:
+            assert "secret" not in doc[0].get_text()
+
+
+def test_a_restarted_watcher_takes_finished_files_from_the_cache(tmp_path, make_pdf):
+    drop(tmp_path, make_pdf, "x.pdf")
+    report = report_path_for(str(tmp_path / "out" / "x_modified.pdf"))
+    assert watch(hot_folder(tmp_path), [report])[0]["cached"] is False
+    os.remove(report)
+    assert watch(hot_folder(tmp_path), [report])[0]["cached"] is True
+
+
+def test_an_unexpected_error_fails_the_file_and_keeps_the_worker(tmp_path, make_pdf):
+    drop(tmp_path, make_pdf, "x.pdf", "y.pdf")
+    folder = hot_folder(tmp_path)
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    folder.cache.lookup = locked
+    out = tmp_path / "out"
+    reports = watch(folder, [report_path_for(str(out / f"{name}_modified.pdf")) for name in "xy"])
+    assert [report["error"] for report in reports] == ["OperationalError: database is locked"] * 2
+
+
+def test_files_are_taken_only_once_they_settle(tmp_path):
+    folder = hot_folder(tmp_path)
+    path = str(tmp_path / "in" / "growing.pdf")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+    folder.notice(path)
+    first = folder.pending[path]
+    with open(path, "ab") as f:
+        f.write(b"more")
+    folder.notice(path)
+    assert folder.pending[path][0] != first[0]
+    folder.notice(str(tmp_path / "in" / "notes.txt"))
+    folder.notice(str(tmp_path / "out" / "x.pdf"))
+    assert list(folder.pending) == [path]
+
+
+def test_several_roots_get_a_folder_each(tmp_path):
+    roots = [tmp_path / "x" / "scans", tmp_path / "y" / "scans", tmp_path / "x"]
+    spec = JobSpec([str(root) for root in roots], str(tmp_path / "out"))
+    folder = HotFolder(spec)
+    out = tmp_path / "out"
+    assert folder.output_path(str(roots[0] / "a" / "f.pdf")) == str(out / "scans" / "a" / "f_modified.pdf")
+    assert folder.output_path(str(roots[1] / "f.pdf")) == str(out / "scans_1" / "f_modified.pdf")
+    assert folder.output_path(str(roots[2] / "f.pdf")) == str(out / "x" / "f_modified.pdf")